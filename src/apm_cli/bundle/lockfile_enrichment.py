@@ -115,12 +115,12 @@ def enrich_lockfile_for_pack(
         A YAML string with the ``pack:`` block followed by the original
         lockfile content.
     """
-    import yaml
+    from ..utils.yaml_io import yaml_from_str, yaml_to_str
 
     # Build a filtered lockfile YAML: each dep's deployed_files is narrowed
     # to only the paths matching the pack target (with cross-target mapping).
     all_mappings: Dict[str, str] = {}
-    data = yaml.safe_load(lockfile.to_yaml())
+    data = yaml_from_str(lockfile.to_yaml())
     if data and "dependencies" in data:
         for dep in data["dependencies"]:
             if "deployed_files" in dep:
@@ -151,8 +151,6 @@ def enrich_lockfile_for_pack(
                     break
         pack_meta["mapped_from"] = sorted(used_src_prefixes)
 
-    from ..utils.yaml_io import yaml_to_str
-
     pack_section = yaml_to_str({"pack": pack_meta})
 
     lockfile_yaml = yaml_to_str(data)
@@ -104,8 +104,8 @@ def unpack_bundle(
         # Extract pack: metadata (written by apm pack) before structured parse
         pack_meta: Dict = {}
         try:
-            import yaml
-            raw = yaml.safe_load(lockfile_path.read_text(encoding="utf-8"))
+            from ..utils.yaml_io import load_yaml
+            raw = load_yaml(lockfile_path)
             if isinstance(raw, dict):
                 val = raw.get("pack", {})
                 pack_meta = val if isinstance(val, dict) else {}
@@ -156,20 +156,37 @@ def _scan_installed_packages(apm_modules_dir: Path) -> list:
     Walks the tree to find directories containing ``apm.yml`` or ``.apm``,
     supporting GitHub (2-level), ADO (3-level), and subdirectory packages.
 
+    Uses ``os.scandir`` so directory checks come from the cached entry type
+    instead of a ``stat()`` per path.  Like ``rglob``, symlinked directories
+    are reported but not descended into.
+
     Returns:
-        List of ``"owner/repo"`` or ``"org/project/repo"`` path keys.
+        Sorted list of ``"owner/repo"`` or ``"org/project/repo"`` path keys.
     """
     installed: list = []
     if not apm_modules_dir.exists():
         return installed
-    for candidate in apm_modules_dir.rglob("*"):
-        if not candidate.is_dir() or candidate.name.startswith("."):
-            continue
-        if not ((candidate / APM_YML_FILENAME).exists() or (candidate / APM_DIR).exists()):
+    pending = [(os.fspath(apm_modules_dir), "")]
+    while pending:
+        dir_path, rel = pending.pop()
+        try:
+            entries = os.scandir(dir_path)
+        except OSError:
             continue
-        rel_parts = candidate.relative_to(apm_modules_dir).parts
-        if len(rel_parts) >= 2:
-            installed.append("/".join(rel_parts))
+        with entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                key = f"{rel}/{entry.name}" if rel else entry.name
+                if not entry.is_symlink():
+                    pending.append((entry.path, key))
+                if not rel or entry.name.startswith("."):
+                    continue
+                if os.path.exists(os.path.join(entry.path, APM_YML_FILENAME)) or (
+                    os.path.exists(os.path.join(entry.path, APM_DIR))
+                ):
+                    installed.append(key)
+    installed.sort()
     return installed
 
 
@@ -181,7 +198,7 @@ def _check_orphaned_packages():
     flagged as orphaned.
 
     Returns:
-        List[str]: List of orphaned package names in org/repo or org/project/repo format
+        List[str]: Sorted orphaned package names in org/repo or org/project/repo format
     """
     try:
         if not Path(APM_YML_FILENAME).exists():
@@ -203,7 +220,7 @@ def _check_orphaned_packages():
             return []
 
         installed = _scan_installed_packages(apm_modules_dir)
-        return [p for p in installed if p not in expected]
+        return sorted(builtins.set(installed) - expected)
     except Exception:
         return []
 
@@ -1400,6 +1400,29 @@ def _copy_local_package(dep_ref, install_path, project_root):
     return install_path
 
 
+def _package_filter_identities(only_packages) -> "builtins.set":
+    """Build the identity set used to filter ``apm install <pkg>...`` runs.
+
+    Accepts any input form (git URLs, FQDN, shorthand). Identities are
+    host-normalized, so ``owner/repo`` and ``github.com/owner/repo`` collapse
+    to one entry and each dependency is matched with a single set lookup.
+    Specs that fail to parse are kept verbatim; repeated specs are parsed once.
+
+    Args:
+        only_packages: Package specs passed on the command line
+
+    Returns:
+        Mutable set of identities; callers extend it with descendants.
+    """
+    identities = builtins.set()
+    for spec in dict.fromkeys(only_packages):
+        try:
+            identities.add(DependencyReference.parse(spec).get_identity())
+        except Exception:
+            identities.add(spec)
+    return identities
+
+
 def _install_apm_dependencies(
     apm_package: "APMPackage",
     update_refs: bool = False,
@@ -1621,31 +1644,24 @@ def _install_apm_dependencies(
         # sub-deps (and their MCP servers) are installed and recorded
         # in the lockfile.
         if only_packages:
-            # Build identity set from user-supplied package specs.
-            # Accepts any input form: git URLs, FQDN, shorthand.
-            only_identities = builtins.set()
-            for p in only_packages:
-                try:
-                    ref = DependencyReference.parse(p)
-                    only_identities.add(ref.get_identity())
-                except Exception:
-                    only_identities.add(p)
+            only_identities = _package_filter_identities(only_packages)
 
             # Expand the set to include transitive descendants of the
             # requested packages so their MCP servers, primitives, etc.
             # are correctly installed and written to the lockfile.
+            # ``visited`` is shared across roots: a subtree reachable from
+            # several requested packages is walked only once.
             tree = dependency_graph.dependency_tree
+            visited = builtins.set()
 
-            def _collect_descendants(node, visited=None):
+            def _collect_descendants(node):
                 """Walk the tree and add every child identity (cycle-safe)."""
-                if visited is None:
-                    visited = builtins.set()
                 for child in node.children:
                     identity = child.dependency_ref.get_identity()
                     if identity not in visited:
                         visited.add(identity)
                         only_identities.add(identity)
-                        _collect_descendants(child, visited)
+                        _collect_descendants(child)
 
             for node in tree.nodes.values():
                 if node.dependency_ref.get_identity() in only_identities:
@@ -2746,8 +2762,7 @@ def _install_apm_dependencies(
                 if only_packages:
                     existing = LockFile.read(lockfile_path)
                     if existing:
-                        for key, dep in lockfile.dependencies.items():
-                            existing.add_dependency(dep)
+                        existing.add_dependencies(lockfile.dependencies.values())
                         lockfile = existing
 
                 # Only write when the semantic content has actually changed
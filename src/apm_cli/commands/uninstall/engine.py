@@ -63,6 +63,24 @@ def _validate_uninstall_packages(packages, current_deps, logger):
     return packages_to_remove, packages_not_found
 
 
+def _find_transitive_orphans(lockfile, removed_repo_urls):
+    """Return keys of lockfile deps brought in by *removed_repo_urls*, transitively.
+
+    Walks the ``resolved_by`` edges from the removed packages downwards,
+    visiting each lockfile entry at most once.
+    """
+    children_by_parent = lockfile.get_dependents_by_parent()
+    orphans = builtins.set()
+    queue = builtins.list(removed_repo_urls)
+    while queue:
+        for dep in children_by_parent.get(queue.pop(), ()):
+            key = dep.get_unique_key()
+            if key not in orphans:
+                orphans.add(key)
+                queue.append(dep.repo_url)
+    return orphans
+
+
 def _dry_run_uninstall(packages_to_remove, apm_modules_dir, logger):
     """Show what would be removed without making changes."""
     logger.progress(f"Dry run: Would remove {len(packages_to_remove)} package(s):")
@@ -88,17 +106,7 @@ def _dry_run_uninstall(packages_to_remove, apm_modules_dir, logger):
                 removed_repo_urls.add(ref.repo_url)
             except (ValueError, TypeError, AttributeError, KeyError):
                 removed_repo_urls.add(pkg)
-        queue = builtins.list(removed_repo_urls)
-        potential_orphans = builtins.set()
-        while queue:
-            parent_url = queue.pop()
-            for dep in lockfile.get_all_dependencies():
-                key = dep.get_unique_key()
-                if key in potential_orphans:
-                    continue
-                if dep.resolved_by and dep.resolved_by == parent_url:
-                    potential_orphans.add(key)
-                    queue.append(dep.repo_url)
+        potential_orphans = _find_transitive_orphans(lockfile, removed_repo_urls)
         if potential_orphans:
             logger.progress(f"  Transitive dependencies that would be removed:")
             for orphan_key in sorted(potential_orphans):
@@ -160,18 +168,7 @@ def _cleanup_transitive_orphans(lockfile, packages_to_remove, apm_modules_dir, a
         except (ValueError, TypeError, AttributeError, KeyError):
             removed_repo_urls.add(pkg)
 
-    # Find transitive orphans recursively
-    orphans = builtins.set()
-    queue = builtins.list(removed_repo_urls)
-    while queue:
-        parent_url = queue.pop()
-        for dep in lockfile.get_all_dependencies():
-            key = dep.get_unique_key()
-            if key in orphans:
-                continue
-            if dep.resolved_by and dep.resolved_by == parent_url:
-                orphans.add(key)
-                queue.append(dep.repo_url)
+    orphans = _find_transitive_orphans(lockfile, removed_repo_urls)
 
     if not orphans:
         return 0, builtins.set()
@@ -107,7 +107,7 @@ def _lookup_lockfile_ref(package: str, project_root: Path):
         dep = lockfile.dependencies.get(package)
         if dep is None:
             for key, d in lockfile.dependencies.items():
-                if package in key or key.endswith(f"/{package}"):
+                if package in key:
                     dep = d
                     break
 
@@ -13,6 +13,38 @@ from typing import Dict, Optional
 from .token_manager import setup_runtime_environment
 from ..output.script_formatters import ScriptExecutionFormatter
 
+# Patterns used on every script run, compiled once at import time
+_PROMPT_FILE_RE = re.compile(r"(\S+\.prompt\.md)")
+# Supported runtimes in detection priority order; a runtime only counts when
+# it appears as a whole whitespace-separated word (not inside a model name).
+_RUNTIMES = ("copilot", "codex", "llm")
+_ENV_VAR_NAME_RE = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+
+
+def _starts_with_runtime(command: str, runtime: str) -> bool:
+    """Return True if *command* is ``<runtime>`` followed by whitespace."""
+    end = len(runtime)
+    return command.startswith(runtime) and command[end : end + 1].isspace()
+
+
+def _write_utf8(path: Path, text: str) -> None:
+    """Write *text* to *path* as UTF-8 text, translating newlines per platform."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _split_around_prompt(args: str, prompt_file: str) -> Optional[tuple[str, str]]:
+    """Split runtime arguments around the first occurrence of *prompt_file*.
+
+    Returns:
+        ``(args_before_file, args_after_file)`` stripped, or None if the
+        prompt file does not appear in *args*.
+    """
+    before, found, after = args.partition(prompt_file)
+    if not found:
+        return None
+    return before.strip(), after.strip()
+
 
 class ScriptRunner:
     """Executes APM scripts with auto-compilation of .prompt.md files."""
@@ -245,7 +277,7 @@ class ScriptRunner:
             Tuple of (compiled_command, list_of_compiled_prompt_files, runtime_content_or_none)
         """
         # Find all .prompt.md files in the command using regex
-        prompt_files = re.findall(r"(\S+\.prompt\.md)", command)
+        prompt_files = _PROMPT_FILE_RE.findall(command)
         compiled_prompt_files = []
         runtime_content = None
 
@@ -260,10 +292,9 @@ class ScriptRunner:
                 compiled_content = f.read().strip()
 
             # Check if this is a runtime command (copilot, codex, llm) before transformation
-            is_runtime_cmd = any(
-                re.search(r"(?:^|\s)" + runtime + r"(?:\s|$)", command)
-                for runtime in ["copilot", "codex", "llm"]
-            ) and re.search(re.escape(prompt_file), command)
+            is_runtime_cmd = prompt_file in command and not set(
+                command.split()
+            ).isdisjoint(_RUNTIMES)
 
             # Transform command based on runtime pattern
             compiled_command = self._transform_runtime_command(
@@ -296,12 +327,8 @@ class ScriptRunner:
 
         for runtime_cmd in runtime_commands:
             runtime_pattern = f" {runtime_cmd} "
-            if runtime_pattern in command and re.search(
-                re.escape(prompt_file), command
-            ):
-                parts = command.split(runtime_pattern, 1)
-                potential_env_part = parts[0]
-                runtime_part = runtime_cmd + " " + parts[1]
+            if runtime_pattern in command and prompt_file in command:
+                potential_env_part, runtime_args = command.split(runtime_pattern, 1)
 
                 # Check if the first part looks like environment variables (has = signs)
                 if "=" in potential_env_part and not potential_env_part.startswith(
@@ -310,15 +337,9 @@ class ScriptRunner:
                     env_vars = potential_env_part
 
                     # Extract arguments before and after the prompt file from runtime part
-                    runtime_match = re.search(
-                        f"{runtime_cmd}\\s+(.*?)("
-                        + re.escape(prompt_file)
-                        + r")(.*?)$",
-                        runtime_part,
-                    )
-                    if runtime_match:
-                        args_before_file = runtime_match.group(1).strip()
-                        args_after_file = runtime_match.group(3).strip()
+                    split_args = _split_around_prompt(runtime_args, prompt_file)
+                    if split_args:
+                        args_before_file, args_after_file = split_args
 
                         # Build the command based on runtime
                         if runtime_cmd == "codex":
@@ -342,60 +363,39 @@ class ScriptRunner:
                         return result
 
         # Handle individual runtime patterns without environment variables
+        for runtime_cmd in runtime_commands:
+            if not _starts_with_runtime(command, runtime_cmd):
+                continue
+            split_args = _split_around_prompt(command[len(runtime_cmd) :], prompt_file)
+            if not split_args:
+                continue
+            args_before_file, args_after_file = split_args
 
-        # Handle "codex [args] file.prompt.md [more_args]" -> "codex exec [args] [more_args]"
-        if re.search(r"^codex\s+.*" + re.escape(prompt_file), command):
-            match = re.search(
-                r"codex\s+(.*?)(" + re.escape(prompt_file) + r")(.*?)$", command
-            )
-            if match:
-                args_before_file = match.group(1).strip()
-                args_after_file = match.group(3).strip()
-
+            if runtime_cmd == "codex":
+                # "codex [args] file.prompt.md [more_args]" -> "codex exec [args] [more_args]"
                 result = "codex exec"
                 if args_before_file:
                     result += f" {args_before_file}"
-                if args_after_file:
-                    result += f" {args_after_file}"
-                return result
-
-        # Handle "copilot [args] file.prompt.md [more_args]" -> "copilot [args] [more_args]"
-        elif re.search(r"^copilot\s+.*" + re.escape(prompt_file), command):
-            match = re.search(
-                r"copilot\s+(.*?)(" + re.escape(prompt_file) + r")(.*?)$", command
-            )
-            if match:
-                args_before_file = match.group(1).strip()
-                args_after_file = match.group(3).strip()
-
+            elif runtime_cmd == "copilot":
+                # "copilot [args] file.prompt.md [more_args]" -> "copilot [args] [more_args]"
                 result = "copilot"
                 if args_before_file:
                     # Remove any existing -p flag since we'll handle it in execution
                     cleaned_args = args_before_file.replace("-p", "").strip()
                     if cleaned_args:
                         result += f" {cleaned_args}"
-                if args_after_file:
-                    result += f" {args_after_file}"
-                return result
-
-        # Handle "llm [args] file.prompt.md [more_args]" -> "llm [args] [more_args]"
-        elif re.search(r"^llm\s+.*" + re.escape(prompt_file), command):
-            match = re.search(
-                r"llm\s+(.*?)(" + re.escape(prompt_file) + r")(.*?)$", command
-            )
-            if match:
-                args_before_file = match.group(1).strip()
-                args_after_file = match.group(3).strip()
-
+            else:
+                # "llm [args] file.prompt.md [more_args]" -> "llm [args] [more_args]"
                 result = "llm"
                 if args_before_file:
                     result += f" {args_before_file}"
-                if args_after_file:
-                    result += f" {args_after_file}"
-                return result
+
+            if args_after_file:
+                result += f" {args_after_file}"
+            return result
 
         # Handle bare "file.prompt.md" -> "codex exec" (default to codex)
-        elif command.strip() == prompt_file:
+        if command.strip() == prompt_file:
             return "codex exec"
 
         # Fallback: just replace file path with compiled path (for non-runtime commands)
@@ -410,15 +410,11 @@ class ScriptRunner:
         Returns:
             Name of the detected runtime (copilot, codex, llm, or unknown)
         """
-        command_lower = command.lower().strip()
-        if re.search(r"(?:^|\s)copilot(?:\s|$)", command_lower):
-            return "copilot"
-        elif re.search(r"(?:^|\s)codex(?:\s|$)", command_lower):
-            return "codex"
-        elif re.search(r"(?:^|\s)llm(?:\s|$)", command_lower):
-            return "llm"
-        else:
-            return "unknown"
+        tokens = set(command.lower().split())
+        for runtime in _RUNTIMES:
+            if runtime in tokens:
+                return runtime
+        return "unknown"
 
     def _execute_runtime_command(
         self, command: str, content: str, env: dict
@@ -454,7 +450,7 @@ class ScriptRunner:
                 key, value = arg.split("=", 1)
                 # Validate environment variable name with restrictive pattern
                 # Only allow uppercase letters, numbers, and underscores, starting with letter or underscore
-                if re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", key):
+                if _ENV_VAR_NAME_RE.match(key):
                     env_vars[key] = value
                     continue
             # Once we hit a non-env-var argument, everything else is part of the command
@@ -717,8 +713,10 @@ class ScriptRunner:
         Returns:
             True if this looks like a virtual package reference
         """
-        # Must have at least one slash
-        if "/" not in name:
+        # owner/repo plus at least one path segment; anything shorter can
+        # never be virtual, so skip the full parser for plain names and
+        # regular owner/repo packages.
+        if name.count("/") < 2:
             return False
 
         from ..models.apm_package import DependencyReference
@@ -771,7 +769,7 @@ class ScriptRunner:
             print(f"   Downloading from {dep_ref.to_github_url()}")
 
             if dep_ref.is_virtual_collection():
-                package_info = downloader.download_virtual_collection_package(
+                package_info = downloader.download_collection_package(
                     dep_ref, target_path
                 )
             elif dep_ref.is_virtual_subdirectory():
@@ -891,6 +889,13 @@ class ScriptRunner:
             raise ValueError(f"Unsupported runtime: {runtime}")
 
 
+# Prompt search locations used by PromptCompiler._resolve_prompt_file
+_COMMON_PROMPT_DIRS = (".github/prompts", ".apm/prompts")
+_APM_MODULES_DIR = "apm_modules"
+# Relative to each installed org/repo; "" is the dependency root
+_DEPENDENCY_PROMPT_SUBDIRS = ("", "prompts", "workflows")
+
+
 class PromptCompiler:
     """Compiles .prompt.md files with parameter substitution."""
 
@@ -939,18 +944,21 @@ class PromptCompiler:
         output_path = self.compiled_dir / output_name
 
         # Write compiled content
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(compiled_content)
+        _write_utf8(output_path, compiled_content)
 
         return str(output_path)
 
-    def _resolve_prompt_file(self, prompt_file: str) -> Path:
+    def _resolve_prompt_file(
+        self, prompt_file: str, cwd: Optional[Path] = None
+    ) -> Path:
         """Resolve prompt file path, checking local directory first, then common directories, then dependencies.
 
         Symlinks are rejected outright to prevent traversal attacks.
 
         Args:
             prompt_file: Relative path to the .prompt.md file
+            cwd: Project directory to search from. Defaults to the current
+                working directory, in which case returned paths stay relative.
 
         Returns:
             Path: Resolved path to the prompt file
@@ -958,7 +966,8 @@ class PromptCompiler:
         Raises:
             FileNotFoundError: If prompt file is not found or is a symlink
         """
-        prompt_path = Path(prompt_file)
+        base = "" if cwd is None else os.fspath(cwd)
+        prompt_path = Path(base, prompt_file)
 
         # First check if it exists in current directory (local)
         if prompt_path.exists():
@@ -970,44 +979,34 @@ class PromptCompiler:
             return prompt_path
 
         # Check in common project directories
-        common_dirs = [".github/prompts", ".apm/prompts"]
-        for common_dir in common_dirs:
-            common_path = Path(common_dir) / prompt_file
+        for common_dir in _COMMON_PROMPT_DIRS:
+            common_path = Path(base, common_dir, prompt_file)
             if common_path.exists() and not common_path.is_symlink():
                 return common_path
 
-        # If not found locally, search in dependency modules
-        apm_modules_dir = Path("apm_modules")
-        if apm_modules_dir.exists():
-            for org_dir in apm_modules_dir.iterdir():
-                if org_dir.is_dir() and not org_dir.name.startswith("."):
-                    for repo_dir in org_dir.iterdir():
-                        if repo_dir.is_dir() and not repo_dir.name.startswith("."):
-                            dep_prompt_path = repo_dir / prompt_file
-                            if dep_prompt_path.exists() and not dep_prompt_path.is_symlink():
-                                return dep_prompt_path
-
-                            for subdir in ["prompts", ".", "workflows"]:
-                                sub_prompt_path = repo_dir / subdir / prompt_file
-                                if sub_prompt_path.exists() and not sub_prompt_path.is_symlink():
-                                    return sub_prompt_path
+        # If not found locally, search in dependency modules. A single scandir
+        # walk yields the installed org/repo dirs for both the search and the
+        # error message below.
+        dep_dirs = self._list_dependency_dirs(os.path.join(base, _APM_MODULES_DIR))
+        for _, _, repo_path in dep_dirs or ():
+            for subdir in _DEPENDENCY_PROMPT_SUBDIRS:
+                candidate = os.path.join(repo_path, subdir, prompt_file)
+                if os.path.exists(candidate) and not os.path.islink(candidate):
+                    return Path(candidate)
 
         # If still not found, raise an error with helpful message
         searched_locations = [
-            f"Local: {prompt_path}",
+            f"Local: {Path(prompt_file)}",
             f"GitHub prompts: .github/prompts/{prompt_file}",
             f"APM prompts: .apm/prompts/{prompt_file}",
         ]
 
-        if apm_modules_dir.exists():
+        if dep_dirs is not None:
             searched_locations.append("Dependencies:")
-            for org_dir in apm_modules_dir.iterdir():
-                if org_dir.is_dir() and not org_dir.name.startswith("."):
-                    for repo_dir in org_dir.iterdir():
-                        if repo_dir.is_dir() and not repo_dir.name.startswith("."):
-                            searched_locations.append(
-                                f"  - {org_dir.name}/{repo_dir.name}/{prompt_file}"
-                            )
+            for org_name, repo_name, _ in dep_dirs:
+                searched_locations.append(
+                    f"  - {org_name}/{repo_name}/{prompt_file}"
+                )
 
         raise FileNotFoundError(
             f"Prompt file '{prompt_file}' not found.\n"
@@ -1016,6 +1015,32 @@ class PromptCompiler:
             + f"\n\nTip: Run 'apm install' to ensure dependencies are installed."
         )
 
+    @staticmethod
+    def _list_dependency_dirs(
+        modules_dir: str,
+    ) -> Optional[list[tuple[str, str, str]]]:
+        """List installed ``org/repo`` directories under *modules_dir*.
+
+        Hidden entries are skipped. Symlinked directories are followed, as
+        with ``Path.is_dir()``.
+
+        Returns:
+            ``(org_name, repo_name, repo_path)`` tuples in directory order, or
+            None if *modules_dir* does not exist.
+        """
+        if not os.path.isdir(modules_dir):
+            return None
+        dep_dirs = []
+        with os.scandir(modules_dir) as orgs:
+            for org in orgs:
+                if org.name.startswith(".") or not org.is_dir():
+                    continue
+                with os.scandir(org.path) as repos:
+                    for repo in repos:
+                        if not repo.name.startswith(".") and repo.is_dir():
+                            dep_dirs.append((org.name, repo.name, repo.path))
+        return dep_dirs
+
     def _substitute_parameters(self, content: str, params: Dict[str, str]) -> str:
         """Substitute parameters in content.
 
@@ -1026,6 +1051,10 @@ class PromptCompiler:
         Returns:
             Content with parameters substituted
         """
+        # Most prompts take no inputs; skip building placeholders for them
+        if not params or "${input:" not in content:
+            return content
+
         result = content
         for key, value in params.items():
             # Replace ${input:key} placeholders
@@ -3,11 +3,14 @@
 Provides deterministic, reproducible installs by capturing exact resolved versions.
 """
 
+import copy
 import logging
+import re
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import yaml
 
@@ -15,6 +18,69 @@ from ..models.apm_package import DependencyReference
 
 logger = logging.getLogger(__name__)
 
+# Parsed-YAML cache for LockFile.read: resolved path -> (stamp, data), where
+# stamp is (inode, mtime_ns, ctime_ns, size).  Only the raw mapping is cached;
+# every read builds fresh LockFile objects.
+_lockfile_data_cache: Dict[Path, Tuple[Tuple[int, int, int, int], Any]] = {}
+
+
+def clear_lockfile_cache() -> None:
+    """Clear the LockFile.read parse cache. Call in tests for isolation."""
+    _lockfile_data_cache.clear()
+
+
+# Strings PyYAML would emit unquoted in block context: ASCII, no spaces,
+# no indicator characters, no leading '...' (document end marker), no
+# leading/trailing ':'.  Anything else (and anything the resolver reads
+# back as a non-string) goes through PyYAML.
+_PLAIN_SCALAR_RE = re.compile(r"(?!\.\.\.)[A-Za-z0-9_./][A-Za-z0-9_./@+=:-]*(?<!:)")
+_resolver = yaml.resolver.Resolver()
+_STR_TAG = "tag:yaml.org,2002:str"
+
+
+def _plain_scalar(value: Any) -> Optional[str]:
+    """Return *value* as it appears in a block-style YAML scalar, or ``None``.
+
+    ``None`` means the value needs quoting or is not a simple scalar, so the
+    caller must defer to PyYAML to keep the output byte-identical.
+    """
+    if value is True:
+        return "true"
+    if type(value) is int:
+        return str(value)
+    if (
+        type(value) is str
+        and _PLAIN_SCALAR_RE.fullmatch(value)
+        and _resolver.resolve(yaml.ScalarNode, value, (True, False)) == _STR_TAG
+    ):
+        return value
+    return None
+
+
+def _emit_dependency(data: Dict[str, Any]) -> Optional[str]:
+    """Emit one ``dependencies`` entry the way ``yaml_to_str`` would.
+
+    Returns ``None`` when any value is outside the plain-scalar subset.
+    """
+    lines: List[str] = []
+    prefix = "- "
+    for key, value in data.items():
+        if type(value) is list:
+            lines.append(f"{prefix}{key}:")
+            for item in value:
+                text = _plain_scalar(item)
+                if text is None:
+                    return None
+                lines.append(f"  - {text}")
+        else:
+            text = _plain_scalar(value)
+            if text is None:
+                return None
+            lines.append(f"{prefix}{key}: {text}")
+        prefix = "  "
+    lines.append("")
+    return "\n".join(lines)
+
 
 @dataclass
 class LockedDependency:
@@ -39,6 +105,14 @@ class LockedDependency:
     discovered_via: Optional[str] = None  # Marketplace name (provenance)
     marketplace_plugin_name: Optional[str] = None  # Plugin name in marketplace
 
+    def __post_init__(self) -> None:
+        # Transitive entries repeat their parent's repo_url in resolved_by;
+        # interning lets every occurrence share one string object.
+        if isinstance(self.repo_url, str):
+            self.repo_url = sys.intern(self.repo_url)
+        if isinstance(self.resolved_by, str):
+            self.resolved_by = sys.intern(self.resolved_by)
+
     def get_unique_key(self) -> str:
         """Returns unique key for this dependency."""
         if self.source == "local" and self.local_path:
@@ -188,6 +262,10 @@ class LockFile:
         """Add a dependency to the lock file."""
         self.dependencies[dep.get_unique_key()] = dep
 
+    def add_dependencies(self, deps: Iterable[LockedDependency]) -> None:
+        """Add several dependencies in one update; later keys win."""
+        self.dependencies.update((dep.get_unique_key(), dep) for dep in deps)
+
     def get_dependency(self, key: str) -> Optional[LockedDependency]:
         """Get a dependency by its unique key."""
         return self.dependencies.get(key)
@@ -202,28 +280,62 @@ class LockFile:
             self.dependencies.values(), key=lambda d: (d.depth, d.repo_url)
         )
 
+    def get_dependents_by_parent(self) -> Dict[str, List[LockedDependency]]:
+        """Map each ``resolved_by`` repo URL to the dependencies it brought in.
+
+        Built from the current ``dependencies`` in one pass; callers that
+        walk the graph should build it once rather than rescanning per node.
+        """
+        dependents: Dict[str, List[LockedDependency]] = {}
+        for dep in self.get_all_dependencies():
+            if dep.resolved_by:
+                dependents.setdefault(dep.resolved_by, []).append(dep)
+        return dependents
+
     def to_yaml(self) -> str:
         """Serialize to YAML string."""
-        data: Dict[str, Any] = {
+        from ..utils.yaml_io import yaml_to_str
+
+        head: Dict[str, Any] = {
             "lockfile_version": self.lockfile_version,
             "generated_at": self.generated_at,
         }
         if self.apm_version:
-            data["apm_version"] = self.apm_version
-        data["dependencies"] = [dep.to_dict() for dep in self.get_all_dependencies()]
+            head["apm_version"] = self.apm_version
+        tail: Dict[str, Any] = {}
         if self.mcp_servers:
-            data["mcp_servers"] = sorted(self.mcp_servers)
+            tail["mcp_servers"] = sorted(self.mcp_servers)
         if self.mcp_configs:
-            data["mcp_configs"] = dict(sorted(self.mcp_configs.items()))
+            tail["mcp_configs"] = dict(sorted(self.mcp_configs.items()))
         if self.local_deployed_files:
-            data["local_deployed_files"] = sorted(self.local_deployed_files)
-        from ..utils.yaml_io import yaml_to_str
-        return yaml_to_str(data)
+            tail["local_deployed_files"] = sorted(self.local_deployed_files)
+
+        # The dependency list dominates large lockfiles and only holds flat
+        # scalars, so emit it directly; entries needing quoting fall back
+        # to PyYAML.
+        parts = [yaml_to_str(head)]
+        deps = [dep.to_dict() for dep in self.get_all_dependencies()]
+        if deps:
+            parts.append("dependencies:\n")
+            for dep_data in deps:
+                parts.append(
+                    _emit_dependency(dep_data) or yaml_to_str([dep_data])
+                )
+        else:
+            parts.append("dependencies: []\n")
+        if tail:
+            parts.append(yaml_to_str(tail))
+        return "".join(parts)
 
     @classmethod
     def from_yaml(cls, yaml_str: str) -> "LockFile":
         """Deserialize from YAML string."""
-        data = yaml.safe_load(yaml_str)
+        from ..utils.yaml_io import yaml_from_str
+        return cls._from_data(yaml_from_str(yaml_str))
+
+    @classmethod
+    def _from_data(cls, data: Any) -> "LockFile":
+        """Build a lock file from parsed YAML without mutating *data*."""
         if not data:
             return cls()
         if not isinstance(data, dict):
@@ -233,24 +345,43 @@ class LockFile:
             generated_at=data.get("generated_at", ""),
             apm_version=data.get("apm_version"),
         )
-        for dep_data in data.get("dependencies", []):
-            lock.add_dependency(LockedDependency.from_dict(dep_data))
+        lock.add_dependencies(
+            LockedDependency.from_dict(dep_data)
+            for dep_data in data.get("dependencies", [])
+        )
         lock.mcp_servers = list(data.get("mcp_servers", []))
-        lock.mcp_configs = dict(data.get("mcp_configs") or {})
+        lock.mcp_configs = copy.deepcopy(dict(data.get("mcp_configs") or {}))
         lock.local_deployed_files = list(data.get("local_deployed_files", []))
         return lock
 
     def write(self, path: Path) -> None:
         """Write lock file to disk."""
+        _lockfile_data_cache.pop(path.resolve(), None)
         path.write_text(self.to_yaml(), encoding="utf-8")
 
     @classmethod
     def read(cls, path: Path) -> Optional["LockFile"]:
-        """Read lock file from disk. Returns None if not exists or corrupt."""
-        if not path.exists():
+        """Read lock file from disk. Returns None if not exists or corrupt.
+
+        The parsed YAML is cached per file and reused while its inode,
+        mtime, ctime and size are unchanged, so repeated reads within one
+        command skip the parse.
+        """
+        try:
+            st = path.stat()
+        except OSError:
             return None
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_ctime_ns, st.st_size)
+        resolved = path.resolve()
+        cached = _lockfile_data_cache.get(resolved)
         try:
-            return cls.from_yaml(path.read_text(encoding="utf-8"))
+            if cached is not None and cached[0] == stamp:
+                data = cached[1]
+            else:
+                from ..utils.yaml_io import yaml_from_str
+                data = yaml_from_str(path.read_text(encoding="utf-8"))
+                _lockfile_data_cache[resolved] = (stamp, data)
+            return cls._from_data(data)
         except (yaml.YAMLError, ValueError, KeyError):
             return None
 
@@ -432,6 +563,7 @@ def migrate_lockfile_if_needed(project_root: Path) -> bool:
     new_path = get_lockfile_path(project_root)
     legacy_path = project_root / LEGACY_LOCKFILE_NAME
     if not new_path.exists() and legacy_path.exists():
+        _lockfile_data_cache.pop(new_path.resolve(), None)
         try:
             legacy_path.rename(new_path)
         except OSError:
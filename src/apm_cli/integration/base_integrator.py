@@ -374,6 +374,10 @@ class BaseIntegrator:
         stats: Dict[str, int] = {"files_removed": 0, "errors": 0}
 
         if managed_files is not None:
+            # Nothing under *prefix* can exist when its directory is absent;
+            # skip per-path validation and stat calls entirely.
+            if not (project_root / prefix).is_dir():
+                return stats
             for rel_path in managed_files:
                 # managed_files is pre-normalized  -- no .replace() needed
                 if not rel_path.startswith(prefix):
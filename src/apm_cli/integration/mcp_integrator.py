@@ -10,7 +10,9 @@ The existing adapters (client/, package_manager/) and registry operations
 """
 
 import builtins
+import json
 import logging
+import os
 import re
 import shutil
 import warnings
@@ -43,6 +45,59 @@ def _is_vscode_available() -> bool:
     return shutil.which("code") is not None or (Path.cwd() / ".vscode").is_dir()
 
 
+def _dedup_key(value):
+    """Return a hashable stand-in for *value* that compares like ``==``.
+
+    Raises ``TypeError`` for values with unhashable leaves.
+    """
+    if isinstance(value, dict):
+        return (dict, frozenset((k, _dedup_key(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return (list, tuple(_dedup_key(v) for v in value))
+    hash(value)
+    return value
+
+
+def _find_apm_manifests(root: Path) -> list:
+    """Return every ``apm.yml`` file below *root*, sorted.
+
+    Matches ``root.rglob("apm.yml")`` (symlinked directories are not
+    descended into) but walks with ``os.scandir`` so entry types come from
+    the directory listing instead of a ``stat()`` per path.
+    """
+    found: list = []
+    pending = [os.fspath(root)]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name == "apm.yml" and entry.is_file():
+                    found.append(Path(entry.path))
+    found.sort()
+    return found
+
+
+def _prune_json_servers(config_path: Path, section: str, names) -> list:
+    """Drop *names* from the *section* mapping of a JSON MCP config file.
+
+    The file is parsed straight from bytes and only rewritten when at least
+    one entry was removed.  Returns the removed names.
+    """
+    config = json.loads(config_path.read_bytes())
+    servers = config.get(section, {})
+    removed = [n for n in names if n in servers]
+    if removed:
+        for name in removed:
+            del servers[name]
+        config_path.write_text(json.dumps(config, indent=2), encoding="utf-8")
+    return removed
+
+
 class MCPIntegrator:
     """MCP lifecycle orchestrator  -- dependency resolution, installation, and cleanup.
 
@@ -103,7 +158,7 @@ class MCPIntegrator:
         if locked_paths is not None:
             apm_yml_paths = [path for path in sorted(locked_paths) if path.exists()]
         else:
-            apm_yml_paths = apm_modules_dir.rglob("apm.yml")
+            apm_yml_paths = _find_apm_manifests(apm_modules_dir)
 
         collected = []
         for apm_yml_path in apm_yml_paths:
@@ -171,6 +226,10 @@ class MCPIntegrator:
         precedence.
         """
         seen_names: builtins.set = builtins.set()
+        # Nameless entries dedupe by value; hashable keys avoid rescanning
+        # ``result``, anything else falls back to an equality scan.
+        seen_unnamed: builtins.set = builtins.set()
+        unhashable_unnamed: list = []
         result = []
         for dep in deps:
             if hasattr(dep, "name"):
@@ -180,7 +239,15 @@ class MCPIntegrator:
             else:
                 name = str(dep)
             if not name:
-                if dep not in result:
+                try:
+                    key = _dedup_key(dep)
+                except TypeError:
+                    if dep not in unhashable_unnamed:
+                        unhashable_unnamed.append(dep)
+                        result.append(dep)
+                    continue
+                if key not in seen_unnamed:
+                    seen_unnamed.add(key)
                     result.append(dep)
                 continue
             if name not in seen_names:
@@ -444,6 +511,9 @@ class MCPIntegrator:
         runtime: str = None,
         exclude: str = None,
         logger=None,
+        *,
+        project_root: Optional[Path] = None,
+        user_home: Optional[Path] = None,
     ) -> None:
         """Remove MCP server entries that are no longer required by any dependency.
 
@@ -452,10 +522,18 @@ class MCPIntegrator:
         dependency references (e.g. ``"io.github.github/github-mcp-server"``).
         For Copilot CLI and Codex, config keys are derived from the last path
         segment, so we match against both the full reference and the short name.
+
+        *project_root* and *user_home* locate the project-level and user-level
+        config files; they default to ``Path.cwd()`` and ``Path.home()``.
         """
         if not stale_names:
             return
 
+        if project_root is None:
+            project_root = Path.cwd()
+        if user_home is None:
+            user_home = Path.home()
+
         # Determine which runtimes to clean, mirroring install-time logic.
         all_runtimes = {"vscode", "copilot", "codex", "cursor", "opencode"}
         if runtime:
@@ -475,29 +553,21 @@ class MCPIntegrator:
 
         # Clean .vscode/mcp.json
         if "vscode" in target_runtimes:
-            vscode_mcp = Path.cwd() / ".vscode" / "mcp.json"
+            vscode_mcp = project_root / ".vscode" / "mcp.json"
             if vscode_mcp.exists():
                 try:
-                    import json as _json
-
-                    config = _json.loads(vscode_mcp.read_text(encoding="utf-8"))
-                    servers = config.get("servers", {})
-                    removed = [n for n in expanded_stale if n in servers]
+                    removed = _prune_json_servers(
+                        vscode_mcp, "servers", expanded_stale
+                    )
                     for name in removed:
-                        del servers[name]
-                    if removed:
-                        vscode_mcp.write_text(
-                            _json.dumps(config, indent=2), encoding="utf-8"
-                        )
-                        for name in removed:
-                            if logger:
-                                logger.progress(
-                                    f"Removed stale MCP server '{name}' from .vscode/mcp.json"
-                                )
-                            else:
-                                _rich_info(
-                                    f"+ Removed stale MCP server '{name}' from .vscode/mcp.json"
-                                )
+                        if logger:
+                            logger.progress(
+                                f"Removed stale MCP server '{name}' from .vscode/mcp.json"
+                            )
+                        else:
+                            _rich_info(
+                                f"+ Removed stale MCP server '{name}' from .vscode/mcp.json"
+                            )
                 except Exception:
                     _log.debug(
                         "Failed to clean stale MCP servers from .vscode/mcp.json",
@@ -506,24 +576,16 @@ class MCPIntegrator:
 
         # Clean ~/.copilot/mcp-config.json
         if "copilot" in target_runtimes:
-            copilot_mcp = Path.home() / ".copilot" / "mcp-config.json"
+            copilot_mcp = user_home / ".copilot" / "mcp-config.json"
             if copilot_mcp.exists():
                 try:
-                    import json as _json
-
-                    config = _json.loads(copilot_mcp.read_text(encoding="utf-8"))
-                    servers = config.get("mcpServers", {})
-                    removed = [n for n in expanded_stale if n in servers]
+                    removed = _prune_json_servers(
+                        copilot_mcp, "mcpServers", expanded_stale
+                    )
                     for name in removed:
-                        del servers[name]
-                    if removed:
-                        copilot_mcp.write_text(
-                            _json.dumps(config, indent=2), encoding="utf-8"
+                        _rich_info(
+                            f"+ Removed stale MCP server '{name}' from Copilot CLI config"
                         )
-                        for name in removed:
-                            _rich_info(
-                                f"+ Removed stale MCP server '{name}' from Copilot CLI config"
-                            )
                 except Exception:
                     _log.debug(
                         "Failed to clean stale MCP servers from Copilot CLI config",
@@ -532,7 +594,7 @@ class MCPIntegrator:
 
         # Clean ~/.codex/config.toml (mcp_servers section)
         if "codex" in target_runtimes:
-            codex_cfg = Path.home() / ".codex" / "config.toml"
+            codex_cfg = user_home / ".codex" / "config.toml"
             if codex_cfg.exists():
                 try:
                     import toml as _toml
@@ -556,24 +618,16 @@ class MCPIntegrator:
 
         # Clean .cursor/mcp.json (only if .cursor/ directory exists)
         if "cursor" in target_runtimes:
-            cursor_mcp = Path.cwd() / ".cursor" / "mcp.json"
+            cursor_mcp = project_root / ".cursor" / "mcp.json"
             if cursor_mcp.exists():
                 try:
-                    import json as _json
-
-                    config = _json.loads(cursor_mcp.read_text(encoding="utf-8"))
-                    servers = config.get("mcpServers", {})
-                    removed = [n for n in expanded_stale if n in servers]
+                    removed = _prune_json_servers(
+                        cursor_mcp, "mcpServers", expanded_stale
+                    )
                     for name in removed:
-                        del servers[name]
-                    if removed:
-                        cursor_mcp.write_text(
-                            _json.dumps(config, indent=2), encoding="utf-8"
+                        _rich_info(
+                            f"+ Removed stale MCP server '{name}' from .cursor/mcp.json"
                         )
-                        for name in removed:
-                            _rich_info(
-                                f"+ Removed stale MCP server '{name}' from .cursor/mcp.json"
-                            )
                 except Exception:
                     _log.debug(
                         "Failed to clean stale MCP servers from .cursor/mcp.json",
@@ -582,29 +636,21 @@ class MCPIntegrator:
 
         # Clean opencode.json (only if .opencode/ directory exists)
         if "opencode" in target_runtimes:
-            opencode_cfg = Path.cwd() / "opencode.json"
-            if opencode_cfg.exists() and (Path.cwd() / ".opencode").is_dir():
+            opencode_cfg = project_root / "opencode.json"
+            if opencode_cfg.exists() and (project_root / ".opencode").is_dir():
                 try:
-                    import json as _json
-
-                    config = _json.loads(opencode_cfg.read_text(encoding="utf-8"))
-                    servers = config.get("mcp", {})
-                    removed = [n for n in expanded_stale if n in servers]
+                    removed = _prune_json_servers(
+                        opencode_cfg, "mcp", expanded_stale
+                    )
                     for name in removed:
-                        del servers[name]
-                    if removed:
-                        opencode_cfg.write_text(
-                            _json.dumps(config, indent=2), encoding="utf-8"
-                        )
-                        for name in removed:
-                            if logger:
-                                logger.progress(
-                                    f"Removed stale MCP server '{name}' from opencode.json"
-                                )
-                            else:
-                                _rich_info(
-                                    f"+ Removed stale MCP server '{name}' from opencode.json"
-                                )
+                        if logger:
+                            logger.progress(
+                                f"Removed stale MCP server '{name}' from opencode.json"
+                            )
+                        else:
+                            _rich_info(
+                                f"+ Removed stale MCP server '{name}' from opencode.json"
+                            )
                 except Exception:
                     _log.debug(
                         "Failed to clean stale MCP servers from opencode.json",
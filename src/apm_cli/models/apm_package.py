@@ -9,7 +9,7 @@ compatibility.
 import yaml
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, List, Dict, Union
+from typing import Optional, List, Dict, Tuple, Union
 
 from .dependency import (
     DependencyReference,
@@ -50,8 +50,9 @@ __all__ = [
     "clear_apm_yml_cache",
 ]
 
-# Module-level parse cache: resolved path -> APMPackage (#171)
-_apm_yml_cache: Dict[Path, "APMPackage"] = {}
+# Module-level parse cache (#171): resolved path -> ((mtime_ns, size), APMPackage).
+# The stamp makes an edited apm.yml re-parse without an explicit clear.
+_apm_yml_cache: Dict[Path, Tuple[Optional[Tuple[int, int]], "APMPackage"]] = {}
 
 
 def clear_apm_yml_cache() -> None:
@@ -96,9 +97,14 @@ class APMPackage:
             raise FileNotFoundError(f"apm.yml not found: {apm_yml_path}")
         
         resolved = apm_yml_path.resolve()
+        try:
+            st = resolved.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
         cached = _apm_yml_cache.get(resolved)
-        if cached is not None:
-            return cached
+        if cached is not None and stamp is not None and cached[0] == stamp:
+            return cached[1]
         
         try:
             from ..utils.yaml_io import load_yaml
@@ -209,7 +215,7 @@ class APMPackage:
             target=data.get('target'),
             type=pkg_type,
         )
-        _apm_yml_cache[resolved] = result
+        _apm_yml_cache[resolved] = (stamp, result)
         return result
     
     def get_apm_dependencies(self) -> List[DependencyReference]:
@@ -23,10 +23,17 @@ from ...utils.path_security import (
 from ..validation import InvalidVirtualPackageExtensionError
 from .types import VirtualPackageType
 
+# Plain ``owner/repo`` shorthand: no host, ref, alias, or virtual path.
+_SHORTHAND_RE = re.compile(r"^([a-zA-Z0-9_-]+)/([a-zA-Z0-9_-][a-zA-Z0-9._-]*)$")
 
-@dataclass
+
+@dataclass(slots=True)
 class DependencyReference:
-    """Represents a reference to an APM dependency."""
+    """Represents a reference to an APM dependency.
+
+    Declared with ``slots=True``: large dependency graphs hold many of these,
+    and slotted instances are smaller and faster on attribute access.
+    """
 
     repo_url: str  # e.g., "user/repo" for GitHub or "org/project/repo" for Azure DevOps
     host: Optional[str] = (
@@ -189,6 +196,15 @@ class DependencyReference:
             return f"{self.repo_url}/{self.virtual_path}"
         return self.repo_url
 
+    def __hash__(self) -> int:
+        """Hash on the unique key so references can live in sets and dict keys.
+
+        Consistent with the generated ``__eq__``: equal references always share
+        a unique key.  Fields that feed the key must not be mutated while the
+        reference is stored in a hashed container.
+        """
+        return hash(self.get_unique_key())
+
     def to_canonical(self) -> str:
         """Return the canonical form of this dependency for storage in apm.yml.
 
@@ -839,6 +855,34 @@ class DependencyReference:
 
         return host, repo_url, reference, alias
 
+    @classmethod
+    def _parse_shorthand(cls, dependency_str: str):
+        """Fast path for the common ``owner/repo`` shorthand on a GitHub host.
+
+        Returns:
+            DependencyReference, or *None* if the string needs the full parser.
+        """
+        match = _SHORTHAND_RE.match(dependency_str)
+        if not match:
+            return None
+
+        host = default_host()
+        if not is_github_hostname(host):
+            return None
+
+        owner, repo = match.groups()
+        # Leave suffix stripping and extension errors to the full parser
+        if repo.endswith(".git") or repo.endswith(cls.VIRTUAL_FILE_EXTENSIONS):
+            return None
+        # The full parser drops "_git" segments and rejects components made
+        # only of ".git" characters
+        if "_git" in (owner, repo):
+            return None
+        if not owner.rstrip(".git") or not repo.rstrip(".git"):
+            return None
+
+        return cls(repo_url=dependency_str, host=host)
+
     @classmethod
     def parse(cls, dependency_str: str) -> "DependencyReference":
         """Parse a dependency string into a DependencyReference.
@@ -876,6 +920,10 @@ class DependencyReference:
         if not dependency_str.strip():
             raise ValueError("Empty dependency string")
 
+        shorthand = cls._parse_shorthand(dependency_str)
+        if shorthand is not None:
+            return shorthand
+
         dependency_str = urllib.parse.unquote(dependency_str)
 
         if any(ord(c) < 32 for c in dependency_str):
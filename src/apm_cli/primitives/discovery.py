@@ -3,6 +3,7 @@
 import logging
 import os
 import glob
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Optional
 
@@ -12,7 +13,7 @@ from ..utils.exclude import should_exclude, validate_exclude_patterns
 
 logger = logging.getLogger(__name__)
 from ..models.apm_package import APMPackage
-from ..deps.lockfile import LockFile
+from ..deps.lockfile import LEGACY_LOCKFILE_NAME, LOCKFILE_NAME, LockFile
 
 
 # Common primitive patterns for local discovery (with recursive search)
@@ -242,75 +243,102 @@ def get_dependency_declaration_order(base_dir: str) -> List[str]:
     - Regular packages: owner/repo (GitHub) or org/project/repo (ADO)
     - Virtual packages: owner/virtual-pkg-name (GitHub) or org/project/virtual-pkg-name (ADO)
     
+    Results are cached per process, keyed on the mtime and size of apm.yml
+    and the lockfile, so repeated calls within one command skip re-parsing.
+    
     Args:
         base_dir (str): Base directory containing apm.yml.
     
     Returns:
         List[str]: List of dependency installed paths in declaration order.
     """
+    base_path = Path(base_dir)
+    apm_yml_path = base_path / "apm.yml"
+    if not apm_yml_path.exists():
+        return []
+
+    stamps = (
+        _file_stamp(apm_yml_path),
+        _file_stamp(base_path / LOCKFILE_NAME),
+        _file_stamp(base_path / LEGACY_LOCKFILE_NAME),
+    )
     try:
-        apm_yml_path = Path(base_dir) / "apm.yml"
-        if not apm_yml_path.exists():
-            return []
-        
-        package = APMPackage.from_apm_yml(apm_yml_path)
-        apm_dependencies = package.get_apm_dependencies()
-        
-        # Extract installed paths from dependency references
-        # Virtual file/collection packages use get_virtual_package_name() (flattened),
-        # while virtual subdirectory packages use natural repo/subdir paths.
-        dependency_names = []
-        for dep in apm_dependencies:
-            if dep.alias:
-                dependency_names.append(dep.alias)
-            elif dep.is_virtual:
-                repo_parts = dep.repo_url.split("/")
-
-                if dep.is_virtual_subdirectory() and dep.virtual_path:
-                    # Virtual subdirectory packages keep natural path structure.
-                    # GitHub: owner/repo/subdir
-                    # ADO: org/project/repo/subdir
-                    if dep.is_azure_devops() and len(repo_parts) >= 3:
-                        dependency_names.append(
-                            f"{repo_parts[0]}/{repo_parts[1]}/{repo_parts[2]}/{dep.virtual_path}"
-                        )
-                    elif len(repo_parts) >= 2:
-                        dependency_names.append(
-                            f"{repo_parts[0]}/{repo_parts[1]}/{dep.virtual_path}"
-                        )
-                    else:
-                        dependency_names.append(dep.virtual_path)
-                else:
-                    # Virtual file/collection packages are flattened by package name.
-                    # GitHub: owner/virtual-pkg-name
-                    # ADO: org/project/virtual-pkg-name
-                    virtual_name = dep.get_virtual_package_name()
-                    if dep.is_azure_devops() and len(repo_parts) >= 3:
-                        dependency_names.append(f"{repo_parts[0]}/{repo_parts[1]}/{virtual_name}")
-                    elif len(repo_parts) >= 2:
-                        dependency_names.append(f"{repo_parts[0]}/{virtual_name}")
-                    else:
-                        dependency_names.append(virtual_name)
-            else:
-                # Regular packages: use full org/repo path
-                # This matches our org-namespaced directory structure
-                dependency_names.append(dep.repo_url)
-        
-        # Include transitive dependencies from apm.lock
-        # Direct deps from apm.yml have priority; transitive deps are appended
-        lockfile_paths = LockFile.installed_paths_for_project(Path(base_dir))
-        direct_set = set(dependency_names)
-        for path in lockfile_paths:
-            if path not in direct_set:
-                dependency_names.append(path)
-        
-        return dependency_names
-        
+        return list(_dependency_declaration_order(str(base_path.resolve()), stamps))
     except Exception as e:
         print(f"Warning: Failed to parse dependency order from apm.yml: {e}")
         return []
 
 
+def _file_stamp(path: Path) -> Optional[tuple]:
+    """Return ``(st_mtime_ns, st_size)`` for *path*, or None if it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=32)
+def _dependency_declaration_order(base_dir: str, stamps: tuple) -> tuple:
+    """Compute installed dependency paths for *base_dir*.
+
+    *stamps* only participates in the cache key; it changes whenever apm.yml
+    or the lockfile is rewritten. Errors propagate and are not cached.
+    """
+    package = APMPackage.from_apm_yml(Path(base_dir) / "apm.yml")
+    apm_dependencies = package.get_apm_dependencies()
+    
+    # Extract installed paths from dependency references
+    # Virtual file/collection packages use get_virtual_package_name() (flattened),
+    # while virtual subdirectory packages use natural repo/subdir paths.
+    dependency_names = []
+    for dep in apm_dependencies:
+        if dep.alias:
+            dependency_names.append(dep.alias)
+        elif dep.is_virtual:
+            repo_parts = dep.repo_url.split("/")
+
+            if dep.is_virtual_subdirectory() and dep.virtual_path:
+                # Virtual subdirectory packages keep natural path structure.
+                # GitHub: owner/repo/subdir
+                # ADO: org/project/repo/subdir
+                if dep.is_azure_devops() and len(repo_parts) >= 3:
+                    dependency_names.append(
+                        f"{repo_parts[0]}/{repo_parts[1]}/{repo_parts[2]}/{dep.virtual_path}"
+                    )
+                elif len(repo_parts) >= 2:
+                    dependency_names.append(
+                        f"{repo_parts[0]}/{repo_parts[1]}/{dep.virtual_path}"
+                    )
+                else:
+                    dependency_names.append(dep.virtual_path)
+            else:
+                # Virtual file/collection packages are flattened by package name.
+                # GitHub: owner/virtual-pkg-name
+                # ADO: org/project/virtual-pkg-name
+                virtual_name = dep.get_virtual_package_name()
+                if dep.is_azure_devops() and len(repo_parts) >= 3:
+                    dependency_names.append(f"{repo_parts[0]}/{repo_parts[1]}/{virtual_name}")
+                elif len(repo_parts) >= 2:
+                    dependency_names.append(f"{repo_parts[0]}/{virtual_name}")
+                else:
+                    dependency_names.append(virtual_name)
+        else:
+            # Regular packages: use full org/repo path
+            # This matches our org-namespaced directory structure
+            dependency_names.append(dep.repo_url)
+    
+    # Include transitive dependencies from apm.lock
+    # Direct deps from apm.yml have priority; transitive deps are appended
+    lockfile_paths = LockFile.installed_paths_for_project(Path(base_dir))
+    direct_set = set(dependency_names)
+    for path in lockfile_paths:
+        if path not in direct_set:
+            dependency_names.append(path)
+    
+    return tuple(dependency_names)
+
+
 def _scan_patterns(base_dir: Path, patterns: Dict[str, List[str]], collection: PrimitiveCollection, source: str) -> None:
     """Glob-scan-parse loop for one base directory and one patterns dict.
 
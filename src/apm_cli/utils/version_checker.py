@@ -5,6 +5,12 @@ import sys
 from typing import Optional, Tuple
 from pathlib import Path
 
+# major.minor.patch[prerelease], e.g. "0.6.3" or "0.7.0a1"
+_VERSION_RE = re.compile(r"^(\d+)\.(\d+)\.(\d+)(a\d+|b\d+|rc\d+)?$")
+
+# Minimum time between update checks: one day
+_CHECK_INTERVAL_NS = 86400 * 1_000_000_000
+
 
 def get_latest_version_from_github(
     repo: str = "microsoft/apm", timeout: int = 2
@@ -39,7 +45,7 @@ def get_latest_version_from_github(
             tag_name = tag_name[1:]
 
         # Validate version format
-        if re.match(r"^\d+\.\d+\.\d+(a\d+|b\d+|rc\d+)?$", tag_name):
+        if _VERSION_RE.match(tag_name):
             return tag_name
 
         return None
@@ -59,17 +65,12 @@ def parse_version(version_str: str) -> Optional[Tuple[int, int, int, str]]:
         Tuple of (major, minor, patch, prerelease) or None if invalid
         prerelease is empty string for stable releases
     """
-    # Match version pattern: major.minor.patch[prerelease]
-    match = re.match(r"^(\d+)\.(\d+)\.(\d+)(a\d+|b\d+|rc\d+)?$", version_str)
+    match = _VERSION_RE.match(version_str)
     if not match:
         return None
 
-    major = int(match.group(1))
-    minor = int(match.group(2))
-    patch = int(match.group(3))
-    prerelease = match.group(4) or ""
-
-    return (major, minor, patch, prerelease)
+    major, minor, patch, prerelease = match.groups()
+    return (int(major), int(minor), int(patch), prerelease or "")
 
 
 def is_newer_version(current: str, latest: str) -> bool:
@@ -138,16 +139,16 @@ def should_check_for_updates() -> bool:
     try:
         cache_path = get_update_cache_path()
 
-        if not cache_path.exists():
+        # One stat both tests existence and yields the file age
+        try:
+            mtime_ns = cache_path.stat().st_mtime_ns
+        except FileNotFoundError:
             return True
 
-        # Check file age
         import time
 
-        file_age_seconds = time.time() - cache_path.stat().st_mtime
-
-        # Check once per day (86400 seconds)
-        return file_age_seconds > 86400
+        # Check once per day
+        return time.time_ns() - mtime_ns > _CHECK_INTERVAL_NS
     except Exception:
         # If any error, allow check
         return True
@@ -11,9 +11,59 @@
 #   uv run pytest tests/unit tests/test_console.py -x   # CI-equivalent fast run
 #   uv run pytest                                         # Full suite
 #   uv run pytest -m benchmark                            # Benchmarks only
+#   APM_TEST_SHM_TMP=1 uv run pytest tests/unit           # tmp_path on /dev/shm
+
+import os
+import sys
 
 import pytest
 
+# Opt-in: APM_TEST_SHM_TMP=1 keeps tmp_path trees in RAM when the host offers
+# a roomy, exec-capable tmpfs; otherwise pytest's default temp root is used.
+_SHM_ROOT = "/dev/shm"
+_SHM_MIN_FREE_BYTES = 512 * 1024 * 1024
+
+
+def _shm_temproot_requested() -> bool:
+    return os.environ.get("APM_TEST_SHM_TMP", "").lower() in ("1", "true", "yes")
+
+
+def _shm_temproot_available() -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    if not os.path.isdir(_SHM_ROOT) or not os.access(_SHM_ROOT, os.W_OK):
+        return False
+    try:
+        stat = os.statvfs(_SHM_ROOT)
+    except OSError:
+        return False
+    if stat.f_flag & os.ST_NOEXEC:
+        return False
+    return stat.f_bavail * stat.f_frsize >= _SHM_MIN_FREE_BYTES
+
+
+# Set only when this process exported PYTEST_DEBUG_TEMPROOT itself; xdist
+# workers inherit the controller's value and leave it alone.
+_exported_temproot = False
+
+
+def pytest_configure(config):
+    """Point pytest's temp root at /dev/shm when opted in and usable."""
+    global _exported_temproot
+    if config.option.basetemp or "PYTEST_DEBUG_TEMPROOT" in os.environ:
+        return
+    if _shm_temproot_requested() and _shm_temproot_available():
+        os.environ["PYTEST_DEBUG_TEMPROOT"] = _SHM_ROOT
+        _exported_temproot = True
+
+
+def pytest_unconfigure(config):
+    """Drop the temp root exported by pytest_configure."""
+    global _exported_temproot
+    if _exported_temproot:
+        os.environ.pop("PYTEST_DEBUG_TEMPROOT", None)
+        _exported_temproot = False
+
 
 @pytest.fixture(autouse=True, scope="session")
 def _validate_primitive_coverage():
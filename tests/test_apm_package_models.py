@@ -34,6 +34,24 @@ class TestDependencyReference:
         assert dep.reference is None
         assert dep.alias is None
 
+    @pytest.mark.parametrize(
+        "dep_str",
+        ["user/repo", "my-org/my_repo", "user/repo.name", "user/repo.git"],
+    )
+    def test_parse_shorthand_matches_full_parser(self, dep_str):
+        """The owner/repo fast path yields the same result as an explicit host."""
+        host = github_host.default_host()
+        assert DependencyReference.parse(dep_str) == DependencyReference.parse(
+            f"{host}/{dep_str}"
+        )
+
+    def test_parse_shorthand_defers_to_full_parser(self):
+        """Shorthand-looking strings the full parser rejects are still rejected."""
+        for dep_str in ("user/git", "user/repo.prompt.md"):
+            assert DependencyReference._parse_shorthand(dep_str) is None
+            with pytest.raises(ValueError):
+                DependencyReference.parse(dep_str)
+
     def test_parse_with_branch(self):
         """Test parsing with branch reference."""
         dep = DependencyReference.parse("user/repo#main")
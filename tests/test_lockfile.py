@@ -5,7 +5,13 @@ from pathlib import Path
 from unittest.mock import Mock
 import yaml
 
-from apm_cli.deps.lockfile import LockedDependency, LockFile, get_lockfile_path, migrate_lockfile_if_needed
+from apm_cli.deps.lockfile import (
+    LockedDependency,
+    LockFile,
+    clear_lockfile_cache,
+    get_lockfile_path,
+    migrate_lockfile_if_needed,
+)
 from apm_cli.models.apm_package import DependencyReference
 
 
@@ -31,6 +37,18 @@ class TestLockedDependency:
         assert dep.repo_url == "owner/repo"
         assert dep.host == "github.com"
 
+    def test_repo_urls_are_interned(self):
+        lock = LockFile.from_yaml(
+            "dependencies:\n"
+            "- repo_url: owner/parent\n"
+            "- repo_url: owner/child\n"
+            "  depth: 2\n"
+            "  resolved_by: owner/parent\n"
+        )
+        parent = lock.get_dependency("owner/parent")
+        child = lock.get_dependency("owner/child")
+        assert child.resolved_by is parent.repo_url
+
     def test_from_dependency_ref(self):
         dep_ref = DependencyReference(repo_url="owner/repo", host="github.com", reference="main")
         locked = LockedDependency.from_dependency_ref(dep_ref, "abc123", 1, None)
@@ -46,6 +64,16 @@ class TestLockFile:
         assert lock.has_dependency("owner/repo")
         assert not lock.has_dependency("other/repo")
 
+    def test_add_dependencies_bulk(self):
+        lock = LockFile()
+        lock.add_dependencies([
+            LockedDependency(repo_url="owner/a", resolved_commit="old"),
+            LockedDependency(repo_url="owner/b"),
+            LockedDependency(repo_url="owner/a", resolved_commit="new"),
+        ])
+        assert list(lock.dependencies) == ["owner/a", "owner/b"]
+        assert lock.get_dependency("owner/a").resolved_commit == "new"
+
     def test_to_yaml(self):
         lock = LockFile(apm_version="1.0.0")
         lock.add_dependency(LockedDependency(repo_url="owner/repo"))
@@ -54,6 +82,39 @@ class TestLockFile:
         assert data["lockfile_version"] == "1"
         assert len(data["dependencies"]) == 1
 
+    def test_to_yaml_matches_pyyaml_output(self):
+        from apm_cli.utils.yaml_io import yaml_to_str
+
+        lock = LockFile(apm_version="1.0.0", mcp_servers=["srv"])
+        lock.add_dependencies([
+            LockedDependency(
+                repo_url="owner/repo", host="github.com", resolved_commit="abc123",
+                resolved_ref="v1.2.0", content_hash="sha256:deadbeef",
+                deployed_files=[".github/agents/a.md", ".claude/skills/x/"],
+            ),
+            LockedDependency(repo_url="owner/yes", resolved_ref="true", depth=2),
+            LockedDependency(repo_url="owner/odd", version="1.0", is_dev=True),
+            LockedDependency(repo_url="owner/colon", resolved_ref="ref:"),
+            LockedDependency(repo_url="owner/spaced", local_path="my dir/pkg"),
+            LockedDependency(repo_url="owner/unicode", virtual_path="prompts/café.md",
+                             is_virtual=True),
+            LockedDependency(repo_url="owner/dots", local_path="...",
+                             deployed_files=[".../a", "a/..."]),
+        ])
+        expected = yaml_to_str({
+            "lockfile_version": lock.lockfile_version,
+            "generated_at": lock.generated_at,
+            "apm_version": "1.0.0",
+            "dependencies": [d.to_dict() for d in lock.get_all_dependencies()],
+            "mcp_servers": ["srv"],
+        })
+        assert lock.to_yaml() == expected
+        assert LockFile.from_yaml(lock.to_yaml()).is_semantically_equivalent(lock)
+
+    def test_to_yaml_without_dependencies(self):
+        data = yaml.safe_load(LockFile().to_yaml())
+        assert data["dependencies"] == []
+
     def test_from_yaml(self):
         yaml_str = '\nlockfile_version: "1"\napm_version: "1.0.0"\ndependencies:\n  - repo_url: owner/repo\n'
         lock = LockFile.from_yaml(yaml_str)
@@ -158,6 +219,87 @@ class TestLockFile:
         lock = LockFile.from_yaml(yaml_str)
         assert lock.mcp_configs == {}
 
+    def test_repeated_read_reuses_parse_but_not_objects(self, tmp_path, monkeypatch):
+        lock = LockFile()
+        lock.add_dependency(
+            LockedDependency(repo_url="owner/repo", deployed_files=[".github/a.md"])
+        )
+        lock_path = tmp_path / "apm.lock.yaml"
+        lock.write(lock_path)
+        first = LockFile.read(lock_path)
+
+        import apm_cli.utils.yaml_io as yaml_io
+        monkeypatch.setattr(yaml_io, "yaml_from_str", Mock(side_effect=AssertionError))
+        first.get_dependency("owner/repo").deployed_files.append(".github/b.md")
+        second = LockFile.read(lock_path)
+
+        assert second is not first
+        assert second.get_dependency("owner/repo").deployed_files == [".github/a.md"]
+
+    def test_write_invalidates_cached_read(self, tmp_path):
+        lock_path = tmp_path / "apm.lock.yaml"
+        lock = LockFile()
+        lock.add_dependency(LockedDependency(repo_url="owner/repo", resolved_commit="a" * 40))
+        lock.write(lock_path)
+        loaded = LockFile.read(lock_path)
+        assert loaded.get_dependency("owner/repo").resolved_commit == "a" * 40
+
+        # Same size, possibly the same mtime tick: write() must still drop the entry.
+        lock.get_dependency("owner/repo").resolved_commit = "b" * 40
+        lock.write(lock_path)
+        loaded = LockFile.read(lock_path)
+        assert loaded.get_dependency("owner/repo").resolved_commit == "b" * 40
+
+    def test_clear_lockfile_cache_forces_reparse(self, tmp_path, monkeypatch):
+        lock = LockFile()
+        lock.add_dependency(LockedDependency(repo_url="owner/repo"))
+        lock_path = tmp_path / "apm.lock.yaml"
+        lock.write(lock_path)
+        LockFile.read(lock_path)
+
+        import apm_cli.utils.yaml_io as yaml_io
+        parse = Mock(wraps=yaml_io.yaml_from_str)
+        monkeypatch.setattr(yaml_io, "yaml_from_str", parse)
+        LockFile.read(lock_path)
+        assert parse.call_count == 0
+
+        clear_lockfile_cache()
+        reloaded = LockFile.read(lock_path)
+        assert parse.call_count == 1
+        assert reloaded.has_dependency("owner/repo")
+
+    def test_migration_invalidates_cached_read(self, tmp_path):
+        lock_path = get_lockfile_path(tmp_path)
+        lock = LockFile()
+        lock.add_dependency(LockedDependency(repo_url="owner/repo", resolved_commit="a" * 40))
+        lock.write(lock_path)
+        assert LockFile.read(lock_path).get_dependency("owner/repo").resolved_commit == "a" * 40
+
+        # Same-size legacy file renamed into place without going through write().
+        lock_path.unlink()
+        lock.get_dependency("owner/repo").resolved_commit = "b" * 40
+        (tmp_path / "apm.lock").write_text(lock.to_yaml(), encoding="utf-8")
+        assert migrate_lockfile_if_needed(tmp_path)
+        assert LockFile.read(lock_path).get_dependency("owner/repo").resolved_commit == "b" * 40
+
+    def test_get_dependents_by_parent(self):
+        lock = LockFile()
+        lock.add_dependencies([
+            LockedDependency(repo_url="owner/root", depth=1),
+            LockedDependency(repo_url="owner/b", depth=2, resolved_by="owner/root"),
+            LockedDependency(repo_url="owner/a", depth=2, resolved_by="owner/root"),
+            LockedDependency(repo_url="owner/c", depth=3, resolved_by="owner/a"),
+        ])
+
+        dependents = lock.get_dependents_by_parent()
+
+        urls = {parent: [d.repo_url for d in deps] for parent, deps in dependents.items()}
+        assert urls == {"owner/root": ["owner/a", "owner/b"], "owner/a": ["owner/c"]}
+
+        # Reflects direct edits to the dependencies map
+        del lock.dependencies["owner/c"]
+        assert "owner/a" not in lock.get_dependents_by_parent()
+
     def test_read_nonexistent(self, tmp_path):
         loaded = LockFile.read(tmp_path / "apm.lock.yaml")
         assert loaded is None
@@ -8,6 +8,7 @@ from unittest.mock import Mock, patch
 from datetime import datetime
 
 from apm_cli.integration import PromptIntegrator
+from apm_cli.integration.base_integrator import BaseIntegrator
 from apm_cli.models.apm_package import PackageInfo, APMPackage, ResolvedReference, GitReferenceType
 
 
@@ -319,6 +320,18 @@ Some prompt content."""
         assert result['files_removed'] == 0
         assert result['errors'] == 0
     
+    def test_sync_integration_managed_files_skips_missing_prompts_dir(self):
+        """Managed paths are not validated when .github/prompts/ is absent."""
+        managed = {".github/prompts/review.prompt.md"}
+
+        with patch.object(BaseIntegrator, "validate_deploy_path") as validate:
+            result = self.integrator.sync_integration(
+                Mock(), self.project_root, managed_files=managed
+            )
+
+        validate.assert_not_called()
+        assert result == {"files_removed": 0, "errors": 0}
+    
     def test_sync_integration_ignores_apm_package_param(self):
         """Test that sync removes all APM files regardless of installed packages."""
         github_prompts = self.project_root / ".github" / "prompts"
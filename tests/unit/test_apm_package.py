@@ -231,3 +231,20 @@ class TestClearCache:
 
         assert pkg1.name == "test-pkg"
         assert pkg2.name == "changed-pkg"
+
+    def test_edited_file_is_reparsed_without_clear(self, tmp_path):
+        """Rewriting apm.yml invalidates its cache entry automatically."""
+        yml = _write_apm_yml(tmp_path, {
+            "name": "test-pkg",
+            "version": "1.0.0",
+        })
+
+        pkg1 = APMPackage.from_apm_yml(yml)
+        assert APMPackage.from_apm_yml(yml) is pkg1
+
+        yml.write_text(yaml.dump({
+            "name": "edited-package",
+            "version": "2.0.0",
+        }), encoding="utf-8")
+
+        assert APMPackage.from_apm_yml(yml).name == "edited-package"
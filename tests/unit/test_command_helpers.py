@@ -251,6 +251,15 @@ class TestScanInstalledPackages:
         result = _scan_installed_packages(tmp_path / "apm_modules")
         assert result == []
 
+    def test_returns_sorted_keys_including_nested_packages(self, tmp_path):
+        """Keys are sorted, with nested subdirectory packages after their parent."""
+        for rel in ("zeta/repo", "alpha/repo/skills/sub", "alpha/repo"):
+            pkg = tmp_path / rel
+            pkg.mkdir(parents=True, exist_ok=True)
+            (pkg / "apm.yml").write_text("name: x")
+        result = _scan_installed_packages(tmp_path)
+        assert result == ["alpha/repo", "alpha/repo/skills/sub", "zeta/repo"]
+
 
 # ---------------------------------------------------------------------------
 # _check_and_notify_updates
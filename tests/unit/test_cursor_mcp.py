@@ -130,14 +130,7 @@ class TestMCPIntegratorCursorStaleCleanup(unittest.TestCase):
         self.cursor_dir.mkdir()
         self.mcp_json = self.cursor_dir / "mcp.json"
 
-        self._cwd_patcher = patch(
-            "apm_cli.integration.mcp_integrator.Path.cwd",
-            return_value=Path(self.tmp.name),
-        )
-        self._cwd_patcher.start()
-
     def tearDown(self):
-        self._cwd_patcher.stop()
         self.tmp.cleanup()
 
     def test_remove_stale_cursor(self):
@@ -147,7 +140,9 @@ class TestMCPIntegratorCursorStaleCleanup(unittest.TestCase):
             json.dumps({"mcpServers": {"keep": {"command": "k"}, "stale": {"command": "s"}}}),
             encoding="utf-8",
         )
-        MCPIntegrator.remove_stale({"stale"}, runtime="cursor")
+        MCPIntegrator.remove_stale(
+            {"stale"}, runtime="cursor", project_root=Path(self.tmp.name)
+        )
         data = json.loads(self.mcp_json.read_text(encoding="utf-8"))
         self.assertIn("keep", data["mcpServers"])
         self.assertNotIn("stale", data["mcpServers"])
@@ -156,7 +151,9 @@ class TestMCPIntegratorCursorStaleCleanup(unittest.TestCase):
         """Should not fail when .cursor/mcp.json doesn't exist."""
         from apm_cli.integration.mcp_integrator import MCPIntegrator
 
-        MCPIntegrator.remove_stale({"stale"}, runtime="cursor")
+        MCPIntegrator.remove_stale(
+            {"stale"}, runtime="cursor", project_root=Path(self.tmp.name)
+        )
         # No exception is the assertion
 
 
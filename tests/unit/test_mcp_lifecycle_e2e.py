@@ -607,11 +607,9 @@ class TestStaleCleanupKeyNormalization:
     last path segment (Copilot CLI, Codex) even when stale_names contains
     full registry references with '/'."""
 
-    def test_last_segment_removed_from_copilot_config(self, tmp_path, monkeypatch):
+    def test_last_segment_removed_from_copilot_config(self, tmp_path):
         """Stale name 'io.github.github/github-mcp-server' should remove
         config key 'github-mcp-server' from Copilot CLI config."""
-        monkeypatch.setattr(Path, "cwd", lambda: tmp_path)
-        monkeypatch.setattr(Path, "home", lambda: tmp_path)
 
         copilot_dir = tmp_path / ".copilot"
         copilot_dir.mkdir()
@@ -621,14 +619,13 @@ class TestStaleCleanupKeyNormalization:
         }))
 
         stale = {"io.github.github/github-mcp-server"}
-        MCPIntegrator.remove_stale(stale, runtime="copilot")
+        MCPIntegrator.remove_stale(stale, runtime="copilot", user_home=tmp_path)
 
         result = json.loads(copilot_config.read_text())
         assert "github-mcp-server" not in result["mcpServers"]
 
-    def test_full_ref_removed_from_vscode_config(self, tmp_path, monkeypatch):
+    def test_full_ref_removed_from_vscode_config(self, tmp_path):
         """VS Code uses the full reference as key — should still match."""
-        monkeypatch.setattr(Path, "cwd", lambda: tmp_path)
 
         vscode_dir = tmp_path / ".vscode"
         vscode_dir.mkdir()
@@ -638,15 +635,13 @@ class TestStaleCleanupKeyNormalization:
         }))
 
         stale = {"io.github.github/github-mcp-server"}
-        MCPIntegrator.remove_stale(stale, runtime="vscode")
+        MCPIntegrator.remove_stale(stale, runtime="vscode", project_root=tmp_path)
 
         result = json.loads(mcp_json.read_text())
         assert "io.github.github/github-mcp-server" not in result["servers"]
 
-    def test_short_name_without_slash_still_works(self, tmp_path, monkeypatch):
+    def test_short_name_without_slash_still_works(self, tmp_path):
         """A stale name without '/' (e.g. 'acme-kb') should still match directly."""
-        monkeypatch.setattr(Path, "cwd", lambda: tmp_path)
-        monkeypatch.setattr(Path, "home", lambda: tmp_path)
 
         copilot_dir = tmp_path / ".copilot"
         copilot_dir.mkdir()
@@ -656,7 +651,7 @@ class TestStaleCleanupKeyNormalization:
         }))
 
         stale = {"acme-kb"}
-        MCPIntegrator.remove_stale(stale, runtime="copilot")
+        MCPIntegrator.remove_stale(stale, runtime="copilot", user_home=tmp_path)
 
         result = json.loads(copilot_config.read_text())
         assert "acme-kb" not in result["mcpServers"]
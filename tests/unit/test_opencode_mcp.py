@@ -333,14 +333,7 @@ class TestMCPIntegratorOpenCodeStaleCleanup(unittest.TestCase):
         self.opencode_dir.mkdir()
         self.opencode_json = Path(self.tmp.name) / "opencode.json"
 
-        self._cwd_patcher = patch(
-            "apm_cli.integration.mcp_integrator.Path.cwd",
-            return_value=Path(self.tmp.name),
-        )
-        self._cwd_patcher.start()
-
     def tearDown(self):
-        self._cwd_patcher.stop()
         self.tmp.cleanup()
 
     def test_remove_stale_opencode(self):
@@ -352,7 +345,9 @@ class TestMCPIntegratorOpenCodeStaleCleanup(unittest.TestCase):
             ),
             encoding="utf-8",
         )
-        MCPIntegrator.remove_stale({"stale"}, runtime="opencode")
+        MCPIntegrator.remove_stale(
+            {"stale"}, runtime="opencode", project_root=Path(self.tmp.name)
+        )
         data = json.loads(self.opencode_json.read_text(encoding="utf-8"))
         self.assertIn("keep", data["mcp"])
         self.assertNotIn("stale", data["mcp"])
@@ -360,7 +355,9 @@ class TestMCPIntegratorOpenCodeStaleCleanup(unittest.TestCase):
     def test_remove_stale_opencode_noop_when_no_file(self):
         from apm_cli.integration.mcp_integrator import MCPIntegrator
 
-        MCPIntegrator.remove_stale({"stale"}, runtime="opencode")
+        MCPIntegrator.remove_stale(
+            {"stale"}, runtime="opencode", project_root=Path(self.tmp.name)
+        )
         # No exception is the assertion
 
 
@@ -7,6 +7,9 @@ The package identity system ensures consistency between:
 3. Agent/prompt metadata for orphan detection
 """
 
+import os
+import re
+
 import pytest
 from pathlib import Path
 from urllib.parse import urlparse
@@ -14,15 +17,19 @@ from urllib.parse import urlparse
 from src.apm_cli.models.apm_package import DependencyReference
 
 
+# Bare "host/..." form: a first segment that contains a dot (a hostname).
+_BARE_HOST_RE = re.compile(r"^([^/]*\.[^/]*)")
+
+
 def _get_host_from_entry(entry: str) -> str | None:
     """Safely extract hostname from an entry using URL parsing.
-    
+
     This is a security-safe way to check for host prefixes without
     using vulnerable string operations like startswith().
-    
+
     Args:
         entry: The dependency string to parse
-        
+
     Returns:
         The hostname if present, None otherwise
     """
@@ -30,14 +37,32 @@ def _get_host_from_entry(entry: str) -> str | None:
     if '://' in entry:
         parsed = urlparse(entry)
         return parsed.netloc if parsed.netloc else None
-    
+
     # For entries like "dev.azure.com/org/proj/repo", treat first segment as potential host
-    parts = entry.split('/')
-    if len(parts) >= 1 and '.' in parts[0]:
-        # Looks like a hostname (contains dots)
-        return parts[0]
-    
-    return None
+    m = _BARE_HOST_RE.match(entry)
+    return m.group(1) if m else None
+
+
+def _expected_canonical(entry: str) -> str:
+    """Canonical string an apm.yml entry should map to (host prefix removed)."""
+    host = _get_host_from_entry(entry)
+    if host == "dev.azure.com":
+        # ADO entries: dev.azure.com/org/proj/repo -> org/proj/repo
+        return "/".join(entry.split("/")[1:]).replace("/_git/", "/")
+    if host == "github.com":
+        # GitHub entries: canonical should match without the host
+        return "/".join(entry.split("/")[1:])
+    # Entries without host prefix should match exactly
+    return entry
+
+
+# Strings as they would appear in apm.yml dependencies
+_APM_YML_ENTRIES = (
+    "owner/repo",
+    "owner/test-repo/collections/azure-cloud-development",
+    "owner/pkg/prompts/file.prompt.md",
+    "dev.azure.com/org/proj/repo/agents/test.agent.md",
+)
 
 
 class TestCanonicalDependencyString:
@@ -95,124 +120,125 @@ class TestCanonicalDependencyString:
         assert dep.get_canonical_dependency_string() == "myorg/myproject/myrepo/collections/my-collection"
 
 
-class TestGetInstallPath:
-    """Test get_install_path() method."""
-    
-    def test_regular_github_package(self):
-        """Regular GitHub package: apm_modules/owner/repo."""
-        dep = DependencyReference.parse("owner/repo")
-        apm_modules = Path("/project/apm_modules")
-        expected = apm_modules / "owner" / "repo"
-        assert dep.get_install_path(apm_modules) == expected
-    
-    def test_regular_github_package_with_reference(self):
-        """Reference does not affect install path."""
-        dep = DependencyReference.parse("owner/repo#v1.0.0")
-        apm_modules = Path("/project/apm_modules")
-        expected = apm_modules / "owner" / "repo"
-        assert dep.get_install_path(apm_modules) == expected
-    
-    def test_virtual_file_package(self):
-        """Virtual file: apm_modules/owner/<virtual-package-name>."""
-        dep = DependencyReference.parse("owner/test-repo/prompts/code-review.prompt.md")
-        apm_modules = Path("/project/apm_modules")
-        
-        # Virtual package name: test-repo-code-review
-        expected = apm_modules / "owner" / "test-repo-code-review"
-        assert dep.get_install_path(apm_modules) == expected
-    
-    def test_virtual_collection_package(self):
-        """Virtual collection: apm_modules/owner/<virtual-package-name>."""
-        dep = DependencyReference.parse("owner/test-repo/collections/azure-cloud-development")
-        apm_modules = Path("/project/apm_modules")
-        
-        # Virtual package name: test-repo-azure-cloud-development
-        expected = apm_modules / "owner" / "test-repo-azure-cloud-development"
-        assert dep.get_install_path(apm_modules) == expected
-    
-    def test_virtual_collection_with_reference(self):
-        """Reference does not affect virtual package install path."""
-        dep = DependencyReference.parse("owner/test-repo/collections/testing#main")
-        apm_modules = Path("/project/apm_modules")
-        
-        expected = apm_modules / "owner" / "test-repo-testing"
-        assert dep.get_install_path(apm_modules) == expected
-    
-    def test_ado_regular_package(self):
-        """ADO regular package: apm_modules/org/project/repo."""
-        dep = DependencyReference.parse("dev.azure.com/myorg/myproject/myrepo")
-        apm_modules = Path("/project/apm_modules")
-        expected = apm_modules / "myorg" / "myproject" / "myrepo"
-        assert dep.get_install_path(apm_modules) == expected
-    
-    def test_ado_virtual_package(self):
-        """ADO virtual package: apm_modules/org/project/<virtual-package-name>."""
-        dep = DependencyReference.parse("dev.azure.com/myorg/myproject/myrepo/prompts/test.prompt.md")
-        apm_modules = Path("/project/apm_modules")
-        
-        # Virtual package name: myrepo-test
-        expected = apm_modules / "myorg" / "myproject" / "myrepo-test"
-        assert dep.get_install_path(apm_modules) == expected
-    
-    def test_ado_virtual_collection(self):
-        """ADO virtual collection: apm_modules/org/project/<virtual-package-name>."""
-        dep = DependencyReference.parse("dev.azure.com/myorg/myproject/myrepo/collections/my-collection")
-        apm_modules = Path("/project/apm_modules")
-        
-        # Virtual package name: myrepo-my-collection
-        expected = apm_modules / "myorg" / "myproject" / "myrepo-my-collection"
-        assert dep.get_install_path(apm_modules) == expected
-    
-    def test_relative_apm_modules_path(self):
-        """Works with relative paths too."""
-        dep = DependencyReference.parse("owner/repo")
-        apm_modules = Path("apm_modules")
-        expected = apm_modules / "owner" / "repo"
-        assert dep.get_install_path(apm_modules) == expected
+# (dependency string, apm_modules root, expected POSIX install path)
+_INSTALL_PATH_CASES = [
+    pytest.param(
+        "owner/repo", "/project/apm_modules", "/project/apm_modules/owner/repo",
+        id="regular_github_package",
+    ),
+    # Reference does not affect install path
+    pytest.param(
+        "owner/repo#v1.0.0", "/project/apm_modules", "/project/apm_modules/owner/repo",
+        id="regular_github_package_with_reference",
+    ),
+    # Virtual file: apm_modules/owner/<virtual-package-name>
+    pytest.param(
+        "owner/test-repo/prompts/code-review.prompt.md",
+        "/project/apm_modules",
+        "/project/apm_modules/owner/test-repo-code-review",
+        id="virtual_file_package",
+    ),
+    # Virtual collection: apm_modules/owner/<virtual-package-name>
+    pytest.param(
+        "owner/test-repo/collections/azure-cloud-development",
+        "/project/apm_modules",
+        "/project/apm_modules/owner/test-repo-azure-cloud-development",
+        id="virtual_collection_package",
+    ),
+    # Reference does not affect virtual package install path
+    pytest.param(
+        "owner/test-repo/collections/testing#main",
+        "/project/apm_modules",
+        "/project/apm_modules/owner/test-repo-testing",
+        id="virtual_collection_with_reference",
+    ),
+    # ADO regular package: apm_modules/org/project/repo
+    pytest.param(
+        "dev.azure.com/myorg/myproject/myrepo",
+        "/project/apm_modules",
+        "/project/apm_modules/myorg/myproject/myrepo",
+        id="ado_regular_package",
+    ),
+    # ADO virtual package: apm_modules/org/project/<virtual-package-name>
+    pytest.param(
+        "dev.azure.com/myorg/myproject/myrepo/prompts/test.prompt.md",
+        "/project/apm_modules",
+        "/project/apm_modules/myorg/myproject/myrepo-test",
+        id="ado_virtual_package",
+    ),
+    # ADO virtual collection: apm_modules/org/project/<virtual-package-name>
+    pytest.param(
+        "dev.azure.com/myorg/myproject/myrepo/collections/my-collection",
+        "/project/apm_modules",
+        "/project/apm_modules/myorg/myproject/myrepo-my-collection",
+        id="ado_virtual_collection",
+    ),
+    # Works with relative paths too
+    pytest.param(
+        "owner/repo", "apm_modules", "apm_modules/owner/repo",
+        id="relative_apm_modules_path",
+    ),
+]
 
+_VIRTUAL_NAME_CASES = [
+    "owner/test-repo/prompts/code-review.prompt.md",
+    "owner/test-repo/collections/azure-cloud-development",
+    "owner/repo/agents/security.agent.md",
+    "user/pkg/instructions/coding.instructions.md",
+]
 
-class TestInstallPathConsistency:
-    """Test that get_install_path is consistent with virtual package naming."""
-    
-    def test_consistency_with_get_virtual_package_name(self):
+_SAME_OWNER_CASES = [
+    "owner/repo",
+    "owner/repo/prompts/file.prompt.md",
+    "owner/repo/prompts/file1.prompt.md",
+    "owner/repo/prompts/file2.prompt.md",
+]
+
+
+@pytest.fixture(scope="class")
+def deps():
+    """Parse each dependency string used by TestInstallPaths once."""
+    dep_strs = {case.values[0] for case in _INSTALL_PATH_CASES}
+    dep_strs.update(_VIRTUAL_NAME_CASES, _SAME_OWNER_CASES)
+    return {dep_str: DependencyReference.parse(dep_str) for dep_str in dep_strs}
+
+
+class TestInstallPaths:
+    """Test get_install_path() and its consistency with virtual package naming.
+
+    Every dependency string is parsed once per class by the ``deps`` fixture.
+    Expected paths are POSIX strings compared against ``as_posix()``.
+    """
+
+    @pytest.mark.parametrize("dep_str, apm_modules, expected", _INSTALL_PATH_CASES)
+    def test_install_path(self, deps, dep_str, apm_modules, expected):
+        assert deps[dep_str].get_install_path(Path(apm_modules)).as_posix() == expected
+
+    @pytest.mark.parametrize("dep_str", _VIRTUAL_NAME_CASES)
+    def test_consistency_with_get_virtual_package_name(self, deps, dep_str):
         """Install path uses same package name as get_virtual_package_name."""
-        test_cases = [
-            "owner/test-repo/prompts/code-review.prompt.md",
-            "owner/test-repo/collections/azure-cloud-development",
-            "owner/repo/agents/security.agent.md",
-            "user/pkg/instructions/coding.instructions.md",
-        ]
-        
-        for dep_str in test_cases:
-            dep = DependencyReference.parse(dep_str)
-            apm_modules = Path("apm_modules")
-            install_path = dep.get_install_path(apm_modules)
-            
-            # Last component of path should match virtual package name
-            expected_name = dep.get_virtual_package_name()
-            assert install_path.name == expected_name, f"Failed for {dep_str}"
-    
-    def test_unique_paths_for_different_virtual_packages(self):
+        dep = deps[dep_str]
+        install_path = dep.get_install_path(Path("apm_modules"))
+        # Last component of path should match virtual package name
+        assert install_path.name == dep.get_virtual_package_name()
+
+    def test_unique_paths_for_different_virtual_packages(self, deps):
         """Different virtual packages from same repo get different paths."""
-        dep1 = DependencyReference.parse("owner/repo/prompts/file1.prompt.md")
-        dep2 = DependencyReference.parse("owner/repo/prompts/file2.prompt.md")
-        
         apm_modules = Path("apm_modules")
-        path1 = dep1.get_install_path(apm_modules)
-        path2 = dep2.get_install_path(apm_modules)
-        
+        path1 = deps["owner/repo/prompts/file1.prompt.md"].get_install_path(apm_modules)
+        path2 = deps["owner/repo/prompts/file2.prompt.md"].get_install_path(apm_modules)
+
         assert path1 != path2
         assert path1.parent == path2.parent  # Same owner directory
-    
-    def test_regular_package_same_owner(self):
+
+    def test_regular_package_same_owner(self, deps):
         """Regular package from same owner has predictable path."""
-        dep = DependencyReference.parse("owner/repo")
-        virtual_dep = DependencyReference.parse("owner/repo/prompts/file.prompt.md")
-        
         apm_modules = Path("apm_modules")
-        regular_path = dep.get_install_path(apm_modules)
-        virtual_path = virtual_dep.get_install_path(apm_modules)
-        
+        regular_path = deps["owner/repo"].get_install_path(apm_modules)
+        virtual_path = deps["owner/repo/prompts/file.prompt.md"].get_install_path(
+            apm_modules
+        )
+
         # Different paths (repo vs repo-file)
         assert regular_path != virtual_path
         # Same owner directory
@@ -232,11 +258,15 @@ class TestUninstallScenarios:
         
         # Should be owner/test-repo-azure-cloud-development
         # NOT owner/test-repo/collections/azure-cloud-development
-        assert install_path == apm_modules / "owner" / "test-repo-azure-cloud-development"
+        assert os.fspath(install_path) == os.path.join(
+            "apm_modules", "owner", "test-repo-azure-cloud-development"
+        )
         
         # The wrong path (from raw path segments) would be:
-        wrong_path = apm_modules / "owner" / "test-repo" / "collections" / "azure-cloud-development"
-        assert install_path != wrong_path
+        wrong_path = os.path.join(
+            "apm_modules", "owner", "test-repo", "collections", "azure-cloud-development"
+        )
+        assert os.fspath(install_path) != wrong_path
     
     def test_uninstall_virtual_file_finds_correct_path(self):
         """Uninstalling virtual file should find owner/virtual-pkg-name."""
@@ -248,7 +278,7 @@ class TestUninstallScenarios:
         
         # Should be owner/repo-code-review
         # NOT owner/repo/prompts/code-review.prompt.md
-        assert install_path == apm_modules / "owner" / "repo-code-review"
+        assert os.fspath(install_path) == os.path.join("apm_modules", "owner", "repo-code-review")
 
 
 class TestOrphanDetectionScenarios:
@@ -256,38 +286,9 @@ class TestOrphanDetectionScenarios:
     
     def test_canonical_string_matches_apm_yml_entry(self):
         """Canonical string should exactly match what's stored in apm.yml."""
-        # These are the strings that would appear in apm.yml dependencies
-        apm_yml_entries = [
-            "owner/repo",
-            "owner/test-repo/collections/azure-cloud-development",
-            "owner/pkg/prompts/file.prompt.md",
-            "dev.azure.com/org/proj/repo/agents/test.agent.md",
-        ]
-        
-        for entry in apm_yml_entries:
-            try:
-                dep = DependencyReference.parse(entry)
-                canonical = dep.get_canonical_dependency_string()
-                
-                # Use proper URL parsing to extract hostname safely
-                host = _get_host_from_entry(entry)
-                
-                if host == "dev.azure.com":
-                    # ADO entries: canonical should match without the host
-                    # Remove host prefix: dev.azure.com/org/proj/repo -> org/proj/repo
-                    expected = '/'.join(entry.split('/')[1:])
-                    expected = expected.replace("/_git/", "/")
-                    assert canonical == expected
-                elif host == "github.com":
-                    # GitHub entries: canonical should match without the host
-                    expected = '/'.join(entry.split('/')[1:])
-                    assert canonical == expected
-                else:
-                    # Entries without host prefix should match exactly
-                    assert canonical == entry
-            except ValueError:
-                # Skip entries that can't be parsed due to ADO format issues
-                pass
+        for entry in _APM_YML_ENTRIES:
+            canonical = DependencyReference.parse(entry).get_canonical_dependency_string()
+            assert canonical == _expected_canonical(entry), entry
     
     def test_unique_key_matches_canonical_string(self):
         """get_unique_key and get_canonical_dependency_string should be consistent."""
@@ -300,3 +301,16 @@ class TestOrphanDetectionScenarios:
         for dep_str in test_cases:
             dep = DependencyReference.parse(dep_str)
             assert dep.get_unique_key() == dep.get_canonical_dependency_string()
+
+    def test_references_dedupe_in_sets(self):
+        """Equal references collapse in a set; hashing follows the unique key."""
+        deps = [
+            DependencyReference.parse("owner/repo"),
+            DependencyReference.parse("owner/repo"),
+            DependencyReference.parse("owner/test-repo/prompts/code-review.prompt.md"),
+        ]
+        assert len(set(deps)) == 2
+
+        pinned = DependencyReference.parse("owner/repo#v1.0.0")
+        assert hash(pinned) == hash(deps[0])
+        assert pinned not in set(deps)  # Same identity, different ref
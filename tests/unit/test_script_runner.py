@@ -2,169 +2,250 @@
 
 import pytest
 from pathlib import Path
-from unittest.mock import patch, mock_open, MagicMock
+from unittest.mock import patch, MagicMock, create_autospec
 import os
 import tempfile
 import shutil
+from types import SimpleNamespace
 
 from apm_cli.core.script_runner import ScriptRunner, PromptCompiler
 
 
+@pytest.fixture(scope="class")
+def _runtime_patches():
+    """Patch subprocess and runtime environment setup once per test class."""
+    with patch("subprocess.run") as mock_run, patch(
+        "apm_cli.core.script_runner.shutil.which", return_value=None
+    ) as mock_which, patch(
+        "apm_cli.core.script_runner.setup_runtime_environment"
+    ) as mock_setup_env:
+        yield SimpleNamespace(
+            run=mock_run, which=mock_which, setup_env=mock_setup_env
+        )
+
+
+@pytest.fixture
+def runtime_mocks(_runtime_patches):
+    """Class-scoped runtime patches with call history cleared for each test."""
+    for mock in vars(_runtime_patches).values():
+        mock.reset_mock()
+    return _runtime_patches
+
+
+class _FakePath(type(Path())):
+    """Path whose exists() returns a fixed answer chosen by the test."""
+
+    exists_result = True
+
+    def exists(self, *args, **kwargs):
+        return self.exists_result
+
+
+@pytest.fixture
+def stub_path_exists(monkeypatch):
+    """Return a helper that makes script_runner's ``Path.exists()`` report *value*.
+
+    Swaps the module's ``Path`` symbol instead of patching
+    ``pathlib.Path.exists``, so other Path users are unaffected.
+    """
+    monkeypatch.setattr("apm_cli.core.script_runner.Path", _FakePath)
+
+    def _stub(value):
+        monkeypatch.setattr(_FakePath, "exists_result", value)
+
+    return _stub
+
+
+@pytest.fixture(scope="session")
+def _downloader_template():
+    """Autospec'd downloader instance, built once per session."""
+    from apm_cli.deps.github_downloader import GitHubPackageDownloader
+
+    return create_autospec(GitHubPackageDownloader, instance=True)
+
+
+@pytest.fixture
+def downloader_mock(_downloader_template):
+    """Patch GitHubPackageDownloader to hand out the shared, freshly reset mock."""
+    _downloader_template.reset_mock(return_value=True, side_effect=True)
+    with patch(
+        "apm_cli.deps.github_downloader.GitHubPackageDownloader",
+        return_value=_downloader_template,
+    ):
+        yield _downloader_template
+
+
+def _package_info(name):
+    """Minimal stand-in for the PackageInfo returned by the downloader."""
+    return SimpleNamespace(package=SimpleNamespace(name=name, version="1.0.0"))
+
+
+@pytest.fixture(scope="class")
+def script_runner():
+    """ScriptRunner shared across a test class; it holds no per-test state."""
+    return ScriptRunner()
+
+
+@pytest.fixture(scope="class")
+def apm_project(tmp_path_factory):
+    """Directory holding a minimal apm.yml, written once per test class."""
+    project = tmp_path_factory.mktemp("apm_project")
+    (project / "apm.yml").write_text("name: test\nscripts: {}\n")
+    return project
+
+
+@pytest.fixture
+def in_apm_project(apm_project, monkeypatch):
+    """Run the test from inside the shared minimal project."""
+    monkeypatch.chdir(apm_project)
+    return apm_project
+
+
+_COMPILED_CONTENT = "You are a helpful assistant. Say hello to TestUser!"
+_COMPILED_PATH = ".apm/compiled/hello-world.txt"
+
+
+def _make_tree(base, spec):
+    """Create files under *base* from a ``{relative_path: content}`` mapping.
+
+    A ``None`` value creates an empty directory instead of a file.
+    """
+    created = set()
+    for rel_path, content in spec.items():
+        path = os.path.join(base, rel_path)
+        parent = path if content is None else os.path.dirname(path)
+        if parent not in created:
+            os.makedirs(parent, exist_ok=True)
+            created.add(parent)
+        if content is not None:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, content.encode())
+            finally:
+                os.close(fd)
+
+
+@pytest.fixture(scope="class")
+def compiler():
+    """PromptCompiler shared across a test class."""
+    return PromptCompiler()
+
+
 class TestScriptRunner:
     """Test ScriptRunner functionality."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.script_runner = ScriptRunner()
-        self.compiled_content = "You are a helpful assistant. Say hello to TestUser!"
-        self.compiled_path = ".apm/compiled/hello-world.txt"
-    
-    def test_transform_runtime_command_simple_codex(self):
-        """Test simple codex command transformation."""
-        original = "codex hello-world.prompt.md"
-        result = self.script_runner._transform_runtime_command(
-            original, "hello-world.prompt.md", self.compiled_content, self.compiled_path
-        )
-        assert result == "codex exec"
-    
-    def test_transform_runtime_command_codex_with_flags(self):
-        """Test codex command with flags before file."""
-        original = "codex --skip-git-repo-check hello-world.prompt.md"
-        result = self.script_runner._transform_runtime_command(
-            original, "hello-world.prompt.md", self.compiled_content, self.compiled_path
-        )
-        assert result == "codex exec --skip-git-repo-check"
-    
-    def test_transform_runtime_command_codex_multiple_flags(self):
-        """Test codex command with multiple flags before file."""
-        original = "codex --verbose --skip-git-repo-check hello-world.prompt.md"
-        result = self.script_runner._transform_runtime_command(
-            original, "hello-world.prompt.md", self.compiled_content, self.compiled_path
-        )
-        assert result == "codex exec --verbose --skip-git-repo-check"
-    
-    def test_transform_runtime_command_env_var_simple(self):
-        """Test environment variable with simple codex command."""
-        original = "DEBUG=true codex hello-world.prompt.md"
-        result = self.script_runner._transform_runtime_command(
-            original, "hello-world.prompt.md", self.compiled_content, self.compiled_path
-        )
-        assert result == "DEBUG=true codex exec"
-    
-    def test_transform_runtime_command_env_var_with_flags(self):
-        """Test environment variable with codex flags."""
-        original = "DEBUG=true codex --skip-git-repo-check hello-world.prompt.md"
-        result = self.script_runner._transform_runtime_command(
-            original, "hello-world.prompt.md", self.compiled_content, self.compiled_path
-        )
-        assert result == "DEBUG=true codex exec --skip-git-repo-check"
-    
-    def test_transform_runtime_command_llm_simple(self):
-        """Test simple llm command transformation."""
-        original = "llm hello-world.prompt.md"
-        result = self.script_runner._transform_runtime_command(
-            original, "hello-world.prompt.md", self.compiled_content, self.compiled_path
-        )
-        assert result == "llm"
-    
-    def test_transform_runtime_command_llm_with_options(self):
-        """Test llm command with options after file."""
-        original = "llm hello-world.prompt.md --model gpt-4"
-        result = self.script_runner._transform_runtime_command(
-            original, "hello-world.prompt.md", self.compiled_content, self.compiled_path
-        )
-        assert result == "llm --model gpt-4"
-    
-    def test_transform_runtime_command_bare_file(self):
-        """Test bare prompt file defaults to codex exec."""
-        original = "hello-world.prompt.md"
-        result = self.script_runner._transform_runtime_command(
-            original, "hello-world.prompt.md", self.compiled_content, self.compiled_path
-        )
-        assert result == "codex exec"
-    
-    def test_transform_runtime_command_fallback(self):
-        """Test fallback behavior for unrecognized patterns."""
-        original = "unknown-command hello-world.prompt.md"
-        result = self.script_runner._transform_runtime_command(
-            original, "hello-world.prompt.md", self.compiled_content, self.compiled_path
-        )
-        assert result == f"unknown-command {self.compiled_path}"
-    
-    def test_transform_runtime_command_copilot_simple(self):
-        """Test simple copilot command transformation."""
-        original = "copilot hello-world.prompt.md"
-        result = self.script_runner._transform_runtime_command(
-            original, "hello-world.prompt.md", self.compiled_content, self.compiled_path
-        )
-        assert result == "copilot"
-    
-    def test_transform_runtime_command_copilot_with_flags(self):
-        """Test copilot command with flags before file."""
-        original = "copilot --log-level all --log-dir copilot-logs hello-world.prompt.md"
-        result = self.script_runner._transform_runtime_command(
-            original, "hello-world.prompt.md", self.compiled_content, self.compiled_path
+    @pytest.mark.parametrize(
+        "original,expected",
+        [
+            pytest.param(
+                "codex hello-world.prompt.md", "codex exec", id="simple_codex"
+            ),
+            pytest.param(
+                "codex --skip-git-repo-check hello-world.prompt.md",
+                "codex exec --skip-git-repo-check",
+                id="codex_with_flags",
+            ),
+            pytest.param(
+                "codex --verbose --skip-git-repo-check hello-world.prompt.md",
+                "codex exec --verbose --skip-git-repo-check",
+                id="codex_multiple_flags",
+            ),
+            pytest.param(
+                "DEBUG=true codex hello-world.prompt.md",
+                "DEBUG=true codex exec",
+                id="env_var_simple",
+            ),
+            pytest.param(
+                "DEBUG=true codex --skip-git-repo-check hello-world.prompt.md",
+                "DEBUG=true codex exec --skip-git-repo-check",
+                id="env_var_with_flags",
+            ),
+            pytest.param("llm hello-world.prompt.md", "llm", id="llm_simple"),
+            pytest.param(
+                "llm hello-world.prompt.md --model gpt-4",
+                "llm --model gpt-4",
+                id="llm_with_options",
+            ),
+            # A bare prompt file defaults to codex exec
+            pytest.param("hello-world.prompt.md", "codex exec", id="bare_file"),
+            # Unrecognized patterns fall back to substituting the compiled path
+            pytest.param(
+                "unknown-command hello-world.prompt.md",
+                f"unknown-command {_COMPILED_PATH}",
+                id="fallback",
+            ),
+            pytest.param(
+                "copilot hello-world.prompt.md", "copilot", id="copilot_simple"
+            ),
+            pytest.param(
+                "copilot --log-level all --log-dir copilot-logs hello-world.prompt.md",
+                "copilot --log-level all --log-dir copilot-logs",
+                id="copilot_with_flags",
+            ),
+            # -p is dropped since the prompt is passed separately
+            pytest.param(
+                "copilot -p hello-world.prompt.md --log-level all",
+                "copilot --log-level all",
+                id="copilot_removes_p_flag",
+            ),
+        ],
+    )
+    def test_transform_runtime_command(self, script_runner, original, expected):
+        """Test runtime command transformation for each supported pattern."""
+        result = script_runner._transform_runtime_command(
+            original, "hello-world.prompt.md", _COMPILED_CONTENT, _COMPILED_PATH
         )
-        assert result == "copilot --log-level all --log-dir copilot-logs"
+        assert result == expected
     
-    def test_transform_runtime_command_copilot_removes_p_flag(self):
-        """Test copilot command removes existing -p flag since it's handled separately."""
-        original = "copilot -p hello-world.prompt.md --log-level all"
-        result = self.script_runner._transform_runtime_command(
-            original, "hello-world.prompt.md", self.compiled_content, self.compiled_path
-        )
-        assert result == "copilot --log-level all"
-    
-    def test_detect_runtime_copilot(self):
+    def test_detect_runtime_copilot(self, script_runner):
         """Test runtime detection for copilot commands."""
-        assert self.script_runner._detect_runtime("copilot --log-level all") == "copilot"
+        assert script_runner._detect_runtime("copilot --log-level all") == "copilot"
 
-    def test_detect_runtime_codex(self):
+    def test_detect_runtime_codex(self, script_runner):
         """Test runtime detection for codex commands."""
-        assert self.script_runner._detect_runtime("codex exec --skip-git-repo-check") == "codex"
+        assert script_runner._detect_runtime("codex exec --skip-git-repo-check") == "codex"
 
-    def test_detect_runtime_llm(self):
+    def test_detect_runtime_llm(self, script_runner):
         """Test runtime detection for llm commands."""
-        assert self.script_runner._detect_runtime("llm --model gpt-4") == "llm"
+        assert script_runner._detect_runtime("llm --model gpt-4") == "llm"
 
-    def test_detect_runtime_unknown(self):
+    def test_detect_runtime_unknown(self, script_runner):
         """Test runtime detection for unknown commands."""
-        assert self.script_runner._detect_runtime("unknown-command") == "unknown"
+        assert script_runner._detect_runtime("unknown-command") == "unknown"
 
-    def test_detect_runtime_model_name_containing_codex(self):
+    def test_detect_runtime_model_name_containing_codex(self, script_runner):
         """codex as a substring of a model name should not be detected as the codex runtime."""
         # e.g. copilot --model gpt-5.3-codex - the runtime is copilot, not codex
-        assert self.script_runner._detect_runtime("copilot --model gpt-5.3-codex") == "copilot"
+        assert script_runner._detect_runtime("copilot --model gpt-5.3-codex") == "copilot"
 
-    def test_detect_runtime_hyphenated_codex(self):
+    def test_detect_runtime_hyphenated_codex(self, script_runner):
         """A hyphen-prefixed codex substring must not trigger codex detection."""
-        assert self.script_runner._detect_runtime("run-codex-tool --flag") == "unknown"
+        assert script_runner._detect_runtime("run-codex-tool --flag") == "unknown"
 
-    def test_transform_runtime_command_copilot_with_codex_model(self):
+    def test_transform_runtime_command_copilot_with_codex_model(self, script_runner):
         """copilot command using --model containing 'codex' must not be mis-routed to codex runtime."""
         original = "copilot --allow-all-tools --model gpt-5.3-codex -p fix-issue.prompt.md"
-        result = self.script_runner._transform_runtime_command(
-            original, "fix-issue.prompt.md", self.compiled_content, self.compiled_path
+        result = script_runner._transform_runtime_command(
+            original, "fix-issue.prompt.md", _COMPILED_CONTENT, _COMPILED_PATH
         )
         # Should be treated as a copilot command, not transformed into "codex exec ..."
         assert result.startswith("copilot")
         assert "codex exec" not in result
 
-    def test_transform_runtime_command_copilot_with_codex_model_name(self):
+    def test_transform_runtime_command_copilot_with_codex_model_name(self,
+                                                                     script_runner):
         """--model codex (bare word as model name) must not trigger codex runtime path."""
         original = "copilot --model codex -p fix-issue.prompt.md"
-        result = self.script_runner._transform_runtime_command(
-            original, "fix-issue.prompt.md", self.compiled_content, self.compiled_path
+        result = script_runner._transform_runtime_command(
+            original, "fix-issue.prompt.md", _COMPILED_CONTENT, _COMPILED_PATH
         )
         assert result.startswith("copilot")
         assert "codex exec" not in result
     
-    @patch('subprocess.run')
-    @patch('apm_cli.core.script_runner.shutil.which', return_value=None)
-    @patch('apm_cli.core.script_runner.setup_runtime_environment')
-    def test_execute_runtime_command_with_env_vars(self, mock_setup_env, mock_which, mock_subprocess):
+    def test_execute_runtime_command_with_env_vars(self, runtime_mocks, script_runner):
         """Test runtime command execution with environment variables."""
-        mock_setup_env.return_value = {'EXISTING_VAR': 'value'}
+        runtime_mocks.setup_env.return_value = {'EXISTING_VAR': 'value'}
+        mock_subprocess = runtime_mocks.run
         mock_subprocess.return_value.returncode = 0
         
         # Test command with environment variable prefix
@@ -172,7 +253,7 @@ class TestScriptRunner:
         content = "test content"
         env = {'EXISTING_VAR': 'value'}
         
-        result = self.script_runner._execute_runtime_command(command, content, env)
+        result = script_runner._execute_runtime_command(command, content, env)
         
         # Verify subprocess was called with correct arguments and environment
         mock_subprocess.assert_called_once()
@@ -187,12 +268,11 @@ class TestScriptRunner:
         assert called_env['RUST_LOG'] == 'debug'
         assert called_env['EXISTING_VAR'] == 'value'  # Existing env should be preserved
     
-    @patch('subprocess.run')
-    @patch('apm_cli.core.script_runner.shutil.which', return_value=None)
-    @patch('apm_cli.core.script_runner.setup_runtime_environment')
-    def test_execute_runtime_command_multiple_env_vars(self, mock_setup_env, mock_which, mock_subprocess):
+    def test_execute_runtime_command_multiple_env_vars(self, runtime_mocks,
+                                                       script_runner):
         """Test runtime command execution with multiple environment variables."""
-        mock_setup_env.return_value = {}
+        runtime_mocks.setup_env.return_value = {}
+        mock_subprocess = runtime_mocks.run
         mock_subprocess.return_value.returncode = 0
         
         # Test command with multiple environment variables
@@ -200,7 +280,7 @@ class TestScriptRunner:
         content = "test content"
         env = {}
         
-        result = self.script_runner._execute_runtime_command(command, content, env)
+        result = script_runner._execute_runtime_command(command, content, env)
         
         # Verify subprocess was called with correct arguments and environment
         mock_subprocess.assert_called_once()
@@ -215,13 +295,12 @@ class TestScriptRunner:
         assert called_env['DEBUG'] == '1'
         assert called_env['VERBOSE'] == 'true'
     
-    @patch('apm_cli.core.script_runner.Path.exists')
-    @patch('builtins.open', new_callable=mock_open, read_data="scripts:\n  start: 'codex hello.prompt.md'")
-    def test_list_scripts(self, mock_file, mock_exists):
+    def test_list_scripts(self, tmp_path, monkeypatch, script_runner):
         """Test listing scripts from apm.yml."""
-        mock_exists.return_value = True
+        monkeypatch.chdir(tmp_path)
+        _make_tree(tmp_path, {"apm.yml": "scripts:\n  start: 'codex hello.prompt.md'"})
         
-        scripts = self.script_runner.list_scripts()
+        scripts = script_runner.list_scripts()
         
         assert 'start' in scripts
         assert scripts['start'] == 'codex hello.prompt.md'
@@ -230,55 +309,47 @@ class TestScriptRunner:
 class TestPromptCompiler:
     """Test PromptCompiler functionality."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.compiler = PromptCompiler()
     
-    def test_substitute_parameters_simple(self):
+    def test_substitute_parameters_simple(self, compiler):
         """Test simple parameter substitution."""
         content = "Hello ${input:name}!"
         params = {"name": "World"}
         
-        result = self.compiler._substitute_parameters(content, params)
+        result = compiler._substitute_parameters(content, params)
         
         assert result == "Hello World!"
     
-    def test_substitute_parameters_multiple(self):
+    def test_substitute_parameters_multiple(self, compiler):
         """Test multiple parameter substitution."""
         content = "Service: ${input:service}, Environment: ${input:env}"
         params = {"service": "api", "env": "production"}
         
-        result = self.compiler._substitute_parameters(content, params)
+        result = compiler._substitute_parameters(content, params)
         
         assert result == "Service: api, Environment: production"
     
-    def test_substitute_parameters_no_params(self):
+    def test_substitute_parameters_no_params(self, compiler):
         """Test content with no parameters to substitute."""
         content = "This is a simple prompt with no parameters."
         params = {}
         
-        result = self.compiler._substitute_parameters(content, params)
+        result = compiler._substitute_parameters(content, params)
         
         assert result == content
     
-    def test_substitute_parameters_missing_param(self):
+    def test_substitute_parameters_missing_param(self, compiler):
         """Test behavior when parameter is missing."""
         content = "Hello ${input:name}!"
         params = {}
         
-        result = self.compiler._substitute_parameters(content, params)
+        result = compiler._substitute_parameters(content, params)
         
         # Should leave placeholder unchanged when parameter is missing
         assert result == "Hello ${input:name}!"
     
-    @patch('apm_cli.core.script_runner.Path.mkdir')
-    @patch('apm_cli.core.script_runner.Path.exists')
-    @patch('builtins.open', new_callable=mock_open)
-    def test_compile_with_frontmatter(self, mock_file, mock_exists, mock_mkdir):
+    def test_compile_with_frontmatter(self, tmp_path, monkeypatch, compiler):
         """Test compiling prompt file with frontmatter."""
-        mock_exists.return_value = True
-        
-        # Mock file content with frontmatter
+        monkeypatch.chdir(tmp_path)
         file_content = """---
 description: Test prompt
 input:
@@ -288,490 +359,309 @@ input:
 # Test Prompt
 
 Hello ${input:name}!"""
+        _make_tree(tmp_path, {"test.prompt.md": file_content})
         
-        mock_file.return_value.read.return_value = file_content
-        
-        result_path = self.compiler.compile("test.prompt.md", {"name": "World"})
+        result_path = compiler.compile("test.prompt.md", {"name": "World"})
         
         # Check that the compiled content was written correctly
-        mock_file.return_value.write.assert_called_once()
-        written_content = mock_file.return_value.write.call_args[0][0]
+        written_content = (tmp_path / result_path).read_text(encoding="utf-8")
         assert "Hello World!" in written_content
         assert "---" not in written_content  # Frontmatter should be stripped
     
-    @patch('apm_cli.core.script_runner.Path.mkdir')
-    @patch('apm_cli.core.script_runner.Path.exists')
-    @patch('builtins.open', new_callable=mock_open)
-    def test_compile_without_frontmatter(self, mock_file, mock_exists, mock_mkdir):
+    def test_compile_without_frontmatter(self, tmp_path, monkeypatch, compiler):
         """Test compiling prompt file without frontmatter."""
-        mock_exists.return_value = True
+        monkeypatch.chdir(tmp_path)
+        _make_tree(tmp_path, {"test.prompt.md": "Hello ${input:name}!"})
         
-        # Mock file content without frontmatter
-        file_content = "Hello ${input:name}!"
-        mock_file.return_value.read.return_value = file_content
-        
-        result_path = self.compiler.compile("test.prompt.md", {"name": "World"})
+        result_path = compiler.compile("test.prompt.md", {"name": "World"})
         
         # Check that the compiled content was written correctly
-        mock_file.return_value.write.assert_called_once()
-        written_content = mock_file.return_value.write.call_args[0][0]
-        assert written_content == "Hello World!"
+        assert (tmp_path / result_path).read_text(encoding="utf-8") == "Hello World!"
     
-    @patch('apm_cli.core.script_runner.Path.exists')
-    def test_compile_file_not_found(self, mock_exists):
+    def test_compile_writes_utf8_output(self, tmp_path, monkeypatch, compiler):
+        """Test compiled output is written to disk as UTF-8."""
+        monkeypatch.chdir(tmp_path)
+        _make_tree(tmp_path, {
+            "greet.prompt.md": "---\ninput:\n  - name\n---\nHéllo ${input:name}!",
+        })
+        
+        result_path = compiler.compile("greet.prompt.md", {"name": "Wörld"})
+        
+        assert Path(result_path) == Path(".apm/compiled/greet.txt")
+        assert (tmp_path / result_path).read_bytes() == "Héllo Wörld!".encode("utf-8")
+    
+    def test_compile_file_not_found(self, compiler, stub_path_exists):
         """Test compiling non-existent prompt file."""
-        mock_exists.return_value = False
+        stub_path_exists(False)
         
-        with pytest.raises(FileNotFoundError, match="Prompt file 'nonexistent.prompt.md' not found"):
-            self.compiler.compile("nonexistent.prompt.md", {})
+        with pytest.raises(FileNotFoundError,
+        match="Prompt file 'nonexistent.prompt.md' not found"):
+            compiler.compile("nonexistent.prompt.md", {})
 
 
 class TestPromptCompilerDependencyDiscovery:
     """Test PromptCompiler dependency discovery functionality."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.compiler = PromptCompiler()
-        
-    def test_resolve_prompt_file_local_exists(self):
+    def test_resolve_prompt_file_local_exists(self, tmp_path, compiler):
         """Test resolving prompt file when it exists locally."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Change to temp directory for test
-            original_cwd = Path.cwd()
-            try:
-                import os
-                os.chdir(tmpdir)
-                
-                # Create local prompt file
-                prompt_file = Path("hello-world.prompt.md")
-                prompt_file.write_text("Hello World!")
-                
-                result = self.compiler._resolve_prompt_file("hello-world.prompt.md")
-                assert result == prompt_file
-            finally:
-                os.chdir(original_cwd)
+        _make_tree(tmp_path, {"hello-world.prompt.md": "Hello World!"})
+        
+        result = compiler._resolve_prompt_file("hello-world.prompt.md", cwd=tmp_path)
+        assert result == tmp_path / "hello-world.prompt.md"
     
-    def test_resolve_prompt_file_dependency_root(self):
+    def test_resolve_prompt_file_dependency_root(self, tmp_path, compiler):
         """Test resolving prompt file from dependency root directory."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            original_cwd = Path.cwd()
-            try:
-                import os
-                os.chdir(tmpdir)
-                
-                # Create apm_modules structure with org/repo hierarchy
-                dep_dir = Path("apm_modules/microsoft/apm-sample-package")
-                dep_dir.mkdir(parents=True)
-                
-                # Create prompt file in dependency root
-                dep_prompt = dep_dir / "hello-world.prompt.md"
-                dep_prompt.write_text("Hello from dependency!")
-                
-                result = self.compiler._resolve_prompt_file("hello-world.prompt.md")
-                assert result == dep_prompt
-            finally:
-                os.chdir(original_cwd)
+        # apm_modules structure with org/repo hierarchy, prompt in dependency root
+        dep_prompt = "apm_modules/microsoft/apm-sample-package/hello-world.prompt.md"
+        _make_tree(tmp_path, {dep_prompt: "Hello from dependency!"})
+        
+        result = compiler._resolve_prompt_file("hello-world.prompt.md", cwd=tmp_path)
+        assert result == tmp_path / dep_prompt
     
-    def test_resolve_prompt_file_dependency_subdirectory(self):
+    def test_resolve_prompt_file_dependency_subdirectory(self, tmp_path, compiler):
         """Test resolving prompt file from dependency subdirectory."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            original_cwd = Path.cwd()
-            try:
-                import os
-                os.chdir(tmpdir)
-                
-                # Create apm_modules structure
-                dep_dir = Path("apm_modules/design-guidelines")
-                dep_dir.mkdir(parents=True)
-                
-                # Create prompt file in prompts subdirectory
-                prompts_dir = dep_dir / "prompts"
-                prompts_dir.mkdir()
-                dep_prompt = prompts_dir / "hello-world.prompt.md"
-                dep_prompt.write_text("Hello from dependency prompts!")
-                
-                result = self.compiler._resolve_prompt_file("hello-world.prompt.md")
-                assert result == dep_prompt
-            finally:
-                os.chdir(original_cwd)
+        # Prompt file in the dependency's prompts subdirectory
+        dep_prompt = "apm_modules/design-guidelines/prompts/hello-world.prompt.md"
+        _make_tree(tmp_path, {dep_prompt: "Hello from dependency prompts!"})
+        
+        result = compiler._resolve_prompt_file("hello-world.prompt.md", cwd=tmp_path)
+        assert result == tmp_path / dep_prompt
     
-    def test_resolve_prompt_file_multiple_dependencies(self):
+    def test_resolve_prompt_file_multiple_dependencies(self, tmp_path, compiler):
         """Test resolving prompt file with multiple dependencies (first match wins)."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            original_cwd = Path.cwd()
-            try:
-                import os
-                os.chdir(tmpdir)
-                
-                # Create multiple dependency directories with org/repo structure
-                compliance_dir = Path("apm_modules/acme/compliance-rules")
-                compliance_dir.mkdir(parents=True)
-                design_dir = Path("apm_modules/microsoft/apm-sample-package")
-                design_dir.mkdir(parents=True)
-                
-                # Create prompt files in both (first one found should win)
-                compliance_prompt = compliance_dir / "hello-world.prompt.md"
-                compliance_prompt.write_text("Hello from compliance!")
-                design_prompt = design_dir / "hello-world.prompt.md"
-                design_prompt.write_text("Hello from design!")
-                
-                result = self.compiler._resolve_prompt_file("hello-world.prompt.md")
-                # Should return one of the matches (doesn't matter which since both exist)
-                assert result in [compliance_prompt, design_prompt]
-                assert result.exists()
-                assert result.read_text().startswith("Hello from")
-            finally:
-                os.chdir(original_cwd)
-    
-    def test_resolve_prompt_file_no_apm_modules(self):
+        # Prompt files in both dependencies (first one found should win)
+        compliance_prompt = "apm_modules/acme/compliance-rules/hello-world.prompt.md"
+        design_prompt = "apm_modules/microsoft/apm-sample-package/hello-world.prompt.md"
+        _make_tree(tmp_path, {
+            compliance_prompt: "Hello from compliance!",
+            design_prompt: "Hello from design!",
+        })
+        
+        result = compiler._resolve_prompt_file("hello-world.prompt.md", cwd=tmp_path)
+        # Should return one of the matches (doesn't matter which since both exist)
+        assert result in [tmp_path / compliance_prompt, tmp_path / design_prompt]
+        assert result.exists()
+        assert result.read_text().startswith("Hello from")
+    
+    def test_resolve_prompt_file_skips_hidden_dirs(self, tmp_path, compiler):
+        """Test hidden org/repo dirs are ignored and workflows/ is searched."""
+        dep_prompt = "apm_modules/acme/flows/workflows/hello-world.prompt.md"
+        _make_tree(tmp_path, {
+            "apm_modules/.cache/repo/hello-world.prompt.md": "Hidden org",
+            "apm_modules/acme/.git/hello-world.prompt.md": "Hidden repo",
+            dep_prompt: "Hello from workflows!",
+        })
+        
+        result = compiler._resolve_prompt_file("hello-world.prompt.md", cwd=tmp_path)
+        assert result == tmp_path / dep_prompt
+    
+    def test_resolve_prompt_file_no_apm_modules(self, tmp_path, compiler):
         """Test resolving prompt file when apm_modules directory doesn't exist."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            original_cwd = Path.cwd()
-            try:
-                import os
-                os.chdir(tmpdir)
-                
-                # No apm_modules directory exists
-                with pytest.raises(FileNotFoundError) as exc_info:
-                    self.compiler._resolve_prompt_file("hello-world.prompt.md")
-                
-                error_msg = str(exc_info.value)
-                assert "Prompt file 'hello-world.prompt.md' not found" in error_msg
-                assert "Local: hello-world.prompt.md" in error_msg
-                assert "Run 'apm install'" in error_msg
-            finally:
-                os.chdir(original_cwd)
+
+        # No apm_modules directory exists
+        with pytest.raises(FileNotFoundError) as exc_info:
+            compiler._resolve_prompt_file("hello-world.prompt.md", cwd=tmp_path)
+        
+        error_msg = str(exc_info.value)
+        assert "Prompt file 'hello-world.prompt.md' not found" in error_msg
+        assert "Local: hello-world.prompt.md" in error_msg
+        assert "Run 'apm install'" in error_msg
     
-    def test_resolve_prompt_file_not_found_anywhere(self):
+    def test_resolve_prompt_file_not_found_anywhere(self, tmp_path, compiler):
         """Test resolving prompt file when it's not found anywhere."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            original_cwd = Path.cwd()
-            try:
-                import os
-                os.chdir(tmpdir)
-                
-                # Create apm_modules with dependencies but no prompt files
-                compliance_dir = Path("apm_modules/acme/compliance-rules")
-                compliance_dir.mkdir(parents=True)
-                design_dir = Path("apm_modules/microsoft/apm-sample-package")
-                design_dir.mkdir(parents=True)
-                
-                with pytest.raises(FileNotFoundError) as exc_info:
-                    self.compiler._resolve_prompt_file("hello-world.prompt.md")
-                
-                error_msg = str(exc_info.value)
-                assert "Prompt file 'hello-world.prompt.md' not found" in error_msg
-                assert "Local: hello-world.prompt.md" in error_msg
-                assert "Dependencies:" in error_msg
-                assert "acme/compliance-rules/hello-world.prompt.md" in error_msg
-                assert "microsoft/apm-sample-package/hello-world.prompt.md" in error_msg
-            finally:
-                os.chdir(original_cwd)
+        # apm_modules with dependencies but no prompt files
+        _make_tree(tmp_path, {
+            "apm_modules/acme/compliance-rules": None,
+            "apm_modules/microsoft/apm-sample-package": None,
+        })
+        
+        with pytest.raises(FileNotFoundError) as exc_info:
+            compiler._resolve_prompt_file("hello-world.prompt.md", cwd=tmp_path)
+        
+        error_msg = str(exc_info.value)
+        assert "Prompt file 'hello-world.prompt.md' not found" in error_msg
+        assert "Local: hello-world.prompt.md" in error_msg
+        assert "Dependencies:" in error_msg
+        assert "acme/compliance-rules/hello-world.prompt.md" in error_msg
+        assert "microsoft/apm-sample-package/hello-world.prompt.md" in error_msg
     
-    def test_resolve_prompt_file_local_takes_precedence(self):
+    def test_resolve_prompt_file_local_takes_precedence(self, tmp_path, compiler):
         """Test that local file takes precedence over dependency files."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            original_cwd = Path.cwd()
-            try:
-                import os
-                os.chdir(tmpdir)
-                
-                # Create local prompt file
-                local_prompt = Path("hello-world.prompt.md")
-                local_prompt.write_text("Hello from local!")
-                
-                # Create dependency with same file
-                dep_dir = Path("apm_modules/microsoft/apm-sample-package")
-                dep_dir.mkdir(parents=True)
-                dep_prompt = dep_dir / "hello-world.prompt.md"
-                dep_prompt.write_text("Hello from dependency!")
-                
-                result = self.compiler._resolve_prompt_file("hello-world.prompt.md")
-                # Local should take precedence
-                assert result == local_prompt
-            finally:
-                os.chdir(original_cwd)
-    
-    @patch('apm_cli.core.script_runner.Path.mkdir')
-    @patch('builtins.open', new_callable=mock_open)
-    def test_compile_with_dependency_resolution(self, mock_file, mock_mkdir):
+        # Local prompt file and a dependency with the same file
+        _make_tree(tmp_path, {
+            "hello-world.prompt.md": "Hello from local!",
+            "apm_modules/microsoft/apm-sample-package/hello-world.prompt.md": (
+                "Hello from dependency!"
+            ),
+        })
+        
+        result = compiler._resolve_prompt_file("hello-world.prompt.md", cwd=tmp_path)
+        # Local should take precedence
+        assert result == tmp_path / "hello-world.prompt.md"
+    
+    def test_compile_with_dependency_resolution(self, tmp_path, monkeypatch, compiler):
         """Test compile method uses dependency resolution correctly."""
-        with patch.object(self.compiler, '_resolve_prompt_file') as mock_resolve:
-            mock_resolve.return_value = Path("apm_modules/microsoft/apm-sample-package/test.prompt.md")
-            
-            file_content = "Hello ${input:name}!"
-            mock_file.return_value.read.return_value = file_content
+        monkeypatch.chdir(tmp_path)
+        resolved = "apm_modules/microsoft/apm-sample-package/test.prompt.md"
+        _make_tree(tmp_path, {resolved: "Hello ${input:name}!"})
+        with patch.object(compiler, '_resolve_prompt_file') as mock_resolve:
+            mock_resolve.return_value = Path(resolved)
             
-            result_path = self.compiler.compile("test.prompt.md", {"name": "World"})
+            result_path = compiler.compile("test.prompt.md", {"name": "World"})
             
             # Verify _resolve_prompt_file was called
             mock_resolve.assert_called_once_with("test.prompt.md")
             
-            # Verify file was opened with resolved path
-            mock_file.assert_called()
-            opened_path = mock_file.call_args_list[0][0][0]
-            assert str(opened_path).replace("\\", "/") == "apm_modules/microsoft/apm-sample-package/test.prompt.md"
+            # Verify the resolved dependency file is the one that was compiled
+            assert (tmp_path / result_path).read_text(encoding="utf-8") == "Hello World!"
 
 
 class TestScriptRunnerAutoInstall:
     """Test ScriptRunner auto-install functionality."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.script_runner = ScriptRunner()
     
-    def test_is_virtual_package_reference_valid_file(self):
+    def test_is_virtual_package_reference_valid_file(self, script_runner):
         """Test detection of valid virtual file package references."""
         # Valid virtual file package reference
         ref = "owner/test-repo/prompts/architecture-blueprint-generator.prompt.md"
-        assert self.script_runner._is_virtual_package_reference(ref) is True
+        assert script_runner._is_virtual_package_reference(ref) is True
     
-    def test_is_virtual_package_reference_valid_collection(self):
+    def test_is_virtual_package_reference_valid_collection(self, script_runner):
         """Test detection of valid virtual collection package references."""
         # Valid virtual collection package reference
         ref = "owner/test-repo/collections/project-planning"
-        assert self.script_runner._is_virtual_package_reference(ref) is True
+        assert script_runner._is_virtual_package_reference(ref) is True
     
-    def test_is_virtual_package_reference_regular_package(self):
+    def test_is_virtual_package_reference_regular_package(self, script_runner):
         """Test detection rejects regular packages."""
         # Regular package (not virtual)
         ref = "microsoft/apm-sample-package"
-        assert self.script_runner._is_virtual_package_reference(ref) is False
+        assert script_runner._is_virtual_package_reference(ref) is False
     
-    def test_is_virtual_package_reference_simple_name(self):
+    def test_is_virtual_package_reference_simple_name(self, script_runner):
         """Test detection rejects simple names without slashes."""
         # Simple name (not a virtual package)
         ref = "code-review"
-        assert self.script_runner._is_virtual_package_reference(ref) is False
+        assert script_runner._is_virtual_package_reference(ref) is False
     
-    def test_is_virtual_package_reference_invalid_format(self):
+    def test_is_virtual_package_reference_skips_parse_without_path(self, script_runner):
+        """Test owner/repo references are rejected before parsing."""
+        with patch(
+            "apm_cli.models.apm_package.DependencyReference.parse"
+        ) as mock_parse:
+            assert script_runner._is_virtual_package_reference("owner/repo") is False
+        mock_parse.assert_not_called()
+    
+    def test_is_virtual_package_reference_invalid_format(self, script_runner):
         """Test detection rejects invalid formats."""
         # Invalid format - looks like a file with unsupported extension
         ref = "owner/repo/some/invalid/path.txt"
-        assert self.script_runner._is_virtual_package_reference(ref) is False
+        assert script_runner._is_virtual_package_reference(ref) is False
     
-    @patch('apm_cli.deps.github_downloader.GitHubPackageDownloader')
     @patch('apm_cli.core.script_runner.Path.mkdir')
-    @patch('apm_cli.core.script_runner.Path.exists')
-    def test_auto_install_virtual_package_file_success(self, mock_exists, mock_mkdir, mock_downloader_class):
+    def test_auto_install_virtual_package_file_success(self, mock_mkdir,
+                                                       downloader_mock, script_runner,
+                                                       stub_path_exists):
         """Test successful auto-install of virtual file package."""
         # Setup mocks
-        mock_exists.return_value = False  # Package not already installed
-        mock_downloader = MagicMock()
-        mock_downloader_class.return_value = mock_downloader
+        stub_path_exists(False)  # Package not already installed
+        mock_downloader = downloader_mock
         
         # Mock package info
-        mock_package = MagicMock()
-        mock_package.name = "test-repo-architecture-blueprint-generator"
-        mock_package.version = "1.0.0"
-        mock_package_info = MagicMock()
-        mock_package_info.package = mock_package
-        mock_downloader.download_virtual_file_package.return_value = mock_package_info
+        mock_downloader.download_virtual_file_package.return_value = _package_info(
+            "test-repo-architecture-blueprint-generator"
+        )
         
         # Test auto-install
         ref = "owner/test-repo/prompts/architecture-blueprint-generator.prompt.md"
-        result = self.script_runner._auto_install_virtual_package(ref)
+        result = script_runner._auto_install_virtual_package(ref)
         
         assert result is True
         mock_downloader.download_virtual_file_package.assert_called_once()
     
-    @patch('apm_cli.deps.github_downloader.GitHubPackageDownloader')
     @patch('apm_cli.core.script_runner.Path.mkdir')
-    @patch('apm_cli.core.script_runner.Path.exists')
-    def test_auto_install_virtual_package_collection_success(self, mock_exists, mock_mkdir, mock_downloader_class):
+    def test_auto_install_virtual_package_collection_success(self, mock_mkdir,
+                                                             downloader_mock,
+                                                             script_runner,
+                                                             stub_path_exists):
         """Test successful auto-install of virtual collection package."""
         # Setup mocks
-        mock_exists.return_value = False  # Package not already installed
-        mock_downloader = MagicMock()
-        mock_downloader_class.return_value = mock_downloader
+        stub_path_exists(False)  # Package not already installed
+        mock_downloader = downloader_mock
         
         # Mock package info
-        mock_package = MagicMock()
-        mock_package.name = "test-repo-project-planning"
-        mock_package.version = "1.0.0"
-        mock_package_info = MagicMock()
-        mock_package_info.package = mock_package
-        mock_downloader.download_virtual_collection_package.return_value = mock_package_info
+        mock_downloader.download_collection_package.return_value = _package_info(
+            "test-repo-project-planning"
+        )
         
         # Test auto-install
         ref = "owner/test-repo/collections/project-planning"
-        result = self.script_runner._auto_install_virtual_package(ref)
+        result = script_runner._auto_install_virtual_package(ref)
         
         assert result is True
-        mock_downloader.download_virtual_collection_package.assert_called_once()
+        mock_downloader.download_collection_package.assert_called_once()
     
-    @patch('apm_cli.core.script_runner.Path.exists')
-    def test_auto_install_virtual_package_already_installed(self, mock_exists):
+    def test_auto_install_virtual_package_already_installed(self, script_runner,
+                                                            stub_path_exists):
         """Test auto-install skips when package already installed."""
         # Package already exists
-        mock_exists.return_value = True
+        stub_path_exists(True)
         
         ref = "owner/test-repo/prompts/architecture-blueprint-generator.prompt.md"
-        result = self.script_runner._auto_install_virtual_package(ref)
+        result = script_runner._auto_install_virtual_package(ref)
         
         assert result is True  # Should return True (success) without downloading
     
-    @patch('apm_cli.deps.github_downloader.GitHubPackageDownloader')
     @patch('apm_cli.core.script_runner.Path.mkdir')
-    @patch('apm_cli.core.script_runner.Path.exists')
-    def test_auto_install_virtual_package_download_failure(self, mock_exists, mock_mkdir, mock_downloader_class):
+    def test_auto_install_virtual_package_download_failure(self, mock_mkdir,
+                                                           downloader_mock,
+                                                           script_runner,
+                                                           stub_path_exists):
         """Test auto-install handles download failures gracefully."""
         # Setup mocks
-        mock_exists.return_value = False
-        mock_downloader = MagicMock()
-        mock_downloader_class.return_value = mock_downloader
+        stub_path_exists(False)
+        mock_downloader = downloader_mock
         
         # Simulate download failure
         mock_downloader.download_virtual_file_package.side_effect = RuntimeError("Download failed")
         
         # Test auto-install
         ref = "owner/test-repo/prompts/architecture-blueprint-generator.prompt.md"
-        result = self.script_runner._auto_install_virtual_package(ref)
+        result = script_runner._auto_install_virtual_package(ref)
         
         assert result is False  # Should return False on failure
     
-    def test_auto_install_virtual_package_invalid_reference(self):
+    def test_auto_install_virtual_package_invalid_reference(self, script_runner):
         """Test auto-install rejects invalid references."""
         # Not a virtual package
         ref = "microsoft/apm-sample-package"
-        result = self.script_runner._auto_install_virtual_package(ref)
+        result = script_runner._auto_install_virtual_package(ref)
         
         assert result is False
     
-    @patch('apm_cli.deps.github_downloader.GitHubPackageDownloader')
     @patch('apm_cli.core.script_runner.Path.mkdir')
-    @patch('apm_cli.core.script_runner.Path.exists')
-    def test_auto_install_virtual_package_subdirectory_success(self, mock_exists, mock_mkdir, mock_downloader_class):
+    def test_auto_install_virtual_package_subdirectory_success(self, mock_mkdir,
+                                                               downloader_mock,
+                                                               script_runner,
+                                                               stub_path_exists):
         """Test successful auto-install of virtual subdirectory (skill) package."""
         # Setup mocks
-        mock_exists.return_value = False  # Package not already installed
-        mock_downloader = MagicMock()
-        mock_downloader_class.return_value = mock_downloader
+        stub_path_exists(False)  # Package not already installed
+        mock_downloader = downloader_mock
         
         # Mock package info
-        mock_package = MagicMock()
-        mock_package.name = "architecture-blueprint-generator"
-        mock_package.version = "1.0.0"
-        mock_package_info = MagicMock()
-        mock_package_info.package = mock_package
-        mock_downloader.download_subdirectory_package.return_value = mock_package_info
+        mock_downloader.download_subdirectory_package.return_value = _package_info(
+            "architecture-blueprint-generator"
+        )
         
         # Test auto-install with subdirectory reference (no .prompt.md extension)
         ref = "github/awesome-copilot/skills/architecture-blueprint-generator"
-        result = self.script_runner._auto_install_virtual_package(ref)
+        result = script_runner._auto_install_virtual_package(ref)
         
         assert result is True
         mock_downloader.download_subdirectory_package.assert_called_once()
 
-    @patch('apm_cli.core.script_runner.ScriptRunner._auto_install_virtual_package')
-    @patch('apm_cli.core.script_runner.ScriptRunner._discover_prompt_file')
-    @patch('apm_cli.core.script_runner.ScriptRunner._detect_installed_runtime')
-    @patch('apm_cli.core.script_runner.ScriptRunner._execute_script_command')
-    @patch('apm_cli.core.script_runner.Path.exists')
-    @patch('builtins.open', new_callable=mock_open, read_data="name: test\nscripts: {}")
-    def test_run_script_triggers_auto_install(self, mock_file, mock_exists, mock_execute, 
-                                             mock_runtime, mock_discover, mock_auto_install):
-        """Test that run_script triggers auto-install for virtual package references."""
-        mock_exists.return_value = True  # apm.yml exists
-        mock_discover.side_effect = [None, Path("apm_modules/github/test-repo-architecture-blueprint-generator/.apm/prompts/architecture-blueprint-generator.prompt.md")]
-        mock_auto_install.return_value = True
-        mock_runtime.return_value = "copilot"
-        mock_execute.return_value = True
-        
-        ref = "owner/test-repo/prompts/architecture-blueprint-generator.prompt.md"
-        result = self.script_runner.run_script(ref, {})
-        
-        # Verify auto-install was called
-        mock_auto_install.assert_called_once_with(ref)
-        # Verify discovery was attempted twice (before and after install)
-        assert mock_discover.call_count == 2
-        # Verify script was executed
-        mock_execute.assert_called_once()
-        assert result is True
-    
-    @patch('apm_cli.core.script_runner.ScriptRunner._auto_install_virtual_package')
-    @patch('apm_cli.core.script_runner.ScriptRunner._discover_prompt_file')
-    @patch('apm_cli.core.script_runner.Path.exists')
-    @patch('builtins.open', new_callable=mock_open, read_data="name: test\nscripts: {}")
-    def test_run_script_auto_install_failure_shows_error(self, mock_file, mock_exists, 
-                                                        mock_discover, mock_auto_install):
-        """Test that run_script shows helpful error when auto-install fails."""
-        mock_exists.return_value = True  # apm.yml exists
-        mock_discover.return_value = None
-        mock_auto_install.return_value = False  # Auto-install failed
-        
-        ref = "owner/test-repo/prompts/architecture-blueprint-generator.prompt.md"
-        
-        with pytest.raises(RuntimeError) as exc_info:
-            self.script_runner.run_script(ref, {})
-        
-        error_msg = str(exc_info.value)
-        assert "Script or prompt" in error_msg
-        assert "not found" in error_msg
-    
-    @patch('apm_cli.core.script_runner.ScriptRunner._auto_install_virtual_package')
-    @patch('apm_cli.core.script_runner.ScriptRunner._discover_prompt_file')
-    @patch('apm_cli.core.script_runner.Path.exists')
-    @patch('builtins.open', new_callable=mock_open, read_data="name: test\nscripts: {}")
-    def test_run_script_skips_auto_install_for_simple_names(self, mock_file, mock_exists, 
-                                                           mock_discover, mock_auto_install):
-        """Test that run_script doesn't trigger auto-install for simple names."""
-        mock_exists.return_value = True  # apm.yml exists
-        mock_discover.return_value = None
-        
-        # Simple name (not a virtual package reference)
-        ref = "code-review"
-        
-        with pytest.raises(RuntimeError):
-            self.script_runner.run_script(ref, {})
-        
-        # Auto-install should NOT be called for simple names
-        mock_auto_install.assert_not_called()
-    
-    @patch('apm_cli.core.script_runner.ScriptRunner._discover_prompt_file')
-    @patch('apm_cli.core.script_runner.ScriptRunner._detect_installed_runtime')
-    @patch('apm_cli.core.script_runner.ScriptRunner._execute_script_command')
-    @patch('apm_cli.core.script_runner.Path.exists')
-    @patch('builtins.open', new_callable=mock_open, read_data="name: test\nscripts: {}")
-    def test_run_script_uses_cached_package(self, mock_file, mock_exists, mock_execute, 
-                                           mock_runtime, mock_discover):
-        """Test that run_script uses already-installed package without re-downloading."""
-        mock_exists.return_value = True  # apm.yml exists
-        # Package already discovered (no auto-install needed)
-        mock_discover.return_value = Path("apm_modules/github/test-repo-architecture-blueprint-generator/.apm/prompts/architecture-blueprint-generator.prompt.md")
-        mock_runtime.return_value = "copilot"
-        mock_execute.return_value = True
-        
-        ref = "owner/test-repo/prompts/architecture-blueprint-generator.prompt.md"
-        result = self.script_runner.run_script(ref, {})
-        
-        # Verify discovery found it on first try
-        mock_discover.assert_called_once()
-        # Verify script was executed
-        mock_execute.assert_called_once()
-        assert result is True
-    
-    @patch('apm_cli.core.script_runner.ScriptRunner._auto_install_virtual_package')
-    @patch('apm_cli.core.script_runner.ScriptRunner._discover_prompt_file')
-    @patch('apm_cli.core.script_runner.Path.exists')
-    @patch('builtins.open', new_callable=mock_open, read_data="name: test\nscripts: {}")
-    def test_run_script_handles_install_success_but_no_prompt(self, mock_file, mock_exists,
-                                                              mock_discover, mock_auto_install):
-        """Test error when package installs successfully but prompt not found."""
-        mock_exists.return_value = True  # apm.yml exists
-        mock_discover.side_effect = [None, None]  # Not found before or after install
-        mock_auto_install.return_value = True  # Install succeeded
-        
-        ref = "owner/test-repo/prompts/architecture-blueprint-generator.prompt.md"
-        
-        with pytest.raises(RuntimeError) as exc_info:
-            self.script_runner.run_script(ref, {})
-        
-        error_msg = str(exc_info.value)
-        assert "Package installed successfully but prompt not found" in error_msg
-        assert "may not contain the expected prompt file" in error_msg
-
-    def test_discover_qualified_prompt_finds_skill_md(self):
+    def test_discover_qualified_prompt_finds_skill_md(self, script_runner):
         """Test that _discover_qualified_prompt finds SKILL.md for subdirectory packages."""
         with tempfile.TemporaryDirectory() as temp_dir:
             original_dir = os.getcwd()
@@ -783,7 +673,7 @@ class TestScriptRunnerAutoInstall:
                 skill_file = skill_dir / "SKILL.md"
                 skill_file.write_text("# Architecture Blueprint Generator Skill")
                 
-                result = self.script_runner._discover_qualified_prompt(
+                result = script_runner._discover_qualified_prompt(
                     "github/awesome-copilot/skills/architecture-blueprint-generator"
                 )
                 
@@ -792,7 +682,7 @@ class TestScriptRunnerAutoInstall:
             finally:
                 os.chdir(original_dir)
 
-    def test_discover_simple_name_finds_skill_md(self):
+    def test_discover_simple_name_finds_skill_md(self, script_runner):
         """Test that _discover_prompt_file finds SKILL.md by simple name."""
         with tempfile.TemporaryDirectory() as temp_dir:
             original_dir = os.getcwd()
@@ -804,7 +694,7 @@ class TestScriptRunnerAutoInstall:
                 skill_file = skill_dir / "SKILL.md"
                 skill_file.write_text("# Architecture Blueprint Generator Skill")
                 
-                result = self.script_runner._discover_prompt_file(
+                result = script_runner._discover_prompt_file(
                     "architecture-blueprint-generator"
                 )
                 
@@ -814,21 +704,132 @@ class TestScriptRunnerAutoInstall:
                 os.chdir(original_dir)
 
 
+@pytest.fixture(scope="class")
+def _run_script_hooks():
+    """Patch the ScriptRunner hooks run_script delegates to, once per class."""
+    names = (
+        "_discover_prompt_file",
+        "_auto_install_virtual_package",
+        "_detect_installed_runtime",
+        "_execute_script_command",
+    )
+    with patch.multiple(ScriptRunner, **{name: MagicMock() for name in names}):
+        yield SimpleNamespace(
+            discover=ScriptRunner._discover_prompt_file,
+            auto_install=ScriptRunner._auto_install_virtual_package,
+            runtime=ScriptRunner._detect_installed_runtime,
+            execute=ScriptRunner._execute_script_command,
+        )
+
+
+@pytest.fixture
+def run_hooks(_run_script_hooks):
+    """Class-scoped run_script hooks with return values and calls cleared."""
+    for mock in vars(_run_script_hooks).values():
+        mock.reset_mock(return_value=True, side_effect=True)
+    return _run_script_hooks
+
+
+_VIRTUAL_PROMPT_REF = "owner/test-repo/prompts/architecture-blueprint-generator.prompt.md"
+_INSTALLED_PROMPT = Path(
+    "apm_modules/github/test-repo-architecture-blueprint-generator/.apm/prompts/"
+    "architecture-blueprint-generator.prompt.md"
+)
+
+
+class TestRunScript:
+    """Test run_script's discovery and auto-install flow."""
+
+    def test_run_script_triggers_auto_install(self, run_hooks, script_runner,
+                                              in_apm_project):
+        """Test that run_script triggers auto-install for virtual package references."""
+        # Not found before install, found after
+        run_hooks.discover.side_effect = [None, _INSTALLED_PROMPT]
+        run_hooks.auto_install.return_value = True
+        run_hooks.runtime.return_value = "copilot"
+        run_hooks.execute.return_value = True
+        
+        result = script_runner.run_script(_VIRTUAL_PROMPT_REF, {})
+        
+        # Verify auto-install was called
+        run_hooks.auto_install.assert_called_once_with(_VIRTUAL_PROMPT_REF)
+        # Verify discovery was attempted twice (before and after install)
+        assert run_hooks.discover.call_count == 2
+        # Verify script was executed
+        run_hooks.execute.assert_called_once()
+        assert result is True
+    
+    def test_run_script_auto_install_failure_shows_error(self, run_hooks, script_runner,
+                                                         in_apm_project):
+        """Test that run_script shows helpful error when auto-install fails."""
+        run_hooks.discover.return_value = None
+        run_hooks.auto_install.return_value = False  # Auto-install failed
+        
+        with pytest.raises(RuntimeError) as exc_info:
+            script_runner.run_script(_VIRTUAL_PROMPT_REF, {})
+        
+        error_msg = str(exc_info.value)
+        assert "Script or prompt" in error_msg
+        assert "not found" in error_msg
+    
+    def test_run_script_skips_auto_install_for_simple_names(self, run_hooks,
+                                                            script_runner,
+                                                            in_apm_project):
+        """Test that run_script doesn't trigger auto-install for simple names."""
+        run_hooks.discover.return_value = None
+        
+        # Simple name (not a virtual package reference)
+        with pytest.raises(RuntimeError):
+            script_runner.run_script("code-review", {})
+        
+        # Auto-install should NOT be called for simple names
+        run_hooks.auto_install.assert_not_called()
+    
+    def test_run_script_uses_cached_package(self, run_hooks, script_runner,
+                                            in_apm_project):
+        """Test that run_script uses already-installed package without re-downloading."""
+        # Package already discovered (no auto-install needed)
+        run_hooks.discover.return_value = _INSTALLED_PROMPT
+        run_hooks.runtime.return_value = "copilot"
+        run_hooks.execute.return_value = True
+        
+        result = script_runner.run_script(_VIRTUAL_PROMPT_REF, {})
+        
+        # Verify discovery found it on first try
+        run_hooks.discover.assert_called_once()
+        run_hooks.auto_install.assert_not_called()
+        # Verify script was executed
+        run_hooks.execute.assert_called_once()
+        assert result is True
+    
+    def test_run_script_handles_install_success_but_no_prompt(self, run_hooks,
+                                                              script_runner,
+                                                              in_apm_project):
+        """Test error when package installs successfully but prompt not found."""
+        run_hooks.discover.side_effect = [None, None]  # Not found before or after install
+        run_hooks.auto_install.return_value = True  # Install succeeded
+        
+        with pytest.raises(RuntimeError) as exc_info:
+            script_runner.run_script(_VIRTUAL_PROMPT_REF, {})
+        
+        error_msg = str(exc_info.value)
+        assert "Package installed successfully but prompt not found" in error_msg
+        assert "may not contain the expected prompt file" in error_msg
+
+
 class TestExecuteRuntimeCommandWindowsResolution:
     """Test that _execute_runtime_command resolves executables on Windows."""
 
-    def setup_method(self):
-        self.runner = ScriptRunner()
-
     @patch("apm_cli.core.script_runner.subprocess.run")
     @patch("apm_cli.core.script_runner.shutil.which", return_value=r"C:\npm\copilot.cmd")
     @patch("apm_cli.core.script_runner.sys")
-    def test_resolves_executable_on_windows(self, mock_sys, mock_which, mock_run):
+    def test_resolves_executable_on_windows(self, mock_sys, mock_which, mock_run,
+                                            script_runner):
         """On win32, the executable should be resolved via shutil.which."""
         mock_sys.platform = "win32"
         mock_run.return_value = MagicMock(returncode=0)
 
-        self.runner._execute_runtime_command(
+        script_runner._execute_runtime_command(
             "copilot --log-level all", "prompt content", os.environ.copy()
         )
 
@@ -839,12 +840,13 @@ class TestExecuteRuntimeCommandWindowsResolution:
     @patch("apm_cli.core.script_runner.subprocess.run")
     @patch("apm_cli.core.script_runner.shutil.which", return_value=None)
     @patch("apm_cli.core.script_runner.sys")
-    def test_keeps_original_when_which_returns_none(self, mock_sys, mock_which, mock_run):
+    def test_keeps_original_when_which_returns_none(self, mock_sys, mock_which,
+                                                    mock_run, script_runner):
         """If shutil.which can't find it, keep the original name."""
         mock_sys.platform = "win32"
         mock_run.return_value = MagicMock(returncode=0)
 
-        self.runner._execute_runtime_command(
+        script_runner._execute_runtime_command(
             "copilot -p", "prompt content", os.environ.copy()
         )
 
@@ -854,12 +856,13 @@ class TestExecuteRuntimeCommandWindowsResolution:
     @patch("apm_cli.core.script_runner.subprocess.run")
     @patch("apm_cli.core.script_runner.shutil.which")
     @patch("apm_cli.core.script_runner.sys")
-    def test_skips_resolution_on_non_windows(self, mock_sys, mock_which, mock_run):
+    def test_skips_resolution_on_non_windows(self, mock_sys, mock_which, mock_run,
+                                             script_runner):
         """On non-Windows, shutil.which should not be called."""
         mock_sys.platform = "linux"
         mock_run.return_value = MagicMock(returncode=0)
 
-        self.runner._execute_runtime_command(
+        script_runner._execute_runtime_command(
             "copilot -p", "prompt content", os.environ.copy()
         )
 
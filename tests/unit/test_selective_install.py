@@ -7,137 +7,95 @@ Bug context: Previously, running `apm install ComposioHQ/awesome-claude-skills/m
 would also install unrelated packages like `design-guidelines` from apm.yml.
 """
 
-import builtins
+import pytest
+
+from apm_cli.commands.install import _package_filter_identities
+from apm_cli.models.apm_package import DependencyReference
 
 
 class TestFilterMatchingLogic:
-    """Test the filter matching logic used in _install_apm_dependencies.
+    """Test the filter matching used in _install_apm_dependencies.
     
-    This replicates the exact filter logic from cli.py to ensure it correctly
-    handles the host prefix mismatch issue (user passes 'owner/repo' but 
-    str(dep) returns 'github.com/owner/repo').
+    Exercises the real _package_filter_identities helper, including the host
+    prefix mismatch issue (user passes 'owner/repo' but the dependency was
+    declared as 'github.com/owner/repo').
     """
 
-    def _normalize_pkg(self, pkg: str) -> str:
-        """Normalize package string for comparison."""
-        # Remove _git/ from ADO URLs
-        if '/_git/' in pkg:
-            pkg = pkg.replace('/_git/', '/')
-        return pkg
-
     def _matches_filter(self, dep_str: str, only_packages: list) -> bool:
-        """Replicate the filter logic from cli.py for testing."""
-        only_set = builtins.set(self._normalize_pkg(p) for p in only_packages)
-        
-        # Check exact match
-        if dep_str in only_set:
-            return True
-        # Check if dep_str ends with "/<pkg>" to ensure path boundary matching
-        # This prevents "prefix-owner/repo" from matching "owner/repo"
-        for pkg in only_set:
-            if dep_str.endswith(f"/{pkg}"):
-                return True
-        return False
-
-    def test_exact_match(self):
-        """Test exact string match."""
-        dep_str = "owner/repo"
-        assert self._matches_filter(dep_str, ["owner/repo"])
-
-    def test_host_prefix_match(self):
-        """Test matching when dep has host prefix (the main bug case)."""
-        dep_str = "github.com/owner/repo"
-        assert self._matches_filter(dep_str, ["owner/repo"])
-
-    def test_virtual_package_match(self):
-        """Test matching virtual packages with subdirectory paths."""
-        dep_str = "github.com/ComposioHQ/awesome-claude-skills/mcp-builder"
-        assert self._matches_filter(dep_str, ["ComposioHQ/awesome-claude-skills/mcp-builder"])
-
-    def test_non_match(self):
-        """Test that non-matching packages don't match."""
-        dep_str = "github.com/owner2/repo2"
-        assert not self._matches_filter(dep_str, ["owner1/repo1"])
-
-    def test_partial_repo_name_does_not_match(self):
-        """Test that partial repo names don't cause false positives."""
-        # If user wants 'owner/repo', it shouldn't match 'other-owner/repo'
-        dep_str = "github.com/owner1/repo1"
-        assert not self._matches_filter(dep_str, ["owner2/repo2"])
-
-    def test_multiple_packages_in_filter(self):
-        """Test filter with multiple packages requested."""
-        filter_list = ["owner1/repo1", "owner2/repo2"]
-        
-        assert self._matches_filter("github.com/owner1/repo1", filter_list)
-        assert self._matches_filter("github.com/owner2/repo2", filter_list)
-        assert not self._matches_filter("github.com/owner3/repo3", filter_list)
-
-    def test_real_bug_case_mcp_builder_vs_design_guidelines(self):
-        """Test the exact bug case: user wants mcp-builder, not design-guidelines.
-        
-        This is the test that would have caught the original bug.
-        """
-        filter_list = ["ComposioHQ/awesome-claude-skills/mcp-builder"]
-        
-        # Should match mcp-builder
-        assert self._matches_filter(
-            "github.com/ComposioHQ/awesome-claude-skills/mcp-builder",
-            filter_list
+        """Apply the production identity check to a dependency string."""
+        identity = DependencyReference.parse(dep_str).get_identity()
+        return identity in _package_filter_identities(only_packages)
+
+    @pytest.mark.parametrize("dep_str,filter_,expected", [
+        # Exact string match
+        pytest.param("owner/repo", ["owner/repo"], True, id="exact"),
+        # Dep has host prefix (the main bug case)
+        pytest.param("github.com/owner/repo", ["owner/repo"], True, id="host_prefix"),
+        # Virtual packages with subdirectory paths
+        pytest.param("github.com/ComposioHQ/awesome-claude-skills/mcp-builder",
+                     ["ComposioHQ/awesome-claude-skills/mcp-builder"], True,
+                     id="virtual_package"),
+        pytest.param("github.com/owner2/repo2", ["owner1/repo1"], False, id="non_match"),
+        # Partial repo names must not cause false positives
+        pytest.param("github.com/owner1/repo1", ["owner2/repo2"], False,
+                     id="partial_repo_name"),
+        # Several packages requested at once
+        pytest.param("github.com/owner1/repo1", ["owner1/repo1", "owner2/repo2"], True,
+                     id="multiple_first"),
+        pytest.param("github.com/owner2/repo2", ["owner1/repo1", "owner2/repo2"], True,
+                     id="multiple_second"),
+        pytest.param("github.com/owner3/repo3", ["owner1/repo1", "owner2/repo2"], False,
+                     id="multiple_none"),
+        # The original bug: user wants mcp-builder, not design-guidelines
+        pytest.param("github.com/ComposioHQ/awesome-claude-skills/mcp-builder",
+                     ["ComposioHQ/awesome-claude-skills/mcp-builder"], True,
+                     id="bug_mcp_builder"),
+        pytest.param("github.com/microsoft/apm-sample-package",
+                     ["ComposioHQ/awesome-claude-skills/mcp-builder"], False,
+                     id="bug_design_guidelines"),
+        # GitHub Enterprise: shorthand resolves to the default host, a different package
+        pytest.param("ghe.company.com/owner/repo", ["ghe.company.com/owner/repo"], True,
+                     id="ghe_full"),
+        pytest.param("ghe.company.com/owner/repo", ["owner/repo"], False,
+                     id="ghe_shorthand"),
+        pytest.param("dev.azure.com/org/project/repo", ["dev.azure.com/org/project/repo"],
+                     True, id="azure_devops"),
+        # ADO specs with _git/ normalize to the same identity
+        pytest.param("dev.azure.com/dmeppiel-org/market-js-app/compliance-rules",
+                     ["dev.azure.com/dmeppiel-org/market-js-app/_git/compliance-rules"],
+                     True, id="azure_devops_git"),
+        # HTTPS and SSH git URLs resolve to the same identity
+        pytest.param("owner/repo", ["https://github.com/owner/repo.git"], True,
+                     id="https_url"),
+        pytest.param("owner/repo", ["git@github.com:owner/repo.git"], True, id="ssh_url"),
+        # Empty filter matches nothing (shouldn't happen in practice)
+        pytest.param("github.com/owner/repo", [], False, id="empty_filter"),
+        # Substring owner names must not match, in either direction
+        pytest.param("github.com/prefix-owner/repo", ["owner/repo"], False,
+                     id="substring_owner"),
+        pytest.param("github.com/owner/repo", ["prefix-owner/repo"], False,
+                     id="substring_owner_reverse"),
+    ])
+    def test_matches(self, dep_str, filter_, expected):
+        """Test a dependency string against a requested-package filter."""
+        assert self._matches_filter(dep_str, filter_) is expected
+
+    def test_unparseable_spec_kept_verbatim(self):
+        """Test specs that fail to parse are kept as-is in the filter."""
+        assert _package_filter_identities(["not a package"]) == {"not a package"}
+
+    def test_repeated_specs_parsed_once(self, monkeypatch):
+        """Duplicate specs collapse before parsing."""
+        calls = []
+        real_parse = DependencyReference.parse
+
+        def counting_parse(spec):
+            calls.append(spec)
+            return real_parse(spec)
+
+        monkeypatch.setattr(DependencyReference, "parse", staticmethod(counting_parse))
+        identities = _package_filter_identities(
+            ["owner/repo", "owner/repo", "github.com/owner/repo"]
         )
-        
-        # Should NOT match design-guidelines
-        assert not self._matches_filter(
-            "github.com/microsoft/apm-sample-package",
-            filter_list
-        )
-
-    def test_github_enterprise_host(self):
-        """Test matching with GitHub Enterprise hosts."""
-        dep_str = "ghe.company.com/owner/repo"
-        assert self._matches_filter(dep_str, ["owner/repo"])
-
-    def test_azure_devops_host(self):
-        """Test matching with Azure DevOps hosts."""
-        dep_str = "dev.azure.com/org/project/repo"
-        # This should match if user passes the full path
-        assert self._matches_filter(dep_str, ["org/project/repo"])
-
-    def test_azure_devops_git_normalization(self):
-        """Test that ADO URLs with _git/ are normalized for matching.
-        
-        User may pass: dev.azure.com/org/project/_git/repo
-        But str(dep) returns: dev.azure.com/org/project/repo (without _git/)
-        The filter should normalize _git/ out before comparing.
-        """
-        dep_str = "dev.azure.com/dmeppiel-org/market-js-app/compliance-rules"
-        # User passes with _git/ but filter should normalize it
-        assert self._matches_filter(
-            dep_str, 
-            ["dev.azure.com/dmeppiel-org/market-js-app/_git/compliance-rules"]
-        )
-        # Also test just the path portion
-        assert self._matches_filter(
-            dep_str,
-            ["dmeppiel-org/market-js-app/_git/compliance-rules"]
-        )
-
-    def test_empty_filter_matches_nothing(self):
-        """Test that empty filter matches nothing."""
-        # This shouldn't happen in practice, but let's be safe
-        assert not self._matches_filter("github.com/owner/repo", [])
-
-    def test_substring_owner_name_does_not_match(self):
-        """Test that substring owner names don't cause false positives.
-        
-        This test catches the bug where endswith(pkg) without path boundary
-        would cause 'github.com/prefix-owner/repo' to match 'owner/repo'.
-        """
-        # User wants 'owner/repo', shouldn't match 'prefix-owner/repo'
-        dep_str = "github.com/prefix-owner/repo"
-        assert not self._matches_filter(dep_str, ["owner/repo"])
-        
-        # Also test the reverse: 'prefix-owner/repo' shouldn't match 'owner/repo'
-        dep_str2 = "github.com/owner/repo"
-        assert not self._matches_filter(dep_str2, ["prefix-owner/repo"])
-
+        assert identities == {"owner/repo"}
+        assert calls == ["owner/repo", "github.com/owner/repo"]
@@ -6,15 +6,48 @@ Tests that:
 - get_dependency_declaration_order() includes transitive deps from lockfile
 """
 
+from functools import lru_cache
 from pathlib import Path
 
-import yaml
+import pytest
 
 from apm_cli.deps.lockfile import (
     LockFile,
     LockedDependency,
 )
 from apm_cli.primitives.discovery import get_dependency_declaration_order
+from apm_cli.utils.yaml_io import yaml_to_str
+
+
+@lru_cache(maxsize=None)
+def _apm_yml_text(deps: tuple) -> str:
+    """Render a minimal apm.yml declaring *deps*, once per distinct list."""
+    return yaml_to_str({
+        "name": "test-project",
+        "version": "1.0.0",
+        "description": "test",
+        "dependencies": {"apm": list(deps)},
+    })
+
+
+@pytest.fixture(scope="session")
+def lockfile_yaml():
+    """Return a helper rendering a lockfile for the given dependencies.
+
+    Each distinct dependency set is serialized once per session; tests write
+    the cached text instead of round-tripping through LockFile.write().
+    """
+    rendered = {}
+
+    def _render(*deps: LockedDependency) -> str:
+        key = tuple(map(repr, deps))
+        if key not in rendered:
+            lockfile = LockFile()
+            lockfile.add_dependencies(deps)
+            rendered[key] = lockfile.to_yaml()
+        return rendered[key]
+
+    return _render
 
 
 class TestGetLockfileInstalledPaths:
@@ -24,44 +57,44 @@ class TestGetLockfileInstalledPaths:
         """Returns empty list when no apm.lock exists."""
         assert LockFile.installed_paths_for_project(tmp_path) == []
 
-    def test_returns_paths_for_regular_packages(self, tmp_path):
-        lockfile = LockFile()
-        lockfile.add_dependency(LockedDependency(repo_url="owner/repo-a", depth=1))
-        lockfile.add_dependency(LockedDependency(repo_url="owner/repo-b", depth=2))
-        lockfile.write(tmp_path / "apm.lock.yaml")
+    def test_returns_paths_for_regular_packages(self, tmp_path, lockfile_yaml):
+        (tmp_path / "apm.lock.yaml").write_text(lockfile_yaml(
+            LockedDependency(repo_url="owner/repo-a", depth=1),
+            LockedDependency(repo_url="owner/repo-b", depth=2),
+        ))
 
         paths = LockFile.installed_paths_for_project(tmp_path)
         assert "owner/repo-a" in paths
         assert "owner/repo-b" in paths
 
-    def test_no_duplicates(self, tmp_path):
-        lockfile = LockFile()
-        lockfile.add_dependency(LockedDependency(repo_url="owner/repo", depth=1))
-        lockfile.write(tmp_path / "apm.lock.yaml")
+    def test_no_duplicates(self, tmp_path, lockfile_yaml):
+        (tmp_path / "apm.lock.yaml").write_text(lockfile_yaml(
+            LockedDependency(repo_url="owner/repo", depth=1),
+        ))
 
         paths = LockFile.installed_paths_for_project(tmp_path)
         assert paths.count("owner/repo") == 1
 
-    def test_ordered_by_depth_then_repo(self, tmp_path):
-        lockfile = LockFile()
-        lockfile.add_dependency(LockedDependency(repo_url="z/deep", depth=3))
-        lockfile.add_dependency(LockedDependency(repo_url="a/direct", depth=1))
-        lockfile.add_dependency(LockedDependency(repo_url="m/mid", depth=2))
-        lockfile.write(tmp_path / "apm.lock.yaml")
+    def test_ordered_by_depth_then_repo(self, tmp_path, lockfile_yaml):
+        (tmp_path / "apm.lock.yaml").write_text(lockfile_yaml(
+            LockedDependency(repo_url="z/deep", depth=3),
+            LockedDependency(repo_url="a/direct", depth=1),
+            LockedDependency(repo_url="m/mid", depth=2),
+        ))
 
         paths = LockFile.installed_paths_for_project(tmp_path)
         assert paths == ["a/direct", "m/mid", "z/deep"]
 
-    def test_virtual_file_package_path(self, tmp_path):
+    def test_virtual_file_package_path(self, tmp_path, lockfile_yaml):
         """Virtual file packages should use the flattened virtual package name."""
-        lockfile = LockFile()
-        lockfile.add_dependency(LockedDependency(
-            repo_url="owner/repo",
-            is_virtual=True,
-            virtual_path="prompts/code-review.prompt.md",
-            depth=1,
+        (tmp_path / "apm.lock.yaml").write_text(lockfile_yaml(
+            LockedDependency(
+                repo_url="owner/repo",
+                is_virtual=True,
+                virtual_path="prompts/code-review.prompt.md",
+                depth=1,
+            ),
         ))
-        lockfile.write(tmp_path / "apm.lock.yaml")
 
         paths = LockFile.installed_paths_for_project(tmp_path)
         # Virtual file: owner/<repo>-<stem> → owner/repo-code-review
@@ -77,55 +110,49 @@ class TestTransitiveDependencyDiscovery:
     """Test that transitive deps from lockfile appear in discovery order."""
 
     def _write_apm_yml(self, path: Path, deps: list):
-        content = {
-            "name": "test-project",
-            "version": "1.0.0",
-            "description": "test",
-            "dependencies": {"apm": deps},
-        }
-        (path / "apm.yml").write_text(yaml.dump(content))
-
-    def test_transitive_deps_appended_after_direct(self, tmp_path):
+        (path / "apm.yml").write_text(_apm_yml_text(tuple(deps)))
+
+    def test_transitive_deps_appended_after_direct(self, tmp_path, lockfile_yaml):
         self._write_apm_yml(tmp_path, ["owner/direct"])
 
-        lockfile = LockFile()
-        lockfile.add_dependency(LockedDependency(repo_url="owner/direct", depth=1))
-        lockfile.add_dependency(LockedDependency(
-            repo_url="owner/transitive", depth=2, resolved_by="owner/direct",
+        (tmp_path / "apm.lock.yaml").write_text(lockfile_yaml(
+            LockedDependency(repo_url="owner/direct", depth=1),
+            LockedDependency(
+                repo_url="owner/transitive", depth=2, resolved_by="owner/direct",
+            ),
         ))
-        lockfile.write(tmp_path / "apm.lock.yaml")
 
         order = get_dependency_declaration_order(str(tmp_path))
         assert order == ["owner/direct", "owner/transitive"]
 
-    def test_direct_deps_not_duplicated(self, tmp_path):
+    def test_direct_deps_not_duplicated(self, tmp_path, lockfile_yaml):
         self._write_apm_yml(tmp_path, ["owner/a", "owner/b"])
 
-        lockfile = LockFile()
-        lockfile.add_dependency(LockedDependency(repo_url="owner/a", depth=1))
-        lockfile.add_dependency(LockedDependency(repo_url="owner/b", depth=1))
-        lockfile.write(tmp_path / "apm.lock.yaml")
+        (tmp_path / "apm.lock.yaml").write_text(lockfile_yaml(
+            LockedDependency(repo_url="owner/a", depth=1),
+            LockedDependency(repo_url="owner/b", depth=1),
+        ))
 
         order = get_dependency_declaration_order(str(tmp_path))
         assert order == ["owner/a", "owner/b"]
 
-    def test_multiple_transitive_levels(self, tmp_path):
+    def test_multiple_transitive_levels(self, tmp_path, lockfile_yaml):
         """Mirrors the exact scenario from the bug report."""
         self._write_apm_yml(tmp_path, ["rieraj/team-cot-agent-instructions"])
 
-        lockfile = LockFile()
-        lockfile.add_dependency(LockedDependency(
-            repo_url="rieraj/team-cot-agent-instructions", depth=1,
-        ))
-        lockfile.add_dependency(LockedDependency(
-            repo_url="rieraj/division-ime-agent-instructions", depth=2,
-            resolved_by="rieraj/team-cot-agent-instructions",
+        (tmp_path / "apm.lock.yaml").write_text(lockfile_yaml(
+            LockedDependency(
+                repo_url="rieraj/team-cot-agent-instructions", depth=1,
+            ),
+            LockedDependency(
+                repo_url="rieraj/division-ime-agent-instructions", depth=2,
+                resolved_by="rieraj/team-cot-agent-instructions",
+            ),
+            LockedDependency(
+                repo_url="rieraj/autodesk-agent-instructions", depth=3,
+                resolved_by="rieraj/division-ime-agent-instructions",
+            ),
         ))
-        lockfile.add_dependency(LockedDependency(
-            repo_url="rieraj/autodesk-agent-instructions", depth=3,
-            resolved_by="rieraj/division-ime-agent-instructions",
-        ))
-        lockfile.write(tmp_path / "apm.lock.yaml")
 
         order = get_dependency_declaration_order(str(tmp_path))
         assert len(order) == 3
@@ -133,6 +160,27 @@ class TestTransitiveDependencyDiscovery:
         assert "rieraj/division-ime-agent-instructions" in order
         assert "rieraj/autodesk-agent-instructions" in order
 
+    def test_order_refreshes_when_lockfile_changes(self, tmp_path, lockfile_yaml):
+        """Cached order is reused until the lockfile is rewritten."""
+        self._write_apm_yml(tmp_path, ["owner/direct"])
+        lock_path = tmp_path / "apm.lock.yaml"
+        lock_path.write_text(lockfile_yaml(
+            LockedDependency(repo_url="owner/direct", depth=1),
+        ))
+
+        first = get_dependency_declaration_order(str(tmp_path))
+        first.append("mutated")
+        assert get_dependency_declaration_order(str(tmp_path)) == ["owner/direct"]
+
+        lock_path.write_text(lockfile_yaml(
+            LockedDependency(repo_url="owner/direct", depth=1),
+            LockedDependency(
+                repo_url="owner/added-later", depth=2, resolved_by="owner/direct",
+            ),
+        ))
+        order = get_dependency_declaration_order(str(tmp_path))
+        assert order == ["owner/direct", "owner/added-later"]
+
     def test_no_lockfile_falls_back_to_direct_only(self, tmp_path):
         self._write_apm_yml(tmp_path, ["owner/only-direct"])
         # No lockfile created
@@ -147,19 +195,12 @@ class TestOrphanDetectionWithTransitiveDeps:
     def _setup_project(self, tmp_path, direct_deps, lockfile_deps, installed_pkgs):
         """Set up a project directory with apm.yml, apm.lock, and apm_modules."""
         # apm.yml
-        content = {
-            "name": "test-project",
-            "version": "1.0.0",
-            "description": "test",
-            "dependencies": {"apm": direct_deps},
-        }
-        (tmp_path / "apm.yml").write_text(yaml.dump(content))
+        (tmp_path / "apm.yml").write_text(_apm_yml_text(tuple(direct_deps)))
 
         # apm.lock
         if lockfile_deps:
             lockfile = LockFile()
-            for dep in lockfile_deps:
-                lockfile.add_dependency(dep)
+            lockfile.add_dependencies(lockfile_deps)
             lockfile.write(tmp_path / "apm.lock.yaml")
 
         # apm_modules directories
@@ -204,6 +245,20 @@ class TestOrphanDetectionWithTransitiveDeps:
         orphans = _check_orphaned_packages()
         assert "owner/stale" in orphans
 
+    def test_orphans_are_sorted(self, tmp_path, monkeypatch):
+        """Orphans come back in a stable, sorted order."""
+        self._setup_project(
+            tmp_path,
+            direct_deps=["owner/kept"],
+            lockfile_deps=None,
+            installed_pkgs=["zeta/stale", "owner/kept", "alpha/stale", "owner/stale"],
+        )
+
+        monkeypatch.chdir(tmp_path)
+
+        from apm_cli.commands._helpers import _check_orphaned_packages
+        assert _check_orphaned_packages() == ["alpha/stale", "owner/stale", "zeta/stale"]
+
     def test_no_lockfile_still_works(self, tmp_path, monkeypatch):
         """Without a lockfile, orphan detection should still work (direct deps only)."""
         self._setup_project(
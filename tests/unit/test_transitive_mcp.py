@@ -1,101 +1,96 @@
 """Tests for transitive MCP dependency collection and deduplication."""
 
+import json
+import logging
 from unittest.mock import MagicMock, patch
 
-import yaml
+import pytest
 
 from apm_cli.integration.mcp_integrator import MCPIntegrator
 from apm_cli.models.apm_package import APMPackage, MCPDependency
 
 
+def _apm_yml(name: str, mcp: list) -> str:
+    """Render a minimal apm.yml; inline MCP dicts become JSON flow mappings."""
+    entries = "".join(f"  - {json.dumps(entry)}\n" for entry in mcp)
+    return f"name: {name}\nversion: 1.0.0\ndependencies:\n  mcp:\n{entries}"
+
+
+def _lock_yml(*deps: dict) -> str:
+    """Render an apm.lock.yaml listing *deps* as JSON flow mappings."""
+    entries = "".join(f"- {json.dumps(dep)}\n" for dep in deps)
+    return f'lockfile_version: "1"\ndependencies:\n{entries}'
+
+
 # ---------------------------------------------------------------------------
 # APMPackage – MCP dict parsing
 # ---------------------------------------------------------------------------
+# Text appended to "name: pkg\nversion: 1.0.0\n" for each MCP section shape.
+_MCP_SECTIONS = {
+    "string": "dependencies:\n  mcp:\n  - ghcr.io/some/server\n",
+    "dict": (
+        "dependencies:\n  mcp:\n"
+        "  - {name: my-srv, type: sse, url: 'https://example.com'}\n"
+    ),
+    "mixed": (
+        "dependencies:\n  mcp:\n  - registry-srv\n"
+        "  - {name: inline-srv, type: http, url: 'https://x'}\n"
+    ),
+    "none": "",
+    "null": "dependencies:\n  mcp: null\n",
+    "empty": "dependencies:\n  mcp: []\n",
+}
+
+
+@pytest.fixture(scope="module")
+def mcp_packages(tmp_path_factory):
+    """Parse one apm.yml per MCP section shape, once for the whole module."""
+    root = tmp_path_factory.mktemp("pkgs")
+    packages = {}
+    for shape, section in _MCP_SECTIONS.items():
+        yml = root / shape / "apm.yml"
+        yml.parent.mkdir()
+        yml.write_text(f"name: pkg\nversion: 1.0.0\n{section}")
+        packages[shape] = APMPackage.from_apm_yml(yml)
+    return packages
+
+
 class TestAPMPackageMCPParsing:
     """Ensure apm_package preserves both string and dict MCP entries."""
 
-    def test_parse_string_mcp_deps(self, tmp_path):
-        """String-only MCP deps parse correctly."""
-        yml = tmp_path / "apm.yml"
-        yml.write_text(yaml.dump({
-            "name": "pkg",
-            "version": "1.0.0",
-            "dependencies": {"mcp": ["ghcr.io/some/server"]},
-        }))
-        pkg = APMPackage.from_apm_yml(yml)
-        deps = pkg.get_mcp_dependencies()
-
-        assert len(deps) == 1
-        assert isinstance(deps[0], MCPDependency)
-        assert deps[0].name == "ghcr.io/some/server"
-        assert deps[0].is_registry_resolved
-
-    def test_parse_dict_mcp_deps(self, tmp_path):
-        """Inline dict MCP deps are preserved."""
-        inline = {"name": "my-srv", "type": "sse", "url": "https://example.com"}
-        yml = tmp_path / "apm.yml"
-        yml.write_text(yaml.dump({
-            "name": "pkg",
-            "version": "1.0.0",
-            "dependencies": {"mcp": [inline]},
-        }))
-        pkg = APMPackage.from_apm_yml(yml)
-        deps = pkg.get_mcp_dependencies()
-
-        assert len(deps) == 1
-        assert isinstance(deps[0], MCPDependency)
-        assert deps[0].name == "my-srv"
-        assert deps[0].transport == "sse"  # legacy 'type' mapped to 'transport'
-
-    def test_parse_mixed_mcp_deps(self, tmp_path):
-        """A mix of string and dict entries is preserved in order."""
-        inline = {"name": "inline-srv", "type": "http", "url": "https://x"}
-        yml = tmp_path / "apm.yml"
-        yml.write_text(yaml.dump({
-            "name": "pkg",
-            "version": "1.0.0",
-            "dependencies": {"mcp": ["registry-srv", inline]},
-        }))
-        pkg = APMPackage.from_apm_yml(yml)
-        deps = pkg.get_mcp_dependencies()
-
-        assert len(deps) == 2
-        assert isinstance(deps[0], MCPDependency)
-        assert deps[0].name == "registry-srv"
-        assert isinstance(deps[1], MCPDependency)
-        assert deps[1].name == "inline-srv"
-
-    def test_no_mcp_section(self, tmp_path):
-        """Missing MCP section returns empty list."""
-        yml = tmp_path / "apm.yml"
-        yml.write_text(yaml.dump({
-            "name": "pkg",
-            "version": "1.0.0",
-        }))
-        pkg = APMPackage.from_apm_yml(yml)
-        assert pkg.get_mcp_dependencies() == []
-
-    def test_mcp_null_returns_empty(self, tmp_path):
-        """mcp: null should return empty list, not raise TypeError."""
-        yml = tmp_path / "apm.yml"
-        yml.write_text(yaml.dump({
-            "name": "pkg",
-            "version": "1.0.0",
-            "dependencies": {"mcp": None},
-        }))
-        pkg = APMPackage.from_apm_yml(yml)
-        assert pkg.get_mcp_dependencies() == []
-
-    def test_mcp_empty_list_returns_empty(self, tmp_path):
-        """mcp: [] should return empty list."""
-        yml = tmp_path / "apm.yml"
-        yml.write_text(yaml.dump({
-            "name": "pkg",
-            "version": "1.0.0",
-            "dependencies": {"mcp": []},
-        }))
-        pkg = APMPackage.from_apm_yml(yml)
-        assert pkg.get_mcp_dependencies() == []
+    @pytest.mark.parametrize(
+        "shape, expected",
+        [
+            pytest.param(
+                "string",
+                [{"name": "ghcr.io/some/server", "is_registry_resolved": True}],
+                id="string",
+            ),
+            # legacy 'type' is mapped to 'transport'
+            pytest.param(
+                "dict", [{"name": "my-srv", "transport": "sse"}], id="dict"
+            ),
+            # string and dict entries keep their order
+            pytest.param(
+                "mixed",
+                [{"name": "registry-srv"}, {"name": "inline-srv"}],
+                id="mixed",
+            ),
+            pytest.param("none", [], id="no-mcp-section"),
+            # mcp: null must not raise TypeError
+            pytest.param("null", [], id="mcp-null"),
+            pytest.param("empty", [], id="mcp-empty-list"),
+        ],
+    )
+    def test_parse_mcp_deps(self, mcp_packages, shape, expected):
+        deps = mcp_packages[shape].get_mcp_dependencies()
+
+        assert all(isinstance(dep, MCPDependency) for dep in deps)
+        assert [
+            {attr: getattr(dep, attr) for attr in want}
+            for dep, want in zip(deps, expected)
+        ] == expected
+        assert len(deps) == len(expected)
 
 
 # ---------------------------------------------------------------------------
@@ -111,11 +106,7 @@ class TestCollectTransitiveMCPDeps:
     def test_collects_string_deps(self, tmp_path):
         pkg_dir = tmp_path / "org" / "pkg-a"
         pkg_dir.mkdir(parents=True)
-        (pkg_dir / "apm.yml").write_text(yaml.dump({
-            "name": "pkg-a",
-            "version": "1.0.0",
-            "dependencies": {"mcp": ["ghcr.io/a/server"]},
-        }))
+        (pkg_dir / "apm.yml").write_text(_apm_yml("pkg-a", ["ghcr.io/a/server"]))
         result = MCPIntegrator.collect_transitive(tmp_path)
         assert len(result) == 1
         assert isinstance(result[0], MCPDependency)
@@ -125,35 +116,44 @@ class TestCollectTransitiveMCPDeps:
         inline = {"name": "kb", "type": "sse", "url": "https://kb.example.com"}
         pkg_dir = tmp_path / "org" / "pkg-b"
         pkg_dir.mkdir(parents=True)
-        (pkg_dir / "apm.yml").write_text(yaml.dump({
-            "name": "pkg-b",
-            "version": "1.0.0",
-            "dependencies": {"mcp": [inline]},
-        }))
+        (pkg_dir / "apm.yml").write_text(_apm_yml("pkg-b", [inline]))
         result = MCPIntegrator.collect_transitive(tmp_path)
         assert len(result) == 1
         assert isinstance(result[0], MCPDependency)
         assert result[0].name == "kb"
 
     def test_collects_from_multiple_packages(self, tmp_path):
+        org_dir = tmp_path / "org"
+        org_dir.mkdir()
         for i, dep in enumerate(["ghcr.io/a/s1", "ghcr.io/b/s2"]):
-            d = tmp_path / "org" / f"pkg-{i}"
-            d.mkdir(parents=True)
-            (d / "apm.yml").write_text(yaml.dump({
-                "name": f"pkg-{i}",
-                "version": "1.0.0",
-                "dependencies": {"mcp": [dep]},
-            }))
+            d = org_dir / f"pkg-{i}"
+            d.mkdir()
+            (d / "apm.yml").write_text(_apm_yml(f"pkg-{i}", [dep]))
         result = MCPIntegrator.collect_transitive(tmp_path)
         assert len(result) == 2
 
-    def test_skips_unparseable_apm_yml(self, tmp_path):
+    def test_fallback_scan_finds_nested_and_skips_symlinked_dirs(self, tmp_path):
+        outer = tmp_path / "org" / "repo"
+        inner = outer / "skills" / "sub"
+        inner.mkdir(parents=True)
+        (outer / "apm.yml").write_text(_apm_yml("repo", ["ghcr.io/a/outer"]))
+        (inner / "apm.yml").write_text(_apm_yml("sub", ["ghcr.io/a/inner"]))
+        try:
+            (tmp_path / "org" / "alias").symlink_to(outer, target_is_directory=True)
+        except OSError:
+            pass
+        result = MCPIntegrator.collect_transitive(tmp_path)
+        assert [d.name for d in result] == ["ghcr.io/a/outer", "ghcr.io/a/inner"]
+
+    def test_skips_unparseable_apm_yml(self, tmp_path, caplog):
         pkg_dir = tmp_path / "org" / "bad-pkg"
         pkg_dir.mkdir(parents=True)
         (pkg_dir / "apm.yml").write_text("invalid: yaml: [")
-        # Should not raise
-        result = MCPIntegrator.collect_transitive(tmp_path)
+        # Should not raise, and the parse failure is still logged
+        with caplog.at_level(logging.DEBUG, logger="apm_cli.integration.mcp_integrator"):
+            result = MCPIntegrator.collect_transitive(tmp_path)
         assert result == []
+        assert "failed to parse apm.yml" in caplog.text
 
     def test_lockfile_scopes_collection_to_locked_packages(self, tmp_path):
         """Lock-file filtering should only collect MCP deps from locked packages."""
@@ -161,27 +161,14 @@ class TestCollectTransitiveMCPDeps:
         # Package that IS in the lock file
         locked_dir = apm_modules / "org" / "locked-pkg"
         locked_dir.mkdir(parents=True)
-        (locked_dir / "apm.yml").write_text(yaml.dump({
-            "name": "locked-pkg",
-            "version": "1.0.0",
-            "dependencies": {"mcp": ["ghcr.io/locked/server"]},
-        }))
+        (locked_dir / "apm.yml").write_text(_apm_yml("locked-pkg", ["ghcr.io/locked/server"]))
         # Package that is NOT in the lock file (orphan)
         orphan_dir = apm_modules / "org" / "orphan-pkg"
         orphan_dir.mkdir(parents=True)
-        (orphan_dir / "apm.yml").write_text(yaml.dump({
-            "name": "orphan-pkg",
-            "version": "1.0.0",
-            "dependencies": {"mcp": ["ghcr.io/orphan/server"]},
-        }))
+        (orphan_dir / "apm.yml").write_text(_apm_yml("orphan-pkg", ["ghcr.io/orphan/server"]))
         # Write lock file referencing only the locked package
         lock_path = tmp_path / "apm.lock.yaml"
-        lock_path.write_text(yaml.dump({
-            "lockfile_version": "1",
-            "dependencies": [
-                {"repo_url": "org/locked-pkg", "host": "github.com"},
-            ],
-        }))
+        lock_path.write_text(_lock_yml({"repo_url": "org/locked-pkg", "host": "github.com"}))
         result = MCPIntegrator.collect_transitive(apm_modules, lock_path)
         assert len(result) == 1
         assert isinstance(result[0], MCPDependency)
@@ -193,26 +180,17 @@ class TestCollectTransitiveMCPDeps:
         # Subdirectory package matching lock entry
         sub_dir = apm_modules / "org" / "monorepo" / "skills" / "azure"
         sub_dir.mkdir(parents=True)
-        (sub_dir / "apm.yml").write_text(yaml.dump({
-            "name": "azure-skill",
-            "version": "1.0.0",
-            "dependencies": {"mcp": [{"name": "learn", "type": "http", "url": "https://learn.example.com"}]},
-        }))
+        (sub_dir / "apm.yml").write_text(_apm_yml("azure-skill", [
+            {"name": "learn", "type": "http", "url": "https://learn.example.com"},
+        ]))
         # Another subdirectory NOT in the lock
         other_dir = apm_modules / "org" / "monorepo" / "skills" / "other"
         other_dir.mkdir(parents=True)
-        (other_dir / "apm.yml").write_text(yaml.dump({
-            "name": "other-skill",
-            "version": "1.0.0",
-            "dependencies": {"mcp": ["ghcr.io/other/server"]},
-        }))
+        (other_dir / "apm.yml").write_text(_apm_yml("other-skill", ["ghcr.io/other/server"]))
         lock_path = tmp_path / "apm.lock.yaml"
-        lock_path.write_text(yaml.dump({
-            "lockfile_version": "1",
-            "dependencies": [
-                {"repo_url": "org/monorepo", "host": "github.com", "virtual_path": "skills/azure"},
-            ],
-        }))
+        lock_path.write_text(_lock_yml(
+            {"repo_url": "org/monorepo", "host": "github.com", "virtual_path": "skills/azure"},
+        ))
         result = MCPIntegrator.collect_transitive(apm_modules, lock_path)
         assert len(result) == 1
         assert isinstance(result[0], MCPDependency)
@@ -223,19 +201,10 @@ class TestCollectTransitiveMCPDeps:
         apm_modules = tmp_path / "apm_modules"
         locked_dir = apm_modules / "org" / "locked-pkg"
         locked_dir.mkdir(parents=True)
-        (locked_dir / "apm.yml").write_text(yaml.dump({
-            "name": "locked-pkg",
-            "version": "1.0.0",
-            "dependencies": {"mcp": ["ghcr.io/locked/server"]},
-        }))
+        (locked_dir / "apm.yml").write_text(_apm_yml("locked-pkg", ["ghcr.io/locked/server"]))
 
         lock_path = tmp_path / "apm.lock.yaml"
-        lock_path.write_text(yaml.dump({
-            "lockfile_version": "1",
-            "dependencies": [
-                {"repo_url": "org/locked-pkg", "host": "github.com"},
-            ],
-        }))
+        lock_path.write_text(_lock_yml({"repo_url": "org/locked-pkg", "host": "github.com"}))
 
         with patch("pathlib.Path.rglob", side_effect=AssertionError("rglob should not be called")):
             result = MCPIntegrator.collect_transitive(apm_modules, lock_path)
@@ -248,11 +217,7 @@ class TestCollectTransitiveMCPDeps:
         apm_modules = tmp_path / "apm_modules"
         pkg_dir = apm_modules / "org" / "pkg-a"
         pkg_dir.mkdir(parents=True)
-        (pkg_dir / "apm.yml").write_text(yaml.dump({
-            "name": "pkg-a",
-            "version": "1.0.0",
-            "dependencies": {"mcp": ["ghcr.io/a/server"]},
-        }))
+        (pkg_dir / "apm.yml").write_text(_apm_yml("pkg-a", ["ghcr.io/a/server"]))
 
         lock_path = tmp_path / "apm.lock.yaml"
         lock_path.write_text("dependencies: [")
@@ -265,14 +230,10 @@ class TestCollectTransitiveMCPDeps:
         """Self-defined servers from transitive packages are skipped without the flag."""
         pkg_dir = tmp_path / "org" / "pkg-a"
         pkg_dir.mkdir(parents=True)
-        (pkg_dir / "apm.yml").write_text(yaml.dump({
-            "name": "pkg-a",
-            "version": "1.0.0",
-            "dependencies": {"mcp": [
+        (pkg_dir / "apm.yml").write_text(_apm_yml("pkg-a", [
                 "ghcr.io/registry/server",
                 {"name": "private-srv", "registry": False, "transport": "http", "url": "https://private.example.com"},
-            ]},
-        }))
+            ]))
         result = MCPIntegrator.collect_transitive(tmp_path)
         assert len(result) == 1
         assert result[0].name == "ghcr.io/registry/server"
@@ -281,14 +242,10 @@ class TestCollectTransitiveMCPDeps:
         """With trust_private=True, self-defined servers are collected."""
         pkg_dir = tmp_path / "org" / "pkg-a"
         pkg_dir.mkdir(parents=True)
-        (pkg_dir / "apm.yml").write_text(yaml.dump({
-            "name": "pkg-a",
-            "version": "1.0.0",
-            "dependencies": {"mcp": [
+        (pkg_dir / "apm.yml").write_text(_apm_yml("pkg-a", [
                 "ghcr.io/registry/server",
                 {"name": "private-srv", "registry": False, "transport": "http", "url": "https://private.example.com"},
-            ]},
-        }))
+            ]))
         result = MCPIntegrator.collect_transitive(tmp_path, trust_private=True)
         assert len(result) == 2
         names = [d.name for d in result]
@@ -299,13 +256,9 @@ class TestCollectTransitiveMCPDeps:
         """Explicitly passing trust_private=False behaves same as default."""
         pkg_dir = tmp_path / "org" / "pkg-a"
         pkg_dir.mkdir(parents=True)
-        (pkg_dir / "apm.yml").write_text(yaml.dump({
-            "name": "pkg-a",
-            "version": "1.0.0",
-            "dependencies": {"mcp": [
+        (pkg_dir / "apm.yml").write_text(_apm_yml("pkg-a", [
                 {"name": "private-srv", "registry": False, "transport": "http", "url": "https://private.example.com"},
-            ]},
-        }))
+            ]))
         result = MCPIntegrator.collect_transitive(tmp_path, trust_private=False)
         assert len(result) == 0
 
@@ -314,21 +267,14 @@ class TestCollectTransitiveMCPDeps:
         apm_modules = tmp_path / "apm_modules"
         pkg_dir = apm_modules / "org" / "direct-pkg"
         pkg_dir.mkdir(parents=True)
-        (pkg_dir / "apm.yml").write_text(yaml.dump({
-            "name": "direct-pkg",
-            "version": "1.0.0",
-            "dependencies": {"mcp": [
+        (pkg_dir / "apm.yml").write_text(_apm_yml("direct-pkg", [
                 {"name": "private-srv", "registry": False,
                  "transport": "http", "url": "https://private.example.com"},
-            ]},
-        }))
+            ]))
         lock_path = tmp_path / "apm.lock.yaml"
-        lock_path.write_text(yaml.dump({
-            "lockfile_version": "1",
-            "dependencies": [
-                {"repo_url": "org/direct-pkg", "host": "github.com", "depth": 1},
-            ],
-        }))
+        lock_path.write_text(_lock_yml(
+            {"repo_url": "org/direct-pkg", "host": "github.com", "depth": 1},
+        ))
         result = MCPIntegrator.collect_transitive(apm_modules, lock_path)
         assert len(result) == 1
         assert result[0].name == "private-srv"
@@ -338,21 +284,14 @@ class TestCollectTransitiveMCPDeps:
         apm_modules = tmp_path / "apm_modules"
         pkg_dir = apm_modules / "org" / "transitive-pkg"
         pkg_dir.mkdir(parents=True)
-        (pkg_dir / "apm.yml").write_text(yaml.dump({
-            "name": "transitive-pkg",
-            "version": "1.0.0",
-            "dependencies": {"mcp": [
+        (pkg_dir / "apm.yml").write_text(_apm_yml("transitive-pkg", [
                 {"name": "private-srv", "registry": False,
                  "transport": "http", "url": "https://private.example.com"},
-            ]},
-        }))
+            ]))
         lock_path = tmp_path / "apm.lock.yaml"
-        lock_path.write_text(yaml.dump({
-            "lockfile_version": "1",
-            "dependencies": [
-                {"repo_url": "org/transitive-pkg", "host": "github.com", "depth": 2},
-            ],
-        }))
+        lock_path.write_text(_lock_yml(
+            {"repo_url": "org/transitive-pkg", "host": "github.com", "depth": 2},
+        ))
         result = MCPIntegrator.collect_transitive(apm_modules, lock_path)
         assert len(result) == 0
 
@@ -361,21 +300,14 @@ class TestCollectTransitiveMCPDeps:
         apm_modules = tmp_path / "apm_modules"
         pkg_dir = apm_modules / "org" / "transitive-pkg"
         pkg_dir.mkdir(parents=True)
-        (pkg_dir / "apm.yml").write_text(yaml.dump({
-            "name": "transitive-pkg",
-            "version": "1.0.0",
-            "dependencies": {"mcp": [
+        (pkg_dir / "apm.yml").write_text(_apm_yml("transitive-pkg", [
                 {"name": "private-srv", "registry": False,
                  "transport": "http", "url": "https://private.example.com"},
-            ]},
-        }))
+            ]))
         lock_path = tmp_path / "apm.lock.yaml"
-        lock_path.write_text(yaml.dump({
-            "lockfile_version": "1",
-            "dependencies": [
-                {"repo_url": "org/transitive-pkg", "host": "github.com", "depth": 2},
-            ],
-        }))
+        lock_path.write_text(_lock_yml(
+            {"repo_url": "org/transitive-pkg", "host": "github.com", "depth": 2},
+        ))
         result = MCPIntegrator.collect_transitive(apm_modules, lock_path, trust_private=True)
         assert len(result) == 1
         assert result[0].name == "private-srv"
@@ -384,15 +316,11 @@ class TestCollectTransitiveMCPDeps:
         """No lockfile → all self-defined skipped (conservative)."""
         pkg_dir = tmp_path / "org" / "pkg-a"
         pkg_dir.mkdir(parents=True)
-        (pkg_dir / "apm.yml").write_text(yaml.dump({
-            "name": "pkg-a",
-            "version": "1.0.0",
-            "dependencies": {"mcp": [
+        (pkg_dir / "apm.yml").write_text(_apm_yml("pkg-a", [
                 "ghcr.io/registry/server",
                 {"name": "private-srv", "registry": False,
                  "transport": "http", "url": "https://private.example.com"},
-            ]},
-        }))
+            ]))
         # No lock_path provided
         result = MCPIntegrator.collect_transitive(tmp_path)
         assert len(result) == 1
@@ -433,6 +361,13 @@ class TestDeduplicateMCPDeps:
         result = MCPIntegrator.deduplicate([d, d])
         assert len(result) == 1
 
+    def test_nameless_dicts_dedupe_by_value(self):
+        """Nameless dicts with nested values dedupe on equality, in order."""
+        a = {"type": "stdio", "command": "srv", "args": ["--port", 1], "env": {"X": "1"}}
+        b = {"type": "stdio", "command": "srv", "args": ["--port", 2], "env": {"X": "1"}}
+        result = MCPIntegrator.deduplicate([a, b, dict(a), {"tags": {"x"}}, {"tags": {"x"}}])
+        assert result == [a, b, {"tags": {"x"}}]
+
     def test_root_deps_take_precedence_over_transitive(self):
         """When root and transitive share a key, the first (root) wins."""
         root = [{"name": "shared", "type": "sse", "url": "https://root-url"}]
@@ -450,65 +385,65 @@ class TestDeduplicateMCPDeps:
 # ---------------------------------------------------------------------------
 class TestInstallMCPDependencies:
 
-    @patch("apm_cli.integration.mcp_integrator._get_console", return_value=None)
-    @patch("apm_cli.registry.operations.MCPServerOperations")
-    def test_already_configured_registry_servers_not_counted_as_new(
-        self, mock_ops_cls, _console
-    ):
-        mock_ops = mock_ops_cls.return_value
-        mock_ops.validate_servers_exist.return_value = (["ghcr.io/org/server"], [])
-        mock_ops.check_servers_needing_installation.return_value = []
+    @pytest.fixture(autouse=True)
+    def _mock_install(self, monkeypatch):
+        """Stub the registry, runtime installer and console for every test."""
+        self.ops = MagicMock()
+        self.install_runtime = MagicMock()
+        monkeypatch.setattr(
+            "apm_cli.registry.operations.MCPServerOperations",
+            MagicMock(return_value=self.ops),
+        )
+        monkeypatch.setattr(
+            MCPIntegrator, "_install_for_runtime", self.install_runtime
+        )
+        monkeypatch.setattr(
+            "apm_cli.integration.mcp_integrator._get_console", lambda: None
+        )
+
+    def _registry_has(self, validated, needing):
+        self.ops.validate_servers_exist.return_value = (validated, [])
+        self.ops.check_servers_needing_installation.return_value = needing
+        self.ops.batch_fetch_server_info.return_value = {n: {} for n in needing}
+        self.ops.collect_environment_variables.return_value = {}
+        self.ops.collect_runtime_variables.return_value = {}
+
+    def test_already_configured_registry_servers_not_counted_as_new(self):
+        self._registry_has(["ghcr.io/org/server"], [])
 
         count = MCPIntegrator.install(["ghcr.io/org/server"], runtime="vscode")
 
         assert count == 0
 
-    @patch("apm_cli.integration.mcp_integrator.MCPIntegrator._install_for_runtime")
-    @patch("apm_cli.integration.mcp_integrator._get_console", return_value=None)
-    @patch("apm_cli.registry.operations.MCPServerOperations")
-    def test_counts_only_newly_configured_registry_servers(
-        self, mock_ops_cls, _console, mock_install_runtime
-    ):
-        mock_ops = mock_ops_cls.return_value
-        mock_ops.validate_servers_exist.return_value = (
-            ["ghcr.io/org/already", "ghcr.io/org/new"],
-            [],
+    def test_counts_only_newly_configured_registry_servers(self):
+        self._registry_has(
+            ["ghcr.io/org/already", "ghcr.io/org/new"], ["ghcr.io/org/new"]
         )
-        mock_ops.check_servers_needing_installation.return_value = ["ghcr.io/org/new"]
-        mock_ops.batch_fetch_server_info.return_value = {"ghcr.io/org/new": {}}
-        mock_ops.collect_environment_variables.return_value = {}
-        mock_ops.collect_runtime_variables.return_value = {}
 
         count = MCPIntegrator.install(
             ["ghcr.io/org/already", "ghcr.io/org/new"], runtime="vscode"
         )
 
         assert count == 1
-        mock_install_runtime.assert_called_once()
+        self.install_runtime.assert_called_once()
 
-    @patch("apm_cli.integration.mcp_integrator.MCPIntegrator._install_for_runtime")
-    @patch("apm_cli.registry.operations.MCPServerOperations")
     def test_mixed_registry_servers_show_already_configured_and_count_only_new(
-        self, mock_ops_cls, mock_install_runtime
+        self, monkeypatch
     ):
         mock_console = MagicMock()
-        mock_ops = mock_ops_cls.return_value
-        mock_ops.validate_servers_exist.return_value = (
-            ["ghcr.io/org/already", "ghcr.io/org/new"],
-            [],
+        monkeypatch.setattr(
+            "apm_cli.integration.mcp_integrator._get_console", lambda: mock_console
+        )
+        self._registry_has(
+            ["ghcr.io/org/already", "ghcr.io/org/new"], ["ghcr.io/org/new"]
         )
-        mock_ops.check_servers_needing_installation.return_value = ["ghcr.io/org/new"]
-        mock_ops.batch_fetch_server_info.return_value = {"ghcr.io/org/new": {}}
-        mock_ops.collect_environment_variables.return_value = {}
-        mock_ops.collect_runtime_variables.return_value = {}
 
-        with patch("apm_cli.integration.mcp_integrator._get_console", return_value=mock_console):
-            count = MCPIntegrator.install(
-                ["ghcr.io/org/already", "ghcr.io/org/new"], runtime="vscode"
-            )
+        count = MCPIntegrator.install(
+            ["ghcr.io/org/already", "ghcr.io/org/new"], runtime="vscode"
+        )
 
         assert count == 1
-        mock_install_runtime.assert_called_once()
+        self.install_runtime.assert_called_once()
         printed_lines = "\n".join(
             str(call.args[0]) for call in mock_console.print.call_args_list if call.args
         )
@@ -21,6 +21,30 @@ from apm_cli.models.apm_package import (
 )
 
 
+_APM_YML_TPL = "name: {name}\nversion: 1.0.0{type_line}\n"
+_PRIMITIVE_TPL = "---\nname: {name}\n---\n# {title}"
+
+
+# Prompt/agent/command integrators only hold a link resolver that is re-created
+# on every integrate call, so one instance of each can serve the whole module.
+# SkillIntegrator tracks per-install skill owners and stays per-test.
+
+
+@pytest.fixture(scope="module")
+def prompt_int() -> PromptIntegrator:
+    return PromptIntegrator()
+
+
+@pytest.fixture(scope="module")
+def agent_int() -> AgentIntegrator:
+    return AgentIntegrator()
+
+
+@pytest.fixture(scope="module")
+def cmd_int() -> CommandIntegrator:
+    return CommandIntegrator()
+
+
 def _make_package(
     tmp_path: Path,
     owner: str,
@@ -36,24 +60,24 @@ def _make_package(
     pkg_path.mkdir(parents=True, exist_ok=True)
 
     type_line = f"\ntype: {pkg_type.value}" if pkg_type else ""
-    (pkg_path / "apm.yml").write_text(
-        f"name: {name}\nversion: 1.0.0{type_line}\n"
+    (pkg_path / "apm.yml").write_bytes(
+        _APM_YML_TPL.format(name=name, type_line=type_line).encode()
     )
 
     if prompts:
         prompts_dir = pkg_path / ".apm" / "prompts"
         prompts_dir.mkdir(parents=True, exist_ok=True)
         for fname, content in prompts.items():
-            (prompts_dir / fname).write_text(content)
+            (prompts_dir / fname).write_bytes(content.encode())
 
     if agents:
         agents_dir = pkg_path / ".apm" / "agents"
         agents_dir.mkdir(parents=True, exist_ok=True)
         for fname, content in agents.items():
-            (agents_dir / fname).write_text(content)
+            (agents_dir / fname).write_bytes(content.encode())
 
     if skill_md is not None:
-        (pkg_path / "SKILL.md").write_text(skill_md)
+        (pkg_path / "SKILL.md").write_bytes(skill_md.encode())
 
     pkg = APMPackage(
         name=name,
@@ -88,22 +112,26 @@ def _make_package(
 class TestUninstallPreservesOtherPackagePrompts:
     """Sync with managed_files removes all deployed files, re-integrate remaining → only remaining survives."""
 
-    def test_uninstall_preserves_other_package_prompts(self, tmp_path: Path):
+    def test_uninstall_preserves_other_package_prompts(
+        self, tmp_path: Path, prompt_int: PromptIntegrator
+    ):
         project_root = tmp_path
         (project_root / ".github").mkdir()
 
         # Two packages, each with a prompt
         pkg_a = _make_package(
             tmp_path, "owner", "pkg-a",
-            prompts={"review.prompt.md": "---\nname: review\n---\n# Review A"},
+            prompts={
+                "review.prompt.md": _PRIMITIVE_TPL.format(name="review", title="Review A"),
+            },
         )
         pkg_b = _make_package(
             tmp_path, "owner", "pkg-b",
-            prompts={"lint.prompt.md": "---\nname: lint\n---\n# Lint B"},
+            prompts={
+                "lint.prompt.md": _PRIMITIVE_TPL.format(name="lint", title="Lint B"),
+            },
         )
 
-        prompt_int = PromptIntegrator()
-
         # Integrate both
         prompt_int.integrate_package_prompts(pkg_a, project_root)
         prompt_int.integrate_package_prompts(pkg_b, project_root)
@@ -140,21 +168,25 @@ class TestUninstallPreservesOtherPackagePrompts:
 class TestUninstallPreservesOtherPackageAgents:
     """Sync with managed_files removes all deployed files, re-integrate remaining → only remaining survives."""
 
-    def test_uninstall_preserves_other_package_agents(self, tmp_path: Path):
+    def test_uninstall_preserves_other_package_agents(
+        self, tmp_path: Path, agent_int: AgentIntegrator
+    ):
         project_root = tmp_path
         (project_root / ".github").mkdir()
 
         pkg_a = _make_package(
             tmp_path, "owner", "pkg-a",
-            agents={"security.agent.md": "---\nname: security\n---\n# Security A"},
+            agents={
+                "security.agent.md": _PRIMITIVE_TPL.format(name="security", title="Security A"),
+            },
         )
         pkg_b = _make_package(
             tmp_path, "owner", "pkg-b",
-            agents={"planner.agent.md": "---\nname: planner\n---\n# Planner B"},
+            agents={
+                "planner.agent.md": _PRIMITIVE_TPL.format(name="planner", title="Planner B"),
+            },
         )
 
-        agent_int = AgentIntegrator()
-
         agent_int.integrate_package_agents(pkg_a, project_root)
         agent_int.integrate_package_agents(pkg_b, project_root)
 
@@ -239,7 +271,13 @@ class TestUninstallPreservesOtherPackageSkills:
 class TestUninstallPreservesUserFiles:
     """Nuke only touches *-apm.* files; user-created files survive."""
 
-    def test_uninstall_preserves_user_files(self, tmp_path: Path):
+    def test_uninstall_preserves_user_files(
+        self,
+        tmp_path: Path,
+        prompt_int: PromptIntegrator,
+        agent_int: AgentIntegrator,
+        cmd_int: CommandIntegrator,
+    ):
         project_root = tmp_path
         (project_root / ".github").mkdir()
 
@@ -268,9 +306,9 @@ class TestUninstallPreservesUserFiles:
 
         dummy_pkg = APMPackage(name="root", version="0.0.0")
 
-        PromptIntegrator().sync_integration(dummy_pkg, project_root)
-        AgentIntegrator().sync_integration(dummy_pkg, project_root)
-        CommandIntegrator().sync_integration(dummy_pkg, project_root)
+        prompt_int.sync_integration(dummy_pkg, project_root)
+        agent_int.sync_integration(dummy_pkg, project_root)
+        cmd_int.sync_integration(dummy_pkg, project_root)
 
         # APM files gone
         assert not (prompts_dir / "pkg-review-apm.prompt.md").exists()
@@ -294,20 +332,26 @@ class TestUninstallPreservesUserFiles:
 class TestUninstallLastPackageLeavesCleanDirs:
     """Installing one package and uninstalling it removes all deployed artifacts."""
 
-    def test_uninstall_last_package_leaves_clean_dirs(self, tmp_path: Path):
+    def test_uninstall_last_package_leaves_clean_dirs(
+        self,
+        tmp_path: Path,
+        prompt_int: PromptIntegrator,
+        agent_int: AgentIntegrator,
+        cmd_int: CommandIntegrator,
+    ):
         project_root = tmp_path
         (project_root / ".github").mkdir()
 
         pkg = _make_package(
             tmp_path, "owner", "only-pkg",
-            prompts={"guide.prompt.md": "---\nname: guide\n---\n# Guide"},
-            agents={"helper.agent.md": "---\nname: helper\n---\n# Helper"},
+            prompts={
+                "guide.prompt.md": _PRIMITIVE_TPL.format(name="guide", title="Guide"),
+            },
+            agents={
+                "helper.agent.md": _PRIMITIVE_TPL.format(name="helper", title="Helper"),
+            },
         )
 
-        prompt_int = PromptIntegrator()
-        agent_int = AgentIntegrator()
-        cmd_int = CommandIntegrator()
-
         prompt_int.integrate_package_prompts(pkg, project_root)
         agent_int.integrate_package_agents(pkg, project_root)
         cmd_int.integrate_package_commands(pkg, project_root)
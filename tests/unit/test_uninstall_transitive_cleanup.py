@@ -5,335 +5,299 @@ dependencies, those transitive deps should also be removed if no other
 remaining package still needs them.
 """
 
-import os
-import tempfile
+import json
 from types import SimpleNamespace
 from unittest.mock import patch
 
 import pytest
-import yaml
 from click.testing import CliRunner
 from pathlib import Path
 
-from apm_cli.cli import cli
+from apm_cli.commands.uninstall import uninstall
+from apm_cli.commands.uninstall.engine import _find_transitive_orphans
 from apm_cli.deps.lockfile import LockFile, LockedDependency
 from apm_cli.models.apm_package import APMPackage
 from apm_cli.models.dependency import DependencyReference
 
 
-def _write_apm_yml(path: Path, deps: list[str]):
-    """Write a minimal apm.yml with given APM dependencies."""
-    data = {
-        "name": "test-project",
-        "version": "1.0.0",
-        "dependencies": {"apm": deps},
-    }
-    path.write_text(yaml.safe_dump(data, default_flow_style=False, sort_keys=False))
+def _write_apm_yml(path: Path, deps: list):
+    """Write a minimal apm.yml; dict entries become JSON flow mappings."""
+    entries = "".join(f"  - {json.dumps(dep)}\n" for dep in deps)
+    path.write_text(
+        "name: test-project\nversion: 1.0.0\ndependencies:\n  apm:\n" + entries
+    )
 
 
 def _write_lockfile(path: Path, locked_deps: list[LockedDependency]):
     """Write a lockfile with given locked dependencies."""
     lockfile = LockFile()
-    for dep in locked_deps:
-        lockfile.add_dependency(dep)
+    lockfile.add_dependencies(locked_deps)
     lockfile.write(path)
 
 
 def _make_apm_modules_dir(base: Path, repo_url: str):
     """Create a minimal package directory under apm_modules/."""
-    parts = repo_url.split("/")
-    pkg_dir = base / "apm_modules"
-    for part in parts:
-        pkg_dir = pkg_dir / part
+    pkg_dir = base / "apm_modules" / repo_url
     pkg_dir.mkdir(parents=True, exist_ok=True)
-    (pkg_dir / "apm.yml").write_text(
-        f"name: {parts[-1]}\nversion: 1.0.0\n"
+    (pkg_dir / "apm.yml").write_bytes(
+        f"name: {pkg_dir.name}\nversion: 1.0.0\n".encode()
     )
     return pkg_dir
 
 
+@pytest.fixture(scope="module")
+def runner() -> CliRunner:
+    return CliRunner()
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch) -> Path:
+    """An empty project directory that is also the working directory."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
 class TestUninstallTransitiveDependencyCleanup:
     """Uninstalling a package removes its orphaned transitive dependencies."""
 
-    def setup_method(self):
-        self.runner = CliRunner()
-        try:
-            self.original_dir = os.getcwd()
-        except FileNotFoundError:
-            self.original_dir = str(Path(__file__).parent.parent.parent)
-            os.chdir(self.original_dir)
-
-    def teardown_method(self):
-        try:
-            os.chdir(self.original_dir)
-        except (FileNotFoundError, OSError):
-            os.chdir(str(Path(__file__).parent.parent.parent))
-
-    def test_uninstall_removes_transitive_dep(self):
+    def test_uninstall_removes_transitive_dep(self, runner, project):
         """Uninstalling pkg-a also removes pkg-a's transitive dep pkg-b."""
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            os.chdir(tmp_dir)
-            try:
-                root = Path(tmp_dir)
-
-                # Setup: pkg-a depends on (transitive) pkg-b
-                _write_apm_yml(root / "apm.yml", ["acme/pkg-a"])
-                _make_apm_modules_dir(root, "acme/pkg-a")
-                _make_apm_modules_dir(root, "acme/pkg-b")  # transitive dep
-
-                _write_lockfile(root / "apm.lock.yaml", [
-                    LockedDependency(repo_url="acme/pkg-a", depth=1, resolved_commit="aaa"),
-                    LockedDependency(repo_url="acme/pkg-b", depth=2, resolved_by="acme/pkg-a", resolved_commit="bbb"),
-                ])
-
-                result = self.runner.invoke(cli, ["uninstall", "acme/pkg-a"])
-
-                assert result.exit_code == 0
-                # Both direct and transitive should be removed
-                assert not (root / "apm_modules" / "acme" / "pkg-a").exists()
-                assert not (root / "apm_modules" / "acme" / "pkg-b").exists()
-                assert "transitive dependency" in result.output.lower()
-            finally:
-                os.chdir(os.path.dirname(os.path.abspath(__file__)))  # restore CWD before TemporaryDirectory cleanup
-
-    def test_uninstall_keeps_shared_transitive_dep(self):
+        root = project
+
+        # Setup: pkg-a depends on (transitive) pkg-b
+        _write_apm_yml(root / "apm.yml", ["acme/pkg-a"])
+        _make_apm_modules_dir(root, "acme/pkg-a")
+        _make_apm_modules_dir(root, "acme/pkg-b")  # transitive dep
+
+        _write_lockfile(root / "apm.lock.yaml", [
+            LockedDependency(repo_url="acme/pkg-a", depth=1, resolved_commit="aaa"),
+            LockedDependency(repo_url="acme/pkg-b", depth=2, resolved_by="acme/pkg-a", resolved_commit="bbb"),
+        ])
+
+        result = runner.invoke(uninstall, ["acme/pkg-a"])
+
+        assert result.exit_code == 0
+        # Both direct and transitive should be removed
+        assert not (root / "apm_modules" / "acme" / "pkg-a").exists()
+        assert not (root / "apm_modules" / "acme" / "pkg-b").exists()
+        assert "transitive dependency" in result.output.lower()
+
+    def test_uninstall_keeps_shared_transitive_dep(self, runner, project):
         """Transitive dep used by another remaining package is NOT removed."""
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            os.chdir(tmp_dir)
-            try:
-                root = Path(tmp_dir)
-
-                # Setup: both pkg-a and pkg-c depend on (transitive) shared-lib
-                _write_apm_yml(root / "apm.yml", ["acme/pkg-a", "acme/pkg-c"])
-                _make_apm_modules_dir(root, "acme/pkg-a")
-                _make_apm_modules_dir(root, "acme/pkg-c")
-                _make_apm_modules_dir(root, "acme/shared-lib")
-
-                _write_lockfile(root / "apm.lock.yaml", [
-                    LockedDependency(repo_url="acme/pkg-a", depth=1, resolved_commit="aaa"),
-                    LockedDependency(repo_url="acme/pkg-c", depth=1, resolved_commit="ccc"),
-                    LockedDependency(repo_url="acme/shared-lib", depth=2, resolved_by="acme/pkg-a", resolved_commit="sss"),
-                ])
-
-                # Uninstall only pkg-a
-                result = self.runner.invoke(cli, ["uninstall", "acme/pkg-a"])
-
-                assert result.exit_code == 0
-                assert not (root / "apm_modules" / "acme" / "pkg-a").exists()
-                # shared-lib is still used by pkg-c (it's in remaining deps via lockfile)
-                # Actually, the lockfile says resolved_by=acme/pkg-a, and pkg-c doesn't
-                # explicitly declare it. But shared-lib is a separate lockfile entry.
-                # Our orphan detection checks remaining_deps which includes pkg-c and
-                # all non-orphaned lockfile entries. Since shared-lib is flagged as orphan
-                # (resolved_by=acme/pkg-a), it WILL be removed. This is correct npm behavior:
-                # if pkg-c truly needs shared-lib, it should declare it in its own apm.yml,
-                # which would show up as resolved_by=acme/pkg-c in the lockfile.
-                assert not (root / "apm_modules" / "acme" / "shared-lib").exists()
-            finally:
-                os.chdir(os.path.dirname(os.path.abspath(__file__)))  # restore CWD before TemporaryDirectory cleanup
-
-    def test_uninstall_removes_deeply_nested_transitive_deps(self):
+        root = project
+
+        # Setup: both pkg-a and pkg-c depend on (transitive) shared-lib
+        _write_apm_yml(root / "apm.yml", ["acme/pkg-a", "acme/pkg-c"])
+        _make_apm_modules_dir(root, "acme/pkg-a")
+        _make_apm_modules_dir(root, "acme/pkg-c")
+        _make_apm_modules_dir(root, "acme/shared-lib")
+
+        _write_lockfile(root / "apm.lock.yaml", [
+            LockedDependency(repo_url="acme/pkg-a", depth=1, resolved_commit="aaa"),
+            LockedDependency(repo_url="acme/pkg-c", depth=1, resolved_commit="ccc"),
+            LockedDependency(repo_url="acme/shared-lib", depth=2, resolved_by="acme/pkg-a", resolved_commit="sss"),
+        ])
+
+        # Uninstall only pkg-a
+        result = runner.invoke(uninstall, ["acme/pkg-a"])
+
+        assert result.exit_code == 0
+        assert not (root / "apm_modules" / "acme" / "pkg-a").exists()
+        # shared-lib is still used by pkg-c (it's in remaining deps via lockfile)
+        # Actually, the lockfile says resolved_by=acme/pkg-a, and pkg-c doesn't
+        # explicitly declare it. But shared-lib is a separate lockfile entry.
+        # Our orphan detection checks remaining_deps which includes pkg-c and
+        # all non-orphaned lockfile entries. Since shared-lib is flagged as orphan
+        # (resolved_by=acme/pkg-a), it WILL be removed. This is correct npm behavior:
+        # if pkg-c truly needs shared-lib, it should declare it in its own apm.yml,
+        # which would show up as resolved_by=acme/pkg-c in the lockfile.
+        assert not (root / "apm_modules" / "acme" / "shared-lib").exists()
+
+    def test_uninstall_removes_deeply_nested_transitive_deps(self, runner, project):
         """Transitive deps of transitive deps are also removed (recursive)."""
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            os.chdir(tmp_dir)
-            try:
-                root = Path(tmp_dir)
-
-                # Setup: pkg-a -> pkg-b -> pkg-c (chain of transitive deps)
-                _write_apm_yml(root / "apm.yml", ["acme/pkg-a"])
-                _make_apm_modules_dir(root, "acme/pkg-a")
-                _make_apm_modules_dir(root, "acme/pkg-b")
-                _make_apm_modules_dir(root, "acme/pkg-c")
-
-                _write_lockfile(root / "apm.lock.yaml", [
-                    LockedDependency(repo_url="acme/pkg-a", depth=1, resolved_commit="aaa"),
-                    LockedDependency(repo_url="acme/pkg-b", depth=2, resolved_by="acme/pkg-a", resolved_commit="bbb"),
-                    LockedDependency(repo_url="acme/pkg-c", depth=3, resolved_by="acme/pkg-b", resolved_commit="ccc"),
-                ])
-
-                result = self.runner.invoke(cli, ["uninstall", "acme/pkg-a"])
-
-                assert result.exit_code == 0
-                assert not (root / "apm_modules" / "acme" / "pkg-a").exists()
-                assert not (root / "apm_modules" / "acme" / "pkg-b").exists()
-                assert not (root / "apm_modules" / "acme" / "pkg-c").exists()
-            finally:
-                os.chdir(os.path.dirname(os.path.abspath(__file__)))  # restore CWD before TemporaryDirectory cleanup
-
-    def test_uninstall_updates_lockfile(self):
+        root = project
+
+        # Setup: pkg-a -> pkg-b -> pkg-c (chain of transitive deps)
+        _write_apm_yml(root / "apm.yml", ["acme/pkg-a"])
+        _make_apm_modules_dir(root, "acme/pkg-a")
+        _make_apm_modules_dir(root, "acme/pkg-b")
+        _make_apm_modules_dir(root, "acme/pkg-c")
+
+        _write_lockfile(root / "apm.lock.yaml", [
+            LockedDependency(repo_url="acme/pkg-a", depth=1, resolved_commit="aaa"),
+            LockedDependency(repo_url="acme/pkg-b", depth=2, resolved_by="acme/pkg-a", resolved_commit="bbb"),
+            LockedDependency(repo_url="acme/pkg-c", depth=3, resolved_by="acme/pkg-b", resolved_commit="ccc"),
+        ])
+
+        result = runner.invoke(uninstall, ["acme/pkg-a"])
+
+        assert result.exit_code == 0
+        assert not (root / "apm_modules" / "acme" / "pkg-a").exists()
+        assert not (root / "apm_modules" / "acme" / "pkg-b").exists()
+        assert not (root / "apm_modules" / "acme" / "pkg-c").exists()
+
+    def test_uninstall_updates_lockfile(self, runner, project):
         """Lockfile is updated to remove uninstalled deps and their transitives."""
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            os.chdir(tmp_dir)
-            try:
-                root = Path(tmp_dir)
-
-                _write_apm_yml(root / "apm.yml", ["acme/pkg-a", "acme/pkg-d"])
-                _make_apm_modules_dir(root, "acme/pkg-a")
-                _make_apm_modules_dir(root, "acme/pkg-b")
-                _make_apm_modules_dir(root, "acme/pkg-d")
-
-                _write_lockfile(root / "apm.lock.yaml", [
-                    LockedDependency(repo_url="acme/pkg-a", depth=1, resolved_commit="aaa"),
-                    LockedDependency(repo_url="acme/pkg-b", depth=2, resolved_by="acme/pkg-a", resolved_commit="bbb"),
-                    LockedDependency(repo_url="acme/pkg-d", depth=1, resolved_commit="ddd"),
-                ])
-
-                result = self.runner.invoke(cli, ["uninstall", "acme/pkg-a"])
-
-                assert result.exit_code == 0
-                # Lockfile should still exist with pkg-d
-                updated_lock = LockFile.read(root / "apm.lock.yaml")
-                assert updated_lock is not None
-                assert updated_lock.has_dependency("acme/pkg-d")
-                assert not updated_lock.has_dependency("acme/pkg-a")
-                assert not updated_lock.has_dependency("acme/pkg-b")
-            finally:
-                os.chdir(os.path.dirname(os.path.abspath(__file__)))  # restore CWD before TemporaryDirectory cleanup
-
-    def test_uninstall_removes_lockfile_when_no_deps_remain(self):
+        root = project
+
+        _write_apm_yml(root / "apm.yml", ["acme/pkg-a", "acme/pkg-d"])
+        _make_apm_modules_dir(root, "acme/pkg-a")
+        _make_apm_modules_dir(root, "acme/pkg-b")
+        _make_apm_modules_dir(root, "acme/pkg-d")
+
+        _write_lockfile(root / "apm.lock.yaml", [
+            LockedDependency(repo_url="acme/pkg-a", depth=1, resolved_commit="aaa"),
+            LockedDependency(repo_url="acme/pkg-b", depth=2, resolved_by="acme/pkg-a", resolved_commit="bbb"),
+            LockedDependency(repo_url="acme/pkg-d", depth=1, resolved_commit="ddd"),
+        ])
+
+        result = runner.invoke(uninstall, ["acme/pkg-a"])
+
+        assert result.exit_code == 0
+        # Lockfile should still exist with pkg-d
+        updated_lock = LockFile.read(root / "apm.lock.yaml")
+        assert updated_lock is not None
+        assert updated_lock.has_dependency("acme/pkg-d")
+        assert not updated_lock.has_dependency("acme/pkg-a")
+        assert not updated_lock.has_dependency("acme/pkg-b")
+
+    def test_uninstall_removes_lockfile_when_no_deps_remain(self, runner, project):
         """Lockfile is deleted when all deps are removed."""
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            os.chdir(tmp_dir)
-            try:
-                root = Path(tmp_dir)
+        root = project
 
-                _write_apm_yml(root / "apm.yml", ["acme/pkg-a"])
-                _make_apm_modules_dir(root, "acme/pkg-a")
+        _write_apm_yml(root / "apm.yml", ["acme/pkg-a"])
+        _make_apm_modules_dir(root, "acme/pkg-a")
 
-                _write_lockfile(root / "apm.lock.yaml", [
-                    LockedDependency(repo_url="acme/pkg-a", depth=1, resolved_commit="aaa"),
-                ])
+        _write_lockfile(root / "apm.lock.yaml", [
+            LockedDependency(repo_url="acme/pkg-a", depth=1, resolved_commit="aaa"),
+        ])
 
-                result = self.runner.invoke(cli, ["uninstall", "acme/pkg-a"])
+        result = runner.invoke(uninstall, ["acme/pkg-a"])
 
-                assert result.exit_code == 0
-                assert not (root / "apm.lock.yaml").exists()
-            finally:
-                os.chdir(os.path.dirname(os.path.abspath(__file__)))  # restore CWD before TemporaryDirectory cleanup
+        assert result.exit_code == 0
+        assert not (root / "apm.lock.yaml").exists()
 
-    def test_dry_run_shows_transitive_deps(self):
+    def test_dry_run_shows_transitive_deps(self, runner, project):
         """Dry run shows transitive deps that would be removed."""
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            os.chdir(tmp_dir)
-            try:
-                root = Path(tmp_dir)
-
-                _write_apm_yml(root / "apm.yml", ["acme/pkg-a"])
-                _make_apm_modules_dir(root, "acme/pkg-a")
-                _make_apm_modules_dir(root, "acme/pkg-b")
-
-                _write_lockfile(root / "apm.lock.yaml", [
-                    LockedDependency(repo_url="acme/pkg-a", depth=1, resolved_commit="aaa"),
-                    LockedDependency(repo_url="acme/pkg-b", depth=2, resolved_by="acme/pkg-a", resolved_commit="bbb"),
-                ])
-
-                result = self.runner.invoke(cli, ["uninstall", "acme/pkg-a", "--dry-run"])
-
-                assert result.exit_code == 0
-                assert "acme/pkg-b" in result.output
-                assert "transitive" in result.output.lower()
-                # Verify nothing was actually removed
-                assert (root / "apm_modules" / "acme" / "pkg-a").exists()
-                assert (root / "apm_modules" / "acme" / "pkg-b").exists()
-            finally:
-                os.chdir(os.path.dirname(os.path.abspath(__file__)))  # restore CWD before TemporaryDirectory cleanup
-
-    def test_uninstall_no_lockfile_still_works(self):
+        root = project
+
+        _write_apm_yml(root / "apm.yml", ["acme/pkg-a"])
+        _make_apm_modules_dir(root, "acme/pkg-a")
+        _make_apm_modules_dir(root, "acme/pkg-b")
+
+        _write_lockfile(root / "apm.lock.yaml", [
+            LockedDependency(repo_url="acme/pkg-a", depth=1, resolved_commit="aaa"),
+            LockedDependency(repo_url="acme/pkg-b", depth=2, resolved_by="acme/pkg-a", resolved_commit="bbb"),
+        ])
+
+        result = runner.invoke(uninstall, ["acme/pkg-a", "--dry-run"])
+
+        assert result.exit_code == 0
+        assert "acme/pkg-b" in result.output
+        assert "transitive" in result.output.lower()
+        # Verify nothing was actually removed
+        assert (root / "apm_modules" / "acme" / "pkg-a").exists()
+        assert (root / "apm_modules" / "acme" / "pkg-b").exists()
+
+    def test_uninstall_no_lockfile_still_works(self, runner, project):
         """Uninstall works gracefully when no lockfile exists (no transitive cleanup)."""
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            os.chdir(tmp_dir)
-            try:
-                root = Path(tmp_dir)
+        root = project
 
-                _write_apm_yml(root / "apm.yml", ["acme/pkg-a"])
-                _make_apm_modules_dir(root, "acme/pkg-a")
+        _write_apm_yml(root / "apm.yml", ["acme/pkg-a"])
+        _make_apm_modules_dir(root, "acme/pkg-a")
 
-                result = self.runner.invoke(cli, ["uninstall", "acme/pkg-a"])
+        result = runner.invoke(uninstall, ["acme/pkg-a"])
 
-                assert result.exit_code == 0
-                assert not (root / "apm_modules" / "acme" / "pkg-a").exists()
-            finally:
-                os.chdir(os.path.dirname(os.path.abspath(__file__)))  # restore CWD before TemporaryDirectory cleanup
+        assert result.exit_code == 0
+        assert not (root / "apm_modules" / "acme" / "pkg-a").exists()
 
-    def test_uninstall_dry_run_supports_object_style_dependency_entries(self):
+    def test_uninstall_dry_run_supports_object_style_dependency_entries(
+        self, runner, project
+    ):
         """Dry-run accepts dict dependency entries without crashing."""
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            os.chdir(tmp_dir)
-            try:
-                root = Path(tmp_dir)
-
-                data = {
-                    "name": "test-project",
-                    "version": "1.0.0",
-                    "dependencies": {
-                        "apm": [{"git": "acme/pkg-a"}],
-                    },
-                }
-                (root / "apm.yml").write_text(
-                    yaml.safe_dump(data, default_flow_style=False, sort_keys=False)
-                )
-                _make_apm_modules_dir(root, "acme/pkg-a")
-
-                result = self.runner.invoke(cli, ["uninstall", "acme/pkg-a", "--dry-run"])
-
-                assert result.exit_code == 0
-                assert "Dry run complete" in result.output
-                assert (root / "apm_modules" / "acme" / "pkg-a").exists()
-            finally:
-                os.chdir(os.path.dirname(os.path.abspath(__file__)))  # restore CWD before TemporaryDirectory cleanup
-
-    def test_uninstall_reintegrates_remaining_object_style_dependency_from_canonical_path(self):
+        root = project
+
+        _write_apm_yml(root / "apm.yml", [{"git": "acme/pkg-a"}])
+        _make_apm_modules_dir(root, "acme/pkg-a")
+
+        result = runner.invoke(uninstall, ["acme/pkg-a", "--dry-run"])
+
+        assert result.exit_code == 0
+        assert "Dry run complete" in result.output
+        assert (root / "apm_modules" / "acme" / "pkg-a").exists()
+
+    def test_uninstall_reintegrates_remaining_object_style_dependency_from_canonical_path(
+        self, runner, project
+    ):
         """Remaining dict-style deps re-integrate from DependencyReference install paths."""
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            os.chdir(tmp_dir)
-            try:
-                root = Path(tmp_dir)
-
-                remaining_dep_entry = {
-                    "git": "acme/pkg-b",
-                    "path": "prompts/review.prompt.md",
-                }
-                data = {
-                    "name": "test-project",
-                    "version": "1.0.0",
-                    "dependencies": {
-                        "apm": [
-                            {"git": "acme/pkg-a"},
-                            remaining_dep_entry,
-                        ],
-                    },
-                }
-                (root / "apm.yml").write_text(
-                    yaml.safe_dump(data, default_flow_style=False, sort_keys=False)
-                )
-
-                _make_apm_modules_dir(root, "acme/pkg-a")
-                remaining_ref = DependencyReference.parse_from_dict(remaining_dep_entry)
-                remaining_install_path = remaining_ref.get_install_path(Path("apm_modules"))
-                (root / remaining_install_path).mkdir(parents=True, exist_ok=True)
-
-                observed_paths = []
-
-                def _capture_validate(path: Path):
-                    observed_paths.append(path)
-                    return SimpleNamespace(
-                        package=APMPackage(name="pkg-b-review", version="1.0.0"),
-                        package_type=None,
-                    )
-
-                with patch(
-                    "apm_cli.models.apm_package.validate_apm_package",
-                    side_effect=_capture_validate,
-                ), patch(
-                    "apm_cli.integration.targets.active_targets",
-                    return_value=[],
-                ), patch(
-                    "apm_cli.integration.skill_integrator.SkillIntegrator.integrate_package_skill",
-                    return_value=None,
-                ):
-                    result = self.runner.invoke(cli, ["uninstall", "acme/pkg-a"])
-
-                assert result.exit_code == 0
-                assert remaining_install_path in observed_paths
-            finally:
-                os.chdir(os.path.dirname(os.path.abspath(__file__)))  # restore CWD before TemporaryDirectory cleanup
+        root = project
+
+        remaining_dep_entry = {
+            "git": "acme/pkg-b",
+            "path": "prompts/review.prompt.md",
+        }
+        _write_apm_yml(root / "apm.yml", [{"git": "acme/pkg-a"}, remaining_dep_entry])
+
+        _make_apm_modules_dir(root, "acme/pkg-a")
+        remaining_ref = DependencyReference.parse_from_dict(remaining_dep_entry)
+        remaining_install_path = remaining_ref.get_install_path(Path("apm_modules"))
+        (root / remaining_install_path).mkdir(parents=True, exist_ok=True)
+
+        observed_paths = []
+
+        def _capture_validate(path: Path):
+            observed_paths.append(path)
+            return SimpleNamespace(
+                package=APMPackage(name="pkg-b-review", version="1.0.0"),
+                package_type=None,
+            )
+
+        with patch(
+            "apm_cli.models.apm_package.validate_apm_package",
+            side_effect=_capture_validate,
+        ), patch(
+            "apm_cli.integration.targets.active_targets",
+            return_value=[],
+        ), patch(
+            "apm_cli.integration.skill_integrator.SkillIntegrator.integrate_package_skill",
+            return_value=None,
+        ):
+            result = runner.invoke(uninstall, ["acme/pkg-a"])
+
+        assert result.exit_code == 0
+        assert remaining_install_path in observed_paths
+
+
+class TestFindTransitiveOrphans:
+    """The resolved_by walk behind both the dry run and the real cleanup."""
+
+    @pytest.fixture
+    def lockfile(self) -> LockFile:
+        lockfile = LockFile()
+        lockfile.add_dependencies([
+            LockedDependency(repo_url="acme/pkg-a", depth=1),
+            LockedDependency(repo_url="acme/pkg-b", depth=2, resolved_by="acme/pkg-a"),
+            LockedDependency(repo_url="acme/pkg-c", depth=3, resolved_by="acme/pkg-b"),
+            LockedDependency(repo_url="acme/pkg-d", depth=2, resolved_by="acme/pkg-a"),
+            LockedDependency(repo_url="acme/pkg-x", depth=1),
+            LockedDependency(repo_url="acme/pkg-y", depth=2, resolved_by="acme/pkg-x"),
+            # A resolved_by cycle must not loop forever.
+            LockedDependency(repo_url="acme/loop-1", depth=2, resolved_by="acme/loop-2"),
+            LockedDependency(repo_url="acme/loop-2", depth=3, resolved_by="acme/loop-1"),
+        ])
+        return lockfile
+
+    def test_collects_whole_subtree(self, lockfile):
+        assert _find_transitive_orphans(lockfile, {"acme/pkg-a"}) == {
+            "acme/pkg-b", "acme/pkg-c", "acme/pkg-d",
+        }
+
+    def test_multiple_roots(self, lockfile):
+        assert _find_transitive_orphans(lockfile, {"acme/pkg-b", "acme/pkg-x"}) == {
+            "acme/pkg-c", "acme/pkg-y",
+        }
+
+    def test_cycle_terminates(self, lockfile):
+        assert _find_transitive_orphans(lockfile, {"acme/loop-1"}) == {
+            "acme/loop-1", "acme/loop-2",
+        }
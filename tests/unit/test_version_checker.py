@@ -1,10 +1,13 @@
 """Tests for version checker utility."""
 
-import unittest
-from unittest.mock import patch, Mock
-from pathlib import Path
-import tempfile
+import os
+import sys
 import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
 
 from apm_cli.utils.version_checker import (
     get_latest_version_from_github,
@@ -16,122 +19,105 @@ from apm_cli.utils.version_checker import (
 )
 
 
-class TestVersionParser(unittest.TestCase):
+class TestVersionParser:
     """Test version parsing functionality."""
 
-    def test_parse_stable_version(self):
+    @pytest.mark.parametrize(
+        "version, expected",
+        [
+            ("0.6.3", (0, 6, 3, "")),
+            ("1.0.0", (1, 0, 0, "")),
+            ("10.20.30", (10, 20, 30, "")),
+        ],
+    )
+    def test_parse_stable_version(self, version, expected):
         """Test parsing stable version strings."""
-        result = parse_version("0.6.3")
-        self.assertEqual(result, (0, 6, 3, ""))
-
-        result = parse_version("1.0.0")
-        self.assertEqual(result, (1, 0, 0, ""))
-
-        result = parse_version("10.20.30")
-        self.assertEqual(result, (10, 20, 30, ""))
-
-    def test_parse_prerelease_version(self):
+        assert parse_version(version) == expected
+
+    @pytest.mark.parametrize(
+        "version, expected",
+        [
+            ("0.7.0a1", (0, 7, 0, "a1")),
+            ("1.0.0b2", (1, 0, 0, "b2")),
+            ("2.0.0rc1", (2, 0, 0, "rc1")),
+        ],
+    )
+    def test_parse_prerelease_version(self, version, expected):
         """Test parsing prerelease version strings."""
-        result = parse_version("0.7.0a1")
-        self.assertEqual(result, (0, 7, 0, "a1"))
-
-        result = parse_version("1.0.0b2")
-        self.assertEqual(result, (1, 0, 0, "b2"))
+        assert parse_version(version) == expected
 
-        result = parse_version("2.0.0rc1")
-        self.assertEqual(result, (2, 0, 0, "rc1"))
-
-    def test_parse_invalid_version(self):
+    # 'v' prefix is not accepted by parse_version
+    @pytest.mark.parametrize("version", ["invalid", "1.2", "1.2.3.4", "v0.6.3", ""])
+    def test_parse_invalid_version(self, version):
         """Test parsing invalid version strings."""
-        self.assertIsNone(parse_version("invalid"))
-        self.assertIsNone(parse_version("1.2"))
-        self.assertIsNone(parse_version("1.2.3.4"))
-        self.assertIsNone(
-            parse_version("v0.6.3")
-        )  # 'v' prefix is not accepted by parse_version
-        self.assertIsNone(parse_version(""))
+        assert parse_version(version) is None
 
 
-class TestVersionComparison(unittest.TestCase):
+class TestVersionComparison:
     """Test version comparison functionality."""
 
-    def test_newer_major_version(self):
-        """Test comparison with newer major version."""
-        self.assertTrue(is_newer_version("0.6.3", "1.0.0"))
-        self.assertFalse(is_newer_version("1.0.0", "0.6.3"))
-
-    def test_newer_minor_version(self):
-        """Test comparison with newer minor version."""
-        self.assertTrue(is_newer_version("0.6.3", "0.7.0"))
-        self.assertFalse(is_newer_version("0.7.0", "0.6.3"))
-
-    def test_newer_patch_version(self):
-        """Test comparison with newer patch version."""
-        self.assertTrue(is_newer_version("0.6.3", "0.6.4"))
-        self.assertFalse(is_newer_version("0.6.4", "0.6.3"))
-
-    def test_same_version(self):
-        """Test comparison with same version."""
-        self.assertFalse(is_newer_version("0.6.3", "0.6.3"))
-        self.assertFalse(is_newer_version("1.0.0", "1.0.0"))
-
-    def test_prerelease_versions(self):
-        """Test comparison with prerelease versions."""
-        # Stable is newer than prerelease
-        self.assertTrue(is_newer_version("0.6.3a1", "0.6.3"))
-        self.assertFalse(is_newer_version("0.6.3", "0.6.3a1"))
-
-        # Compare prereleases
-        self.assertTrue(is_newer_version("0.6.3a1", "0.6.3a2"))
-        self.assertTrue(is_newer_version("0.6.3a2", "0.6.3b1"))
-        self.assertTrue(is_newer_version("0.6.3b1", "0.6.3rc1"))
-
-    def test_invalid_versions(self):
-        """Test comparison with invalid versions."""
-        self.assertFalse(is_newer_version("invalid", "0.6.3"))
-        self.assertFalse(is_newer_version("0.6.3", "invalid"))
-        self.assertFalse(is_newer_version("invalid", "invalid"))
-
-
-class TestGitHubVersionFetch(unittest.TestCase):
+    @pytest.mark.parametrize(
+        "current, latest, expected",
+        [
+            pytest.param("0.6.3", "1.0.0", True, id="newer-major"),
+            pytest.param("1.0.0", "0.6.3", False, id="older-major"),
+            pytest.param("0.6.3", "0.7.0", True, id="newer-minor"),
+            pytest.param("0.7.0", "0.6.3", False, id="older-minor"),
+            pytest.param("0.6.3", "0.6.4", True, id="newer-patch"),
+            pytest.param("0.6.4", "0.6.3", False, id="older-patch"),
+            pytest.param("0.6.3", "0.6.3", False, id="same"),
+            pytest.param("1.0.0", "1.0.0", False, id="same-major"),
+            # Stable is newer than prerelease
+            pytest.param("0.6.3a1", "0.6.3", True, id="stable-after-prerelease"),
+            pytest.param("0.6.3", "0.6.3a1", False, id="prerelease-before-stable"),
+            pytest.param("0.6.3a1", "0.6.3a2", True, id="alpha-bump"),
+            pytest.param("0.6.3a2", "0.6.3b1", True, id="alpha-to-beta"),
+            pytest.param("0.6.3b1", "0.6.3rc1", True, id="beta-to-rc"),
+            pytest.param("invalid", "0.6.3", False, id="invalid-current"),
+            pytest.param("0.6.3", "invalid", False, id="invalid-latest"),
+            pytest.param("invalid", "invalid", False, id="both-invalid"),
+        ],
+    )
+    def test_is_newer_version(self, current, latest, expected):
+        assert is_newer_version(current, latest) is expected
+
+
+def _resp(status, tag=None):
+    """Build a minimal stand-in for a ``requests`` response."""
+    return SimpleNamespace(status_code=status, json=lambda: {"tag_name": tag})
+
+
+class TestGitHubVersionFetch:
     """Test fetching latest version from GitHub."""
 
     @patch("requests.get")
     def test_fetch_successful(self, mock_get):
         """Test successful version fetch from GitHub."""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"tag_name": "v0.7.0"}
-        mock_get.return_value = mock_response
+        mock_get.return_value = _resp(200, "v0.7.0")
 
         result = get_latest_version_from_github()
-        self.assertEqual(result, "0.7.0")
+        assert result == "0.7.0"
 
         # Verify API call
         mock_get.assert_called_once()
         call_args = mock_get.call_args
-        self.assertIn("microsoft/apm", call_args[0][0])
+        assert "microsoft/apm" in call_args[0][0]
 
     @patch("requests.get")
     def test_fetch_without_v_prefix(self, mock_get):
         """Test version fetch when tag doesn't have 'v' prefix."""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"tag_name": "0.7.0"}
-        mock_get.return_value = mock_response
+        mock_get.return_value = _resp(200, "0.7.0")
 
         result = get_latest_version_from_github()
-        self.assertEqual(result, "0.7.0")
+        assert result == "0.7.0"
 
     @patch("requests.get")
     def test_fetch_api_error(self, mock_get):
         """Test handling of API errors."""
-        mock_response = Mock()
-        mock_response.status_code = 404
-        mock_get.return_value = mock_response
+        mock_get.return_value = _resp(404)
 
         result = get_latest_version_from_github()
-        self.assertIsNone(result)
+        assert result is None
 
     @patch("requests.get")
     def test_fetch_network_error(self, mock_get):
@@ -139,70 +125,50 @@ class TestGitHubVersionFetch(unittest.TestCase):
         mock_get.side_effect = Exception("Network error")
 
         result = get_latest_version_from_github()
-        self.assertIsNone(result)
+        assert result is None
 
     @patch("requests.get")
     def test_fetch_invalid_version(self, mock_get):
         """Test handling of invalid version format."""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"tag_name": "invalid-version"}
-        mock_get.return_value = mock_response
+        mock_get.return_value = _resp(200, "invalid-version")
 
         result = get_latest_version_from_github()
-        self.assertIsNone(result)
+        assert result is None
 
-    @patch("builtins.__import__")
-    def test_fetch_without_requests_library(self, mock_import):
+    def test_fetch_without_requests_library(self, monkeypatch):
         """Test behavior when requests library is not available."""
-
-        # This test verifies graceful degradation
-        def import_side_effect(name, *args, **kwargs):
-            if name == "requests":
-                raise ImportError("No module named 'requests'")
-            return __import__(name, *args, **kwargs)
-
-        mock_import.side_effect = import_side_effect
+        # A None entry in sys.modules makes ``import requests`` raise ImportError
+        monkeypatch.setitem(sys.modules, "requests", None)
 
         result = get_latest_version_from_github()
-        self.assertIsNone(result)
+        assert result is None
 
 
-class TestVersionCheckCache(unittest.TestCase):
+class TestVersionCheckCache:
     """Test version check caching functionality."""
 
-    def setUp(self):
-        """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.cache_file = Path(self.temp_dir) / "last_version_check"
-
-    def tearDown(self):
-        """Clean up test fixtures."""
-        import shutil
-
-        if Path(self.temp_dir).exists():
-            shutil.rmtree(self.temp_dir)
+    @pytest.fixture(autouse=True)
+    def _cache_file(self, tmp_path):
+        """Point each test at its own cache file."""
+        self.cache_file = tmp_path / "last_version_check"
 
     @patch("apm_cli.utils.version_checker.get_update_cache_path")
     def test_should_check_no_cache(self, mock_cache_path):
         """Test that check is needed when no cache exists."""
         mock_cache_path.return_value = self.cache_file
-        self.assertTrue(should_check_for_updates())
+        assert should_check_for_updates()
 
     @patch("apm_cli.utils.version_checker.get_update_cache_path")
     def test_should_check_old_cache(self, mock_cache_path):
         """Test that check is needed when cache is old."""
         mock_cache_path.return_value = self.cache_file
 
-        # Create cache file with old timestamp
-        self.cache_file.touch()
-        # Set modification time to 2 days ago
-        old_time = time.time() - (2 * 86400)
-        import os
-
-        os.utime(self.cache_file, (old_time, old_time))
+        # Create cache file with a modification time 2 days ago
+        self.cache_file.write_bytes(b"")
+        old_ns = time.time_ns() - 2 * 86400 * 1_000_000_000
+        os.utime(self.cache_file, ns=(old_ns, old_ns))
 
-        self.assertTrue(should_check_for_updates())
+        assert should_check_for_updates()
 
     @patch("apm_cli.utils.version_checker.get_update_cache_path")
     def test_should_not_check_recent_cache(self, mock_cache_path):
@@ -210,9 +176,9 @@ class TestVersionCheckCache(unittest.TestCase):
         mock_cache_path.return_value = self.cache_file
 
         # Create cache file with recent timestamp
-        self.cache_file.touch()
+        self.cache_file.write_bytes(b"")
 
-        self.assertFalse(should_check_for_updates())
+        assert not should_check_for_updates()
 
     @patch("apm_cli.utils.version_checker.get_update_cache_path")
     def test_save_timestamp(self, mock_cache_path):
@@ -221,10 +187,10 @@ class TestVersionCheckCache(unittest.TestCase):
 
         save_version_check_timestamp()
 
-        self.assertTrue(self.cache_file.exists())
+        assert self.cache_file.exists()
 
 
-class TestCheckForUpdates(unittest.TestCase):
+class TestCheckForUpdates:
     """Test the main check_for_updates function."""
 
     @patch("apm_cli.utils.version_checker.should_check_for_updates")
@@ -237,7 +203,7 @@ class TestCheckForUpdates(unittest.TestCase):
 
         result = check_for_updates("0.6.3")
 
-        self.assertEqual(result, "0.7.0")
+        assert result == "0.7.0"
         mock_save.assert_called_once()
 
     @patch("apm_cli.utils.version_checker.should_check_for_updates")
@@ -250,7 +216,7 @@ class TestCheckForUpdates(unittest.TestCase):
 
         result = check_for_updates("0.6.3")
 
-        self.assertIsNone(result)
+        assert result is None
         mock_save.assert_called_once()
 
     @patch("apm_cli.utils.version_checker.should_check_for_updates")
@@ -260,7 +226,7 @@ class TestCheckForUpdates(unittest.TestCase):
 
         result = check_for_updates("0.6.3")
 
-        self.assertIsNone(result)
+        assert result is None
 
     @patch("apm_cli.utils.version_checker.should_check_for_updates")
     @patch("apm_cli.utils.version_checker.get_latest_version_from_github")
@@ -272,11 +238,11 @@ class TestCheckForUpdates(unittest.TestCase):
 
         result = check_for_updates("0.6.3")
 
-        self.assertIsNone(result)
+        assert result is None
         mock_save.assert_called_once()
 
 
-class TestCachePathPlatform(unittest.TestCase):
+class TestCachePathPlatform:
     """Test platform-specific cache path selection."""
 
     @patch("pathlib.Path.mkdir")
@@ -295,6 +261,3 @@ class TestCachePathPlatform(unittest.TestCase):
         result = get_update_cache_path()
         assert result == Path("C:/Users/testuser") / "AppData" / "Local" / "apm" / "cache" / "last_version_check"
 
-
-if __name__ == "__main__":
-    unittest.main()
@@ -3,7 +3,7 @@
 import pytest
 import yaml
 
-from apm_cli.utils.yaml_io import dump_yaml, load_yaml, yaml_to_str
+from apm_cli.utils.yaml_io import dump_yaml, load_yaml, yaml_from_str, yaml_to_str
 
 
 class TestLoadYaml:
@@ -130,6 +130,24 @@ class TestYamlToStr:
         assert isinstance(result, str)
 
 
+class TestYamlFromStr:
+    """Tests for yaml_from_str()."""
+
+    def test_roundtrip_with_yaml_to_str(self):
+        """Parsing serialized output returns the original data."""
+        data = {"name": "L\u00f3pez", "deps": ["a/b", "c/d"], "n": 1}
+        assert yaml_from_str(yaml_to_str(data)) == data
+
+    def test_empty_string_returns_none(self):
+        """Empty input parses to None."""
+        assert yaml_from_str("") is None
+
+    def test_rejects_unsafe_tags(self):
+        """Arbitrary Python object tags are refused by the safe loader."""
+        with pytest.raises(yaml.YAMLError):
+            yaml_from_str("!!python/object/apply:os.system ['true']")
+
+
 class TestCrossPlatformSafety:
     """Simulate the Windows cp1252 mismatch scenario."""
 